@@ -7,7 +7,7 @@ from typing import Any
 from sqlalchemy.future import select
 
 import models
-from schemas import CharacterCreate, Characters, CharacterUpdate
+from schemas import Character, CharacterCreate, Characters, CharacterUpdate
 
 
 async def fetch_characters_from_db(user, db) -> Characters:
@@ -28,6 +28,76 @@ async def fetch_characters_from_db(user, db) -> Characters:
     return Characters(characters=character_list)
 
 
+def convert_to_player_dict(character: Character) -> dict[str, Any]:
+    """Returns a reformatted dictionary using `character`.
+
+    Args:
+        character (Character): The Character object to be converted.
+
+    Returns:
+        dict[str, Any]: Dictionary formatted for use by the simulation.
+    """
+    defense_dict = {
+        "armor_class": character.defenses.armor_class,
+        "saves": {
+            "fortitude": character.defenses.saves.fortitude,
+            "reflex": character.defenses.saves.reflex,
+            "will": character.defenses.saves.will,
+        },
+    }
+    actions_dict = {
+        "attacks": [],
+        "spells": [],
+        "heals": character.actions.heals,
+        "shield": character.actions.shield,
+    }
+    if character.actions.attacks:
+        for attack in character.actions.attacks:
+            attack_dict = {
+                "name": attack.name,
+                "attackBonus": attack.attackBonus,
+                "damage": attack.damage,
+                "damageType": attack.damageType,
+                "range": attack.range,
+                "traits": attack.traits,
+            }
+            actions_dict["attacks"].append(attack_dict)
+    if character.actions.spells:
+        for spell in character.actions.spells:
+            spell_dict = {
+                "name": spell.name,
+                "slots": spell.slots,
+                "level": spell.level,
+                "damage_roll": spell.damage_roll,
+                "damage_type": spell.damage_type,
+                "range": spell.range_,
+                "area": spell.area,
+                "save": spell.save,
+                "targets": spell.targets,
+                "actions": spell.actions,
+            }
+            actions_dict["spells"].append(spell_dict)
+
+    player_dict = {
+        "name": character.name,
+        "level": character.level,
+        "perception": character.perception,
+        "max_hit_points": character.max_hit_points,
+        "spell_attack_bonus": character.spell_attack_bonus,
+        "spell_dc": character.spell_dc,
+        "speed": character.speed,
+        "skills": dict(character.skills),
+        "attribute_modifiers": dict(character.attribute_modifiers),
+        "defenses": defense_dict,
+        "actions": actions_dict,
+        "ancestry": character.ancestry,
+        "heritage": character.heritage,
+        "class": character.class_,
+    }
+
+    return player_dict
+
+
 def convert_to_db_character(
     character: CharacterCreate, user: models.User
 ) -> models.Character:
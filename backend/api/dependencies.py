@@ -8,6 +8,23 @@ from sqlalchemy.ext.asyncio import AsyncSession
 import models  # noqa: F401
 import schemas  # noqa: F401
 from db import get_db  # noqa: F401
+from simulation.core.executor import ProcessPoolSimulationExecutor
 from simulation.core.simulation import run_simulation  # noqa: F401
 
+from .enemy_catalog import EnemyCatalog
+from .party_cache import PartyCache
+from .simulation_jobs import SimulationJobQueue
+
 db_dependency = Annotated[AsyncSession, Depends(get_db)]
+
+# Long-lived pool of processes shared by every simulation request
+simulation_executor = ProcessPoolSimulationExecutor()
+
+# Bounded queue of background simulation jobs, run on the same executor
+simulation_jobs = SimulationJobQueue(simulation_executor)
+
+# Every enemy, loaded once and shared by every request
+enemy_catalog = EnemyCatalog()
+
+# Each recent user's party, converted for the simulation
+party_cache = PartyCache()
@@ -0,0 +1,200 @@
+"""Defines the catalog of enemies kept in memory by the API.
+
+The enemies table only changes when populate.py is run, so rather than
+reading and validating every enemy on each request, the API loads them all
+once and keeps them. populate.py stamps the table with a version, a hash of
+its contents, and the catalog reloads the enemies whenever that changes.
+
+The full list of enemies is also serialized, given an ETag and compressed
+with brotli and gzip on each load, so serving it again only means picking a
+stored body.
+
+"""
+
+import asyncio
+import gzip
+import hashlib
+import time
+from typing import Any
+
+import brotli
+from fastapi import Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+import models
+from schemas import Enemies, Enemy
+
+from .enemy_helpers import choose_encoding, convert_to_enemy_dict, etag_matches
+from .exceptions import NotFoundException
+
+
+class EnemyCatalog:
+    """Every enemy in the database, loaded once and kept in memory.
+
+    The version stamped by populate.py is checked at most once every
+    `check_interval` seconds, and the enemies are only reloaded when it has
+    changed. A database that has never been stamped has a version of None,
+    so its enemies are loaded once and kept.
+
+    Attributes:
+        check_interval: The fewest seconds between checks of the version.
+        version: The version the enemies were loaded at.
+        enemies: Every enemy, validated and ready to be returned by the API.
+        templates: The dictionary that initializes each enemy in a
+            simulation, keyed by its ID.
+        body: `enemies` serialized as JSON.
+        etag: A weak ETag of `body`, which changes whenever it does.
+        encoded: `body` compressed with each content encoding offered,
+            most preferred first.
+        loads: The number of times the enemies have been loaded.
+    """
+
+    def __init__(self, check_interval: float = 5.0):
+        """Initializes an empty catalog, loaded on its first refresh.
+
+        Args:
+            check_interval (float, optional): The fewest seconds between
+                checks of the version. Defaults to 5.0.
+        """
+        self.check_interval: float = check_interval
+        self.version: str = None
+        self.enemies: Enemies = None
+        self.templates: dict[int, dict[str, Any]] = {}
+        self.body: bytes = None
+        self.etag: str = None
+        self.encoded: dict[str, bytes] = {}
+        self.loads: int = 0
+
+        self._by_id: dict[int, Enemy] = {}
+        self._checked_at: float = None
+        self._lock = asyncio.Lock()
+
+    # Public Methods
+
+    async def refresh(self, db: AsyncSession) -> None:
+        """Loads the enemies if they are missing or out of date.
+
+        Args:
+            db (AsyncSession): A SQLAlchemy database session
+        """
+        if not self._is_due():
+            return
+        async with self._lock:
+            # Another request may have refreshed while this one waited
+            if not self._is_due():
+                return
+            query = select(models.CatalogVersion)
+            query = query.where(
+                models.CatalogVersion.name == models.Enemy.__tablename__
+            )
+            result = await db.execute(query)
+            stamp = result.scalars().first()
+            version = stamp.version if stamp else None
+
+            if self.enemies is None or version != self.version:
+                await self._load(db)
+                self.version = version
+            self._checked_at = time.monotonic()
+
+    def response(
+        self, if_none_match: str = None, accept_encoding: str = None
+    ) -> Response:
+        """Returns the response to a request for every enemy.
+
+        Args:
+            if_none_match (str, optional): The request's If-None-Match
+                header. Defaults to None.
+            accept_encoding (str, optional): The request's Accept-Encoding
+                header. Defaults to None.
+
+        Returns:
+            Response: A 304 Not Modified if the client's copy has this
+                catalog's ETag, otherwise the serialized enemies in the best
+                encoding the client accepts.
+        """
+        headers = {
+            "ETag": self.etag,
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding",
+        }
+        if etag_matches(if_none_match, self.etag):
+            return Response(
+                status_code=status.HTTP_304_NOT_MODIFIED, headers=headers
+            )
+
+        encoding = choose_encoding(accept_encoding, list(self.encoded))
+        if encoding is None:
+            body = self.body
+        else:
+            body = self.encoded[encoding]
+            headers["Content-Encoding"] = encoding
+        return Response(
+            content=body, media_type="application/json", headers=headers
+        )
+
+    def get_enemy(self, enemy_id: int) -> Enemy:
+        """Returns the enemy with ID `enemy_id`.
+
+        Args:
+            enemy_id (int): The ID of the enemy
+
+        Raises:
+            NotFoundException: If there is no enemy with that ID
+
+        Returns:
+            Enemy: The enemy
+        """
+        enemy = self._by_id.get(enemy_id)
+        if enemy is None:
+            raise NotFoundException(route=f"enemy with ID {enemy_id}")
+        return enemy
+
+    def get_templates(self, enemy_ids: list[int]) -> dict[int, dict]:
+        """Returns the simulation dictionary of every enemy in `enemy_ids`.
+
+        Args:
+            enemy_ids (list[int]): The IDs of the enemies, possibly repeated
+
+        Raises:
+            NotFoundException: If any of the IDs do not belong to an enemy
+
+        Returns:
+            dict[int, dict]: The dictionary initializing each enemy, keyed by
+                its ID. Each is shared by every caller, so must not be
+                modified.
+        """
+        missing = sorted(set(enemy_ids) - self.templates.keys())
+        if missing:
+            ids = ", ".join(str(enemy_id) for enemy_id in missing)
+            raise NotFoundException(route=f"enemy with ID {ids}")
+        return {enemy_id: self.templates[enemy_id] for enemy_id in enemy_ids}
+
+    # Private Methods
+
+    def _is_due(self) -> bool:
+        return (
+            self.enemies is None
+            or time.monotonic() - self._checked_at >= self.check_interval
+        )
+
+    async def _load(self, db: AsyncSession) -> None:
+        query = select(models.Enemy).order_by(models.Enemy.id)
+        result = await db.execute(query)
+        db_enemies = result.scalars().all()
+
+        self.enemies = Enemies(enemies=[e.__dict__ for e in db_enemies])
+        self._by_id = {enemy.id: enemy for enemy in self.enemies.enemies}
+        self.templates = {
+            db_enemy.id: convert_to_enemy_dict(db_enemy)
+            for db_enemy in db_enemies
+        }
+
+        # Serialized as FastAPI would serialize the response model
+        self.body = self.enemies.model_dump_json(by_alias=True).encode()
+        self.etag = f'W/"{hashlib.sha256(self.body).hexdigest()[:32]}"'
+        self.encoded = {
+            "br": brotli.compress(self.body),
+            "gzip": gzip.compress(self.body, mtime=0),
+        }
+        self.loads += 1
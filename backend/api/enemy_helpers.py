@@ -0,0 +1,192 @@
+"""Defines helper functions related to the enemies API route."""
+
+import base64
+import binascii
+import json
+from typing import Any
+
+from sqlalchemy import Select, func, tuple_
+from sqlalchemy.future import select
+
+import models
+
+from .exceptions import BadRequestException
+
+
+def convert_to_enemy_dict(enemy: models.Enemy) -> dict[str, Any]:
+    """Returns a reformatted dictionary using `enemy`.
+
+    Args:
+        enemy (models.Enemy): The enemy from the database to be converted.
+
+    Returns:
+        dict[str, Any]: Dictionary formatted for use by the simulation.
+    """
+    enemy_dict = {
+        "name": enemy.name,
+        "level": enemy.level,
+        "perception": enemy.perception,
+        "max_hit_points": enemy.max_hit_points,
+        "spell_attack_bonus": enemy.spell_attack_bonus,
+        "spell_dc": enemy.spell_dc,
+        "speed": enemy.speed,
+        "skills": enemy.skills,
+        "attribute_modifiers": enemy.attribute_modifiers,
+        "defenses": enemy.defenses,
+        "actions": enemy.actions,
+        "traits": enemy.traits,
+        "immunities": enemy.immunities,
+        "weaknesses": enemy.weaknesses,
+        "resistances": enemy.resistances,
+    }
+
+    return enemy_dict
+
+
+def choose_encoding(accept_encoding: str, available: list[str]) -> str:
+    """Returns the encoding to send a response in.
+
+    Args:
+        accept_encoding (str): The request's Accept-Encoding header, if any.
+        available (list[str]): The encodings the response is available in,
+            most preferred first.
+
+    Returns:
+        str: The available encoding the client accepts most, the first on a
+            tie, or None to send the response unencoded.
+    """
+    qualities = {}
+    for coding in (accept_encoding or "").split(","):
+        name, _, params = coding.partition(";")
+        quality = 1.0
+        params = params.strip().replace(" ", "")
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[name.strip().lower()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in available:
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Returns whether an If-None-Match header matches `etag`.
+
+    Tags are compared weakly, ignoring whether either is marked weak.
+
+    Args:
+        if_none_match (str): The request's If-None-Match header, if any.
+        etag (str): The current ETag of the resource.
+
+    Returns:
+        bool: True if the client's copy is up to date.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    etag = etag.removeprefix("W/")
+    return any(
+        tag.strip().removeprefix("W/") == etag
+        for tag in if_none_match.split(",")
+    )
+
+
+def build_enemy_search(
+    min_level: int = None,
+    max_level: int = None,
+    traits: list[str] = None,
+    immunities: list[str] = None,
+    name: str = None,
+    after: str = None,
+) -> Select:
+    """Builds the query for a page of the enemy search.
+
+    Enemies are ordered by level, then name, then ID, the order of the
+    enemies table's composite index, and each page starts after the last
+    enemy of the one before it, so deep pages cost as little as the first.
+    The trait and immunity filters are backed by GIN indexes and the name
+    filter by an index on the lowercased name.
+
+    Args:
+        min_level (int, optional): The lowest level to include.
+        max_level (int, optional): The highest level to include.
+        traits (list[str], optional): Traits every enemy must have.
+        immunities (list[str], optional): Damage types every enemy must be
+            immune to.
+        name (str, optional): The start of the enemy's name, in any case.
+        after (str, optional): The cursor of the previous page.
+
+    Raises:
+        BadRequestException: If `after` is not a valid cursor
+
+    Returns:
+        Select: The query, without a limit
+    """
+    query = select(models.Enemy)
+    if min_level is not None:
+        query = query.where(models.Enemy.level >= min_level)
+    if max_level is not None:
+        query = query.where(models.Enemy.level <= max_level)
+    if traits:
+        query = query.where(models.Enemy.traits.contains(traits))
+    if immunities:
+        query = query.where(models.Enemy.immunities.contains(immunities))
+    if name:
+        # A constant pattern lets Postgres use the name index for the prefix
+        prefix = name.lower()
+        for character in "/%_":
+            prefix = prefix.replace(character, "/" + character)
+        query = query.where(
+            func.lower(models.Enemy.name).like(prefix + "%", escape="/")
+        )
+    if after is not None:
+        key = tuple_(models.Enemy.level, models.Enemy.name, models.Enemy.id)
+        query = query.where(key > tuple_(*decode_cursor(after)))
+    return query.order_by(
+        models.Enemy.level, models.Enemy.name, models.Enemy.id
+    )
+
+
+def encode_cursor(enemy: models.Enemy) -> str:
+    """Returns the cursor of the page of search results after `enemy`.
+
+    Args:
+        enemy (models.Enemy): The last enemy on a page
+
+    Returns:
+        str: An opaque, URL safe cursor
+    """
+    key = json.dumps([enemy.level, enemy.name, enemy.id])
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[int, str, int]:
+    """Returns the level, name, and ID a search cursor continues after.
+
+    Args:
+        cursor (str): A cursor made by `encode_cursor`
+
+    Raises:
+        BadRequestException: If the cursor is malformed
+
+    Returns:
+        tuple[int, str, int]: The last enemy's level, name, and ID
+    """
+    try:
+        level, name, enemy_id = json.loads(base64.urlsafe_b64decode(cursor))
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise BadRequestException("Invalid search cursor")
+    if not (
+        isinstance(level, int)
+        and isinstance(name, str)
+        and isinstance(enemy_id, int)
+    ):
+        raise BadRequestException("Invalid search cursor")
+    return level, name, enemy_id
@@ -50,3 +50,27 @@ class InternalServerError(HTTPException):
     def __init__(self, message: str):
         self.status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
         self.detail = f"Internal Server Error: {message}"
+
+
+class ConflictException(HTTPException):
+    """Returns a 409 exception when a request conflicts with current state.
+
+    Attributes:
+        detail: The error message shown to the user
+    """
+
+    def __init__(self, detail: str = "Conflict"):
+        self.status_code = status.HTTP_409_CONFLICT
+        self.detail = detail
+
+
+class ServiceUnavailableException(HTTPException):
+    """Returns a 503 exception when the server is too busy for a request.
+
+    Attributes:
+        detail: The error message shown to the user
+    """
+
+    def __init__(self, detail: str = "Service Unavailable"):
+        self.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+        self.detail = detail
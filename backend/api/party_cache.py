@@ -0,0 +1,151 @@
+"""Defines the cache of each user's party, ready to be simulated.
+
+Every simulation request needs the user's characters as the dictionaries
+Players are built from. Fetching, validating, and converting them each time
+is wasted work when the party has not changed since the user's last run, so
+the converted party is kept per user until one of their characters changes.
+
+populate.py also rewrites characters, such as the pre-made party, without
+going through the API. It stamps the characters table with a version, as it
+does the enemies table, and every cached party is dropped when that changes.
+
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+import models
+
+from .character_helpers import convert_to_player_dict, fetch_characters_from_db
+
+
+class PartyCache:
+    """Each recent user's party, converted for the simulation.
+
+    Every user has a party revision, which the character routes bump
+    whenever they add, change, or delete one of the user's characters. A
+    cached party is only used while its revision is current, and the least
+    recently used parties are dropped once more than `max_users` are kept.
+
+    Revisions are kept in memory, so the cache assumes a single server
+    process, as the simulation job queue does. The version stamped by
+    populate.py is checked at most once every `check_interval` seconds.
+
+    Attributes:
+        max_users: The most parties kept at once.
+        check_interval: The fewest seconds between checks of the version.
+        version: The version of the characters table last seen.
+        hits: The number of parties served from the cache.
+        misses: The number of parties loaded from the database.
+    """
+
+    def __init__(self, max_users: int = 256, check_interval: float = 5.0):
+        """Initializes an empty cache.
+
+        Args:
+            max_users (int, optional): The most parties kept at once,
+                dropping the least recently used beyond that. Defaults to 256.
+            check_interval (float, optional): The fewest seconds between
+                checks of the version. Defaults to 5.0.
+        """
+        self.max_users: int = max_users
+        self.check_interval: float = check_interval
+        self.version: str = None
+        self.hits: int = 0
+        self.misses: int = 0
+
+        self._revisions: dict[int, int] = {}
+        self._parties: OrderedDict[int, tuple[tuple, list]] = OrderedDict()
+        # Bumped whenever populate.py changes the characters table
+        self._generation: int = 0
+        self._checked_at: float = None
+
+    # Public Methods
+
+    def revision(self, user_id: int) -> int:
+        """Returns the current party revision of the user with `user_id`.
+
+        Args:
+            user_id (int): The ID of the user
+
+        Returns:
+            int: The user's party revision, 0 if it has never changed
+        """
+        return self._revisions.get(user_id, 0)
+
+    def bump(self, user_id: int) -> None:
+        """Marks the party of the user with `user_id` as changed.
+
+        Must be called after the change is committed, so the party cannot
+        be reloaded from before it.
+
+        Args:
+            user_id (int): The ID of the user whose characters changed
+        """
+        self._revisions[user_id] = self.revision(user_id) + 1
+        self._parties.pop(user_id, None)
+
+    async def refresh(self, db: AsyncSession) -> None:
+        """Drops every cached party if populate.py changed the characters.
+
+        Args:
+            db (AsyncSession): A SQLAlchemy database session
+        """
+        now = time.monotonic()
+        if (
+            self._checked_at is not None
+            and now - self._checked_at < self.check_interval
+        ):
+            return
+        self._checked_at = now
+
+        result = await db.execute(select(models.CatalogVersion))
+        stamps = result.scalars().all()
+        versions = {stamp.name: stamp.version for stamp in stamps}
+        version = versions.get(models.Character.__tablename__)
+        if version != self.version:
+            self.version = version
+            self._generation += 1
+            self._parties.clear()
+
+    async def get_party(
+        self, user: models.User, db: AsyncSession
+    ) -> list[dict[str, Any]]:
+        """Returns `user`'s characters as dictionaries to initialize Players.
+
+        Args:
+            user (models.User): The user whose party should be returned
+            db (AsyncSession): A SQLAlchemy database session, used to check
+                the version and to load the party if it is not cached
+
+        Returns:
+            list[dict[str, Any]]: A dictionary for each character. They are
+                shared by every request from the user, so must not be
+                modified.
+        """
+        await self.refresh(db)
+        revision = (self._generation, self.revision(user.id))
+        entry = self._parties.get(user.id)
+        if entry is not None and entry[0] == revision:
+            self._parties.move_to_end(user.id)
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        result = await fetch_characters_from_db(user, db)
+        players = [
+            convert_to_player_dict(character)
+            for character in result.characters
+        ]
+
+        # The party may have changed while it was being fetched
+        if (self._generation, self.revision(user.id)) == revision:
+            self._parties[user.id] = (revision, players)
+            self._parties.move_to_end(user.id)
+            if len(self._parties) > self.max_users:
+                self._parties.popitem(last=False)
+        return players
@@ -26,7 +26,7 @@ from ..character_helpers import (
     convert_to_db_character,
     fetch_characters_from_db,
 )
-from ..dependencies import db_dependency
+from ..dependencies import db_dependency, party_cache
 from ..exceptions import (
     ForbiddenException,
     InternalServerError,
@@ -95,6 +95,7 @@ async def add_character(
 
         db.add(db_character)
         await db.commit()
+        party_cache.bump(current_user.id)
         await db.refresh(db_character)
     except HTTPException as http_err:
         raise http_err
@@ -144,6 +145,7 @@ async def import_character(
 
         db.add(db_character)
         await db.commit()
+        party_cache.bump(current_user.id)
         await db.refresh(db_character)
     except HTTPException as http_err:
         raise http_err
@@ -202,6 +204,7 @@ async def update_character(
             setattr(db_character, key, value)
 
         await db.commit()
+        party_cache.bump(current_user.id)
         await db.refresh(db_character)
 
         updated_character = Character.from_orm(db_character)
@@ -257,5 +260,6 @@ async def delete_character(
 
     await db.delete(character)
     await db.commit()
+    party_cache.bump(current_user.id)
 
     return {"message": "Character deleted"}
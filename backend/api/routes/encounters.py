@@ -83,8 +83,14 @@ async def add_encounter(
         Encounter: The encounter added to the database
     """
     try:
+        battle_map = None
+        if encounter.battle_map is not None:
+            battle_map = encounter.battle_map.model_dump()
         db_encounter = models.Encounter(
-            name=encounter.name, enemies=encounter.enemies, user=current_user
+            name=encounter.name,
+            enemies=encounter.enemies,
+            battle_map=battle_map,
+            user=current_user,
         )
         db.add(db_encounter)
         await db.commit()
@@ -1,55 +1,113 @@
 """Functions for API calls related to enemies
 
 Defines functions that are called when a request is made to the /enemies
-route of the API, including reading enemies.
+route of the API, including reading enemies. Enemies are served from the
+in-memory enemy catalog, which only reads the database when populate.py has
+changed the enemies since they were last loaded. The full list is served
+precompressed with an ETag, so clients can revalidate their copy cheaply.
 
 """
 
-from fastapi import APIRouter, status
-from sqlalchemy.future import select
+from typing import Annotated
 
-import models
-from schemas import Enemies, Enemy
+from fastapi import APIRouter, Query, Request, Response, status
 
-from ..dependencies import db_dependency
+from schemas import Enemies, Enemy, EnemyPage
+
+from ..dependencies import db_dependency, enemy_catalog
+from ..enemy_helpers import build_enemy_search, encode_cursor
 
 router = APIRouter()
 
+# The most enemies returned by one page of a search
+MAX_PAGE_SIZE = 200
+
 
 @router.get("/enemies", response_model=Enemies, status_code=status.HTTP_200_OK)
-async def get_enemies(db: db_dependency) -> Enemies:
-    """Fetches all enemies from the database.
+async def get_enemies(request: Request, db: db_dependency) -> Response:
+    """Fetches all enemies from the enemy catalog.
 
     Args:
+        request (Request): The request, whose If-None-Match and
+            Accept-Encoding headers are honoured
         db (db_dependency): A SQLAlchemy database session
 
     Returns:
-        Enemies: A list of enemy objects
+        Response: A list of enemy objects, or 304 Not Modified if the
+            client's copy is up to date
     """
-    query = select(models.Enemy)
-    result = await db.execute(query)
-    enemies = result.scalars().all()
-    enemy_list = [e.__dict__ for e in enemies]
-    return Enemies(enemies=enemy_list)
+    await enemy_catalog.refresh(db)
+    return enemy_catalog.response(
+        request.headers.get("if-none-match"),
+        request.headers.get("accept-encoding"),
+    )
+
+
+# Declared before /enemies/{enemy_id}, so "search" is not taken as an ID
+@router.get(
+    "/enemies/search", response_model=EnemyPage, status_code=status.HTTP_200_OK
+)
+async def search_enemies(
+    db: db_dependency,
+    min_level: int = None,
+    max_level: int = None,
+    traits: Annotated[list[str], Query()] = None,
+    immunities: Annotated[list[str], Query()] = None,
+    name: str = None,
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = 50,
+    after: str = None,
+) -> EnemyPage:
+    """Fetches one page of the enemies matching every filter given.
+
+    Args:
+        db (db_dependency): A SQLAlchemy database session
+        min_level (int, optional): The lowest level to include
+        max_level (int, optional): The highest level to include
+        traits (list[str], optional): Traits every enemy must have
+        immunities (list[str], optional): Damage types every enemy must be
+            immune to
+        name (str, optional): The start of the enemy's name, in any case
+        limit (int, optional): The most enemies to return. Defaults to 50.
+        after (str, optional): The `next_cursor` of the previous page
+
+    Raises:
+        BadRequestException: If `after` is not a valid cursor
+
+    Returns:
+        EnemyPage: The enemies ordered by level then name, and the cursor
+            of the next page if there is one
+    """
+    query = build_enemy_search(
+        min_level, max_level, traits, immunities, name, after
+    )
+    # One extra enemy shows whether there is another page
+    result = await db.execute(query.limit(limit + 1))
+    db_enemies = result.scalars().all()
+
+    next_cursor = None
+    if len(db_enemies) > limit:
+        db_enemies = db_enemies[:limit]
+        next_cursor = encode_cursor(db_enemies[-1])
+    return EnemyPage(
+        enemies=[e.__dict__ for e in db_enemies], next_cursor=next_cursor
+    )
 
 
 @router.get(
     "/enemies/{enemy_id}", response_model=Enemy, status_code=status.HTTP_200_OK
 )
 async def get_enemy(enemy_id: int, db: db_dependency) -> Enemy:
-    """Fetches the enemy with ID `enemy_id` from the database
+    """Fetches the enemy with ID `enemy_id` from the enemy catalog
 
     Args:
         enemy_id (int): The ID of the enemy to be fetched
         db (db_dependency): A SQLAlchemy database session
 
+    Raises:
+        NotFoundException: If there is no enemy with ID `enemy_id`
+
     Returns:
-        Enemy: An ORM model representing an enemy
+        Enemy: The enemy
     """
-    query = select(models.Enemy)
-    query = query.where(models.Enemy.id == enemy_id)
-
-    result = await db.execute(query)
-    enemy = result.scalars().first()
-
-    return enemy
+    await enemy_catalog.refresh(db)
+    return enemy_catalog.get_enemy(enemy_id)
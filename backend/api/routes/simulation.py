@@ -2,25 +2,53 @@
 
 Defines functions used to run the simulation. Namely, a POST request with the
 enemies for the simulation that gets the current user's characters, fetches the
-enemies from the database, and creates a number of simulation objects, runs a
-simulation for each, and returns data from each simulation as well as overall
-stats about the simulations.
+enemies from the database, runs a number of simulations on the simulation
+executor, and returns data from each simulation as well as overall stats about
+the simulations. Simulations can also be submitted as background jobs whose
+progress and results are polled for separately, which is the only way to
+run more than a hundred at once. Every request is seeded, so the full log of
+any one of its simulations can be replayed on demand, unless the request ran
+out of time, since where it was cut off depends on how busy the server was.
 
 """
 
+import asyncio
+import time
 from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.future import select
 
 import models
-from schemas import Character, Enemy, SimRequest, SimResponse
+from schemas import (
+    SimJob,
+    SimJobRequest,
+    SimReplayRequest,
+    SimReplayResponse,
+    SimRequest,
+    SimResponse,
+)
+from simulation.core.confidence import wilson_interval
+from simulation.core.events import EVENT_SPECS
+from simulation.core.executor import TIME_LIMIT, run_batch
+from simulation.encounters.battle_map import compile_map
 
 from ..auth_helpers import get_current_user
-from ..character_helpers import fetch_characters_from_db
-from ..dependencies import db_dependency, run_simulation
-from ..exceptions import InternalServerError
-from .enemies import get_enemy
+from ..dependencies import (
+    db_dependency,
+    enemy_catalog,
+    party_cache,
+    simulation_executor,
+    simulation_jobs,
+)
+from ..exceptions import (
+    BadRequestException,
+    ConflictException,
+    ForbiddenException,
+    InternalServerError,
+    NotFoundException,
+)
+from ..simulation_jobs import SimulationJob
 
 router = APIRouter()
 
@@ -106,6 +134,215 @@ async def init_sim_with_pregens(
         raise InternalServerError(message=str(e))
 
 
+@router.post(
+    "/simulation/jobs",
+    response_model=SimJob,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def submit_simulation_job(
+    request: SimJobRequest,
+    db: db_dependency,
+    current_user: models.User = Depends(get_current_user),
+) -> SimJob:
+    """Queues simulations using current user's party and requested enemies.
+
+    Loads the current user's characters and the requested enemies, then adds
+    a job to the background queue and returns immediately. The job's progress
+    and results are fetched with the other /simulation/jobs routes. Unlike
+    /simulation, a job may run up to MAX_SIMS simulations, or up to
+    MAX_VECTORIZED_SIMS with the vectorized engine. Jobs only collect combat
+    logs when asked to, and only for up to MAX_SYNC_SIMS simulations, since
+    any one simulation's log can be replayed with /simulation/replay.
+
+    Args:
+        request (SimJobRequest): List of enemy IDs and the quantity of each
+            enemy.
+        db (db_dependency): A SQLAlchemy database session.
+        current_user (models.User, optional): The currently logged in user.
+             Defaults to Depends(get_current_user).
+
+    Raises:
+        http_err: Any HTTPException, raised as-is, including a 503 error if
+            the queue is full.
+        HTTPException: Any other caught exception, raised as an HTTP 500 error.
+
+    Returns:
+        SimJob: The ID and progress of the queued job.
+    """
+    try:
+        players, enemies = await load_simulation_inputs(
+            current_user, request, db
+        )
+        map_dict = await load_battle_map(request, players, enemies)
+        job = simulation_jobs.submit(
+            SimulationJob(
+                current_user.id,
+                players,
+                enemies,
+                request.parameters.model_dump(),
+                request.total_sims,
+                request.collect_log,
+                request.log_format,
+                request.engine,
+                request.seed,
+                convert_margin(request.margin),
+                map_dict,
+            )
+        )
+        return convert_to_sim_job(job)
+
+    except HTTPException as http_err:
+        raise http_err
+    except Exception as e:
+        print(f"Error in submit_simulation_job: {str(e)}")
+        raise InternalServerError(message=str(e))
+
+
+@router.get(
+    "/simulation/jobs/{job_id}",
+    response_model=SimJob,
+    status_code=status.HTTP_200_OK,
+)
+async def get_simulation_job(
+    job_id: str,
+    current_user: models.User = Depends(get_current_user),
+) -> SimJob:
+    """Reports how many of a job's simulations have finished.
+
+    Args:
+        job_id (str): The ID of the job.
+        current_user (models.User, optional): The currently logged in user.
+             Defaults to Depends(get_current_user).
+
+    Raises:
+        NotFoundException: A 404 exception if the job does not exist or its
+            results have expired.
+        ForbiddenException: A 403 exception if the job does not belong to the
+            current user.
+
+    Returns:
+        SimJob: The status and progress of the job.
+    """
+    job = fetch_simulation_job(job_id, current_user)
+    return convert_to_sim_job(job)
+
+
+@router.get(
+    "/simulation/jobs/{job_id}/result",
+    response_model=SimResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def get_simulation_job_result(
+    job_id: str,
+    current_user: models.User = Depends(get_current_user),
+) -> SimResponse:
+    """Fetches the results of a finished simulation job.
+
+    Args:
+        job_id (str): The ID of the job.
+        current_user (models.User, optional): The currently logged in user.
+             Defaults to Depends(get_current_user).
+
+    Raises:
+        NotFoundException: A 404 exception if the job does not exist or its
+            results have expired.
+        ForbiddenException: A 403 exception if the job does not belong to the
+            current user.
+        ConflictException: A 409 exception if the job has not finished yet.
+        InternalServerError: A 500 exception if the job failed.
+
+    Returns:
+        SimResponse: Overall data and data from each simulation.
+    """
+    job = fetch_simulation_job(job_id, current_user)
+
+    if job.status == "failed":
+        raise InternalServerError(message=job.error)
+    if job.status != "complete":
+        raise ConflictException(
+            detail=f"Simulation job is {job.status}, try again later"
+        )
+
+    return build_sim_response(job.results, job.seed)
+
+
+@router.post(
+    "/simulation/replay",
+    response_model=SimReplayResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def replay_sim_with_auth(
+    request: SimReplayRequest,
+    db: db_dependency,
+    current_user: models.User = Depends(get_current_user),
+) -> SimReplayResponse:
+    """Replays one simulation of an earlier request with the user's party.
+
+    Reruns simulation number `sim_num` of the request seeded with `seed`,
+    rebuilding its full combat log. The simulation plays out exactly as it
+    did the first time, as long as the party and enemies have not changed.
+
+    Args:
+        request (SimReplayRequest): The enemies, parameters, and seed of the
+            earlier request, and the number of the simulation to replay.
+        db (db_dependency): A SQLAlchemy database session.
+        current_user (models.User, optional): The currently logged in user.
+             Defaults to Depends(get_current_user).
+
+    Raises:
+        http_err: Any HTTPException, raised as-is.
+        HTTPException: Any other caught exception, raised as an HTTP 500 error.
+
+    Returns:
+        SimReplayResponse: The data and combat log of the simulation.
+    """
+    try:
+        return await replay_simulation(current_user, request, db)
+
+    except HTTPException as http_err:
+        raise http_err
+    except Exception as e:
+        print(f"Error in replay_sim_with_auth: {str(e)}")
+        raise InternalServerError(message=str(e))
+
+
+@router.post(
+    "/simulation_pregen/replay",
+    response_model=SimReplayResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def replay_sim_with_pregens(
+    request: SimReplayRequest,
+    db: db_dependency,
+) -> SimReplayResponse:
+    """Replays one simulation of an earlier request with the pre-made party.
+
+    Args:
+        request (SimReplayRequest): The enemies, parameters, and seed of the
+            earlier request, and the number of the simulation to replay.
+        db (db_dependency): A SQLAlchemy database session.
+
+    Raises:
+        http_err: Any HTTPException, raised as-is.
+        HTTPException: Any other caught exception, raised as an HTTP 500 error.
+
+    Returns:
+        SimReplayResponse: The data and combat log of the simulation.
+    """
+    try:
+        query = select(models.User)
+        query = query.where(models.User.id == 1)
+        result = await db.execute(query)
+        user = result.scalar_one_or_none()
+        return await replay_simulation(user, request, db)
+
+    except HTTPException as http_err:
+        raise http_err
+    except Exception as e:
+        print(f"Error in replay_sim_with_pregens: {str(e)}")
+        raise InternalServerError(message=str(e))
+
+
 async def run_simulations(
     user: models.User, request: SimRequest, db: db_dependency
 ) -> SimResponse:
@@ -119,141 +356,261 @@ async def run_simulations(
     Returns:
         SimResponse: Overall data and data from each simulation.
     """
-    total_sims = 100
-    response = {
-        "total_sims": total_sims,
-        "wins": 0,
-        "wins_ratio": 0.0,
-        "average_deaths": 0.0,
-        "average_rounds": 0.0,
-        "sim_data": [],
-    }
-    players = []
-    result = await fetch_characters_from_db(user, db)
-    characters = result.characters
-    for character in characters:
-        players.append(convert_to_player_dict(character))
+    players, enemies = await load_simulation_inputs(user, request, db)
+    map_dict = await load_battle_map(request, players, enemies)
+
+    results = await simulation_executor.run(
+        players,
+        enemies,
+        request.parameters.model_dump(),
+        request.total_sims,
+        collect_log=request.collect_log,
+        log_format=request.log_format,
+        engine=request.engine,
+        seed=request.seed,
+        margin=convert_margin(request.margin),
+        map_dict=map_dict,
+    )
+
+    return build_sim_response(results, request.seed)
+
+
+async def replay_simulation(
+    user: models.User, request: SimReplayRequest, db: db_dependency
+) -> SimReplayResponse:
+    """Driver to handle replaying one simulation using the passed in `user`.
+
+    A single simulation is quick to run, so it runs on a thread rather than
+    waiting behind other requests on the simulation executor. A simulation
+    that timed out when first run may play further, or time out elsewhere,
+    when replayed.
+
+    Args:
+        user (models.User): The user whose characters should be used.
+        request (SimReplayRequest): The enemies, parameters, and seed of the
+            earlier request, and the number of the simulation to replay.
+        db (db_dependency): A SQLAlchemy database session.
+
+    Returns:
+        SimReplayResponse: The data and combat log of the simulation.
+    """
+    players, enemies = await load_simulation_inputs(user, request, db)
+    map_dict = await load_battle_map(request, players, enemies)
+
+    batch = await asyncio.to_thread(
+        run_batch,
+        players,
+        enemies,
+        request.parameters.model_dump(),
+        request.sim_num,
+        1,
+        log_format=request.log_format,
+        seed=request.seed,
+        map_dict=map_dict,
+        deadline=time.time() + TIME_LIMIT,
+    )
+
+    response = {"sim_data": batch["sim_data"][0]}
+    event_templates = convert_event_logs(batch["sim_data"])
+    if event_templates:
+        response["event_templates"] = event_templates
+    return response
+
 
+async def load_simulation_inputs(
+    user: models.User,
+    request: SimRequest | SimReplayRequest,
+    db: db_dependency,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """Loads the player and enemy dictionaries used to run the simulation.
+
+    Args:
+        user (models.User): The user whose characters should be used.
+        request (SimRequest | SimReplayRequest): List of enemy IDs and the
+            quantity of each enemy.
+        db (db_dependency): A SQLAlchemy database session.
+
+    Raises:
+        NotFoundException: If any requested enemy does not exist.
+
+    Returns:
+        tuple[list[dict[str, Any]], list[dict[str, Any]]]: Dictionaries to
+            initialize the Players and Enemies.
+    """
+    # The party is only fetched and converted again after it changes
+    players = await party_cache.get_party(user, db)
+
+    # Enemies come from the catalog, converted once however many times they
+    # appear in the encounter
+    await enemy_catalog.refresh(db)
+    enemy_dicts = enemy_catalog.get_templates(
+        [enemy.id for enemy in request.enemies]
+    )
     enemies = []
     for enemy in request.enemies:
-        db_enemy = await get_enemy(enemy.id, db)
-        enemy_dict = convert_to_enemy_dict(db_enemy)
-        for i in range(enemy.quantity):
-            enemies.append(enemy_dict)
+        enemies.extend([enemy_dicts[enemy.id]] * enemy.quantity)
 
-    for i in range(total_sims):
-        sim_data = run_simulation(players, enemies, request.parameters)
-        sim_data["sim_num"] = i + 1
-        if sim_data["winner"] == "players":
-            response["wins"] += 1
-        response["sim_data"].append(sim_data)
+    return players, enemies
 
-    response["wins_ratio"] = (response["wins"] / total_sims) * 100
 
-    deaths = sum(data["players_killed"] for data in response["sim_data"])
-    response["average_deaths"] = deaths / total_sims
+async def load_battle_map(
+    request: SimRequest | SimReplayRequest,
+    players: list[dict[str, Any]],
+    enemies: list[dict[str, Any]],
+) -> dict[str, Any]:
+    """Checks the request's map, if any, and returns it as a dictionary.
 
-    total_rounds = sum(data["rounds"] for data in response["sim_data"])
-    response["average_rounds"] = total_rounds / total_sims
+    The map is built once here to check it, which also works out the flow
+    field used to check its spawn squares. Building it runs on a thread,
+    since large maps take a moment.
 
-    return response
+    Args:
+        request (SimRequest | SimReplayRequest): The request, with or
+            without a map.
+        players (list[dict[str, Any]]): The players to be placed on the map.
+        enemies (list[dict[str, Any]]): The enemies to be placed on the map.
+
+    Raises:
+        BadRequestException: A 400 exception if a spawn square is blocked,
+            the spawn squares cannot all reach each other, or either side has
+            more creatures than spawn squares.
+
+    Returns:
+        dict[str, Any]: The map's data, or None if the request has no map.
+    """
+    if request.battle_map is None:
+        return None
 
+    map_dict = request.battle_map.model_dump()
+    try:
+        await asyncio.to_thread(compile_map, map_dict)
+    except ValueError as e:
+        raise BadRequestException(detail=str(e))
+
+    if len(players) > len(map_dict["player_spawns"]):
+        raise BadRequestException(
+            detail=f"The map needs at least {len(players)} player spawns"
+        )
+    if len(enemies) > len(map_dict["enemy_spawns"]):
+        raise BadRequestException(
+            detail=f"The map needs at least {len(enemies)} enemy spawns"
+        )
+
+    return map_dict
 
-def convert_to_player_dict(character: Character) -> dict[str, Any]:
-    """Returns a reformatted dictionary using `character`.
+
+def fetch_simulation_job(
+    job_id: str, current_user: models.User
+) -> SimulationJob:
+    """Fetches the job with ID `job_id` if it belongs to `current_user`.
 
     Args:
-        character (Character): The Character object to be converted.
+        job_id (str): The ID of the job.
+        current_user (models.User): The currently logged in user.
+
+    Raises:
+        NotFoundException: A 404 exception if the job does not exist or its
+            results have expired.
+        ForbiddenException: A 403 exception if the job does not belong to the
+            current user.
 
     Returns:
-        dict[str, Any]: Dictionary formatted for use by the simulation.
+        SimulationJob: The requested job.
     """
-    defense_dict = {
-        "armor_class": character.defenses.armor_class,
-        "saves": {
-            "fortitude": character.defenses.saves.fortitude,
-            "reflex": character.defenses.saves.reflex,
-            "will": character.defenses.saves.will,
-        },
-    }
-    actions_dict = {
-        "attacks": [],
-        "spells": [],
-        "heals": character.actions.heals,
-        "shield": character.actions.shield,
-    }
-    if character.actions.attacks:
-        for attack in character.actions.attacks:
-            attack_dict = {
-                "name": attack.name,
-                "attackBonus": attack.attackBonus,
-                "damage": attack.damage,
-                "damageType": attack.damageType,
-                "range": attack.range,
-                "traits": attack.traits,
-            }
-            actions_dict["attacks"].append(attack_dict)
-    if character.actions.spells:
-        for spell in character.actions.spells:
-            spell_dict = {
-                "name": spell.name,
-                "slots": spell.slots,
-                "level": spell.level,
-                "damage_roll": spell.damage_roll,
-                "damage_type": spell.damage_type,
-                "range": spell.range_,
-                "area": spell.area,
-                "save": spell.save,
-                "targets": spell.targets,
-                "actions": spell.actions,
-            }
-            actions_dict["spells"].append(spell_dict)
-
-    player_dict = {
-        "name": character.name,
-        "level": character.level,
-        "perception": character.perception,
-        "max_hit_points": character.max_hit_points,
-        "spell_attack_bonus": character.spell_attack_bonus,
-        "spell_dc": character.spell_dc,
-        "speed": character.speed,
-        "skills": dict(character.skills),
-        "attribute_modifiers": dict(character.attribute_modifiers),
-        "defenses": defense_dict,
-        "actions": actions_dict,
-        "ancestry": character.ancestry,
-        "heritage": character.heritage,
-        "class": character.class_,
-    }
+    job = simulation_jobs.get(job_id)
 
-    return player_dict
+    if job is None:
+        raise NotFoundException(route="simulation job")
 
+    if job.user_id != current_user.id:
+        raise ForbiddenException(action="view", route="simulation job")
 
-def convert_to_enemy_dict(enemy: Enemy) -> dict[str, Any]:
-    """Returns a reformatted dictionary using `enemy`.
+    return job
+
+
+def convert_to_sim_job(job: SimulationJob) -> SimJob:
+    """Returns the status and progress of `job`.
 
     Args:
-        enemy (Enemy): The Enemy object to be converted.
+        job (SimulationJob): The job to be converted.
 
     Returns:
-        dict[str, Any]: Dictionary formatted for use by the simulation.
+        SimJob: The job's ID, status, and progress.
     """
-    enemy_dict = {
-        "name": enemy.name,
-        "level": enemy.level,
-        "perception": enemy.perception,
-        "max_hit_points": enemy.max_hit_points,
-        "spell_attack_bonus": enemy.spell_attack_bonus,
-        "spell_dc": enemy.spell_dc,
-        "speed": enemy.speed,
-        "skills": enemy.skills,
-        "attribute_modifiers": enemy.attribute_modifiers,
-        "defenses": enemy.defenses,
-        "actions": enemy.actions,
-        "traits": enemy.traits,
-        "immunities": enemy.immunities,
-        "weaknesses": enemy.weaknesses,
-        "resistances": enemy.resistances,
+    return SimJob(
+        job_id=job.id,
+        status=job.status,
+        completed_sims=job.completed_sims,
+        total_sims=job.total_sims,
+    )
+
+
+def build_sim_response(results: dict[str, Any], seed: int) -> SimResponse:
+    """Builds a response with overall stats from merged simulation results.
+
+    Args:
+        results (dict[str, Any]): Counters and data from every simulation, as
+            returned by the simulation executor.
+        seed (int): The seed the simulations were run with.
+
+    Returns:
+        SimResponse: Overall data and data from each simulation.
+    """
+    total_sims = results["total_sims"]
+    lower, upper = wilson_interval(results["wins"], total_sims)
+    response = {
+        "total_sims": total_sims,
+        "wins": results["wins"],
+        "wins_ratio": (results["wins"] / total_sims) * 100,
+        "draws": results["draws"],
+        "timeouts": results["timeouts"],
+        "average_deaths": results["players_killed"] / total_sims,
+        "average_rounds": results["rounds"] / total_sims,
+        "wins_interval": (lower * 100, upper * 100),
+        "sim_data": results["sim_data"],
+        "seed": seed,
     }
 
-    return enemy_dict
+    event_templates = convert_event_logs(results["sim_data"])
+    if event_templates:
+        response["event_templates"] = event_templates
+
+    return response
+
+
+def convert_margin(margin: float) -> float:
+    """Converts a margin of error in percentage points to a proportion.
+
+    Args:
+        margin (float): The margin of error of `wins_ratio`, if any.
+
+    Returns:
+        float: The margin as a proportion from 0 to 1, or None.
+    """
+    if margin is None:
+        return None
+    return margin / 100
+
+
+def convert_event_logs(
+    sim_data_list: list[dict[str, Any]],
+) -> dict[int, dict[str, Any]]:
+    """Prepares any event logs in `sim_data_list` to be sent as JSON.
+
+    Event logs are sent with the templates needed to render them, so the
+    templates are returned if any simulation has an event log.
+
+    Args:
+        sim_data_list (list[dict[str, Any]]): The data of each simulation,
+            whose events are converted to lists in place.
+
+    Returns:
+        dict[int, dict[str, Any]]: The template of every event, or None if no
+            simulation has an event log.
+    """
+    if not any("events" in sim_data for sim_data in sim_data_list):
+        return None
+
+    for sim_data in sim_data_list:
+        sim_data["events"] = sim_data["events"].tolist()
+    return {event: spec.to_dict() for event, spec in EVENT_SPECS.items()}
@@ -18,7 +18,7 @@ from ..auth_helpers import (
     get_user,
     verify_password,
 )
-from ..dependencies import db_dependency
+from ..dependencies import db_dependency, party_cache
 from ..exceptions import BadRequestException, InternalServerError
 
 router = APIRouter()
@@ -161,6 +161,7 @@ async def delete_user(
         # Finally, delete the user
         await db.delete(current_user)
         await db.commit()
+        party_cache.bump(current_user.id)
 
         return {"message": "User deleted"}
     except HTTPException as http_err:
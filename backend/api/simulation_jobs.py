@@ -0,0 +1,247 @@
+"""Defines the queue used to run simulations as background jobs.
+
+Jobs are submitted with the players and enemies already loaded from the
+database, run one at a time per worker on the simulation executor, and keep
+their results until they expire. Finished jobs are also bounded by the size
+of their results, so the oldest expire early once the results kept add up
+to more than `max_stored` bytes. Large jobs cannot collect combat logs at
+all, see SimJobRequest.
+
+"""
+
+import asyncio
+import json
+import time
+import uuid
+from typing import Any
+
+from simulation.core.executor import SimulationExecutor
+
+from .exceptions import ServiceUnavailableException
+
+
+class SimulationJob:
+    """A request to run simulations in the background.
+
+    Attributes:
+        id: A unique, hard to guess identifier for the job.
+        user_id: The ID of the user who submitted the job.
+        status: One of "queued", "running", "complete" or "failed".
+        total_sims: The number of simulations the job will run.
+        completed_sims: The number of simulations finished so far.
+        results: The merged results from the executor once complete.
+        error: A description of the error if the job failed.
+        finished_at: The monotonic time the job finished, if it has.
+        stored_size: The size in bytes of the job's results as JSON, once
+            it has finished.
+    """
+
+    def __init__(
+        self,
+        user_id: int,
+        player_dicts: list[dict[str, Any]],
+        enemy_dicts: list[dict[str, Any]],
+        parameters: dict[str, int],
+        total_sims: int,
+        collect_log: bool = False,
+        log_format: str = "text",
+        engine: str = "reference",
+        seed: int = None,
+        margin: float = None,
+        map_dict: dict[str, Any] = None,
+    ):
+        """Initializes a queued job.
+
+        Args:
+            user_id (int): The ID of the user submitting the job.
+            player_dicts (list[dict[str, Any]]): Dictionaries to initialize
+                Players.
+            enemy_dicts (list[dict[str, Any]]): Dictionaries to initialize
+                Enemies.
+            parameters (dict[str, int]): Settings for fine-tuning the
+                simulation.
+            total_sims (int): The number of simulations to run.
+            collect_log (bool, optional): Whether to build each simulation's
+                combat log. Defaults to False.
+            log_format (str, optional): Either "text" or "events", the format
+                of each simulation's combat log. Defaults to "text".
+            engine (str, optional): Either "reference" or "vectorized", the
+                engine used to run the simulations. Defaults to "reference".
+            seed (int, optional): Seeds every simulation, so that they can be
+                reproduced. Defaults to None.
+            margin (float, optional): The margin of error of the win rate
+                at which to stop early, as a proportion. Defaults to None.
+            map_dict (dict[str, Any], optional): The map to fight on.
+                Defaults to None, fighting on an open plane.
+        """
+        self.id: str = uuid.uuid4().hex
+        self.user_id: int = user_id
+        self.status: str = "queued"
+        self.total_sims: int = total_sims
+        self.completed_sims: int = 0
+        self.results: dict[str, Any] = None
+        self.error: str = None
+        self.finished_at: float = None
+        self.stored_size: int = 0
+
+        self.player_dicts = player_dicts
+        self.enemy_dicts = enemy_dicts
+        self.parameters = parameters
+        self.collect_log = collect_log
+        self.log_format = log_format
+        self.engine = engine
+        self.seed = seed
+        self.margin = margin
+        self.map_dict = map_dict
+
+    def add_progress(self, num_sims: int) -> None:
+        """Records that `num_sims` more simulations have finished.
+
+        Args:
+            num_sims (int): The number of simulations just finished.
+        """
+        self.completed_sims += num_sims
+
+
+class SimulationJobQueue:
+    """A bounded queue of simulation jobs worked on by background tasks.
+
+    Jobs can be submitted before the workers are started, and wait in the
+    queue until they are.
+
+    Attributes:
+        executor: The executor used to run each job's simulations.
+        num_workers: The number of jobs that may run at the same time.
+        result_ttl: How many seconds a finished job is kept before expiring.
+        max_stored: The most bytes of results kept at once, measured as
+            JSON. Beyond that, the oldest finished jobs expire early,
+            though the latest is always kept.
+        time_limit: The most seconds each job's simulations may run for.
+    """
+
+    def __init__(
+        self,
+        executor: SimulationExecutor,
+        max_queued: int = 32,
+        num_workers: int = 2,
+        result_ttl: float = 600,
+        max_stored: int = 64 * 2**20,
+        time_limit: float = 600,
+    ):
+        """Initializes the queue without starting any workers.
+
+        Args:
+            executor (SimulationExecutor): Runs each job's simulations.
+            max_queued (int, optional): The most jobs that may wait to be run.
+                Defaults to 32.
+            num_workers (int, optional): The number of jobs that may run at
+                the same time. Defaults to 2.
+            result_ttl (float, optional): Seconds a finished job is kept.
+                Defaults to 600.
+            max_stored (int, optional): The most bytes of results kept at
+                once. Defaults to 64 * 2**20, 64MB.
+            time_limit (float, optional): The most seconds each job's
+                simulations may run for. Defaults to 600.
+        """
+        self.executor = executor
+        self.num_workers: int = num_workers
+        self.result_ttl: float = result_ttl
+        self.max_stored: int = max_stored
+        self.time_limit: float = time_limit
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queued)
+        self._jobs: dict[str, SimulationJob] = {}
+        self._workers: list[asyncio.Task] = []
+
+    def start(self) -> None:
+        """Starts the background workers on the running event loop."""
+        self._workers = [
+            asyncio.create_task(self._work()) for _ in range(self.num_workers)
+        ]
+
+    async def stop(self) -> None:
+        """Cancels the background workers and waits for them to finish."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(self, job: SimulationJob) -> SimulationJob:
+        """Adds `job` to the queue.
+
+        Args:
+            job (SimulationJob): The job to be run.
+
+        Raises:
+            ServiceUnavailableException: If the queue is already full.
+
+        Returns:
+            SimulationJob: The submitted job.
+        """
+        self._purge_expired()
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise ServiceUnavailableException(
+                detail="Too many simulations queued, try again later"
+            )
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> SimulationJob | None:
+        """Returns the job with ID `job_id`, or None if it has expired.
+
+        Args:
+            job_id (str): The ID of the job.
+
+        Returns:
+            SimulationJob | None: The job, if it exists and has not expired.
+        """
+        self._purge_expired()
+        return self._jobs.get(job_id)
+
+    async def _work(self) -> None:
+        while True:
+            job = await self._queue.get()
+            job.status = "running"
+            try:
+                job.results = await self.executor.run(
+                    job.player_dicts,
+                    job.enemy_dicts,
+                    job.parameters,
+                    job.total_sims,
+                    on_progress=job.add_progress,
+                    collect_log=job.collect_log,
+                    log_format=job.log_format,
+                    engine=job.engine,
+                    seed=job.seed,
+                    margin=job.margin,
+                    map_dict=job.map_dict,
+                    time_limit=self.time_limit,
+                )
+                job.status = "complete"
+                job.stored_size = len(json.dumps(job.results, default=str))
+            except Exception as e:
+                print(f"Error in simulation job {job.id}: {str(e)}")
+                job.error = str(e)
+                job.status = "failed"
+            finally:
+                job.finished_at = time.monotonic()
+                # The inputs are no longer needed once the job has run
+                job.player_dicts = job.enemy_dicts = None
+                self._queue.task_done()
+                self._purge_expired()
+
+    def _purge_expired(self) -> None:
+        now = time.monotonic()
+        finished = sorted(
+            (job for job in self._jobs.values() if job.finished_at),
+            key=lambda job: job.finished_at,
+            reverse=True,
+        )
+        stored = 0
+        for index, job in enumerate(finished):
+            stored += job.stored_size
+            if now - job.finished_at > self.result_ttl or (
+                index > 0 and stored > self.max_stored
+            ):
+                del self._jobs[job.id]
@@ -0,0 +1,89 @@
+"""Times requests on large battle maps against the request time limit.
+
+Runs the sample party against the sample enemies on 200x200 maps: an open
+field, a field of scattered rocks and difficult terrain, and a maze of
+walls that forces every path to wind back and forth across the map. Each
+request runs through the executor with its time limit, on a freshly built
+map so no paths are reused from an earlier run, and reports how many of
+its simulations ran out of time.
+
+Run from the backend directory with `python -m benchmarks.bench_battle_map`.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+
+from simulation.core.executor import TIME_LIMIT, SimulationExecutor
+from simulation.encounters.battle_map import _compile_map, compile_map
+from tests.sample_data import test_enemies, test_party
+
+parameters = {"starting_distance": 50, "health_multiplier": 1.0}
+SIZE = 200
+
+
+def build_maps() -> dict[str, dict]:
+    """Returns the maps to run on, by name."""
+    spawns = {
+        "player_spawns": [[0, y] for y in range(4)],
+        "enemy_spawns": [[SIZE - 1, SIZE - 1 - y] for y in range(4)],
+    }
+    rng = random.Random(0)
+    scattered = {
+        (rng.randrange(2, SIZE - 2), rng.randrange(SIZE)) for _ in range(6000)
+    }
+    rocks = sorted(scattered)[::2]
+    mud = sorted(scattered)[1::2]
+    # Walls every ten columns, with the gap alternating top and bottom
+    maze = [
+        [x, y]
+        for x in range(10, SIZE - 10, 10)
+        for y in (range(SIZE - 2) if x % 20 else range(2, SIZE))
+    ]
+    return {
+        "open": {"width": SIZE, "height": SIZE, **spawns},
+        "scattered": {
+            "width": SIZE,
+            "height": SIZE,
+            "blocked": rocks,
+            "difficult": mud,
+            **spawns,
+        },
+        "maze": {"width": SIZE, "height": SIZE, "blocked": maze, **spawns},
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--num-sims", type=int, default=100)
+    args = parser.parse_args()
+
+    executor = SimulationExecutor()
+    print(f"{SIZE}x{SIZE} maps, {TIME_LIMIT:.0f}s time limit")
+    print(
+        f"{'map':>10} {'sims':>6} {'seconds':>8} {'timeouts':>9} "
+        f"{'rounds':>7} {'kept':>7}"
+    )
+    for name, map_dict in build_maps().items():
+        _compile_map.cache_clear()
+        start = time.perf_counter()
+        results = await executor.run(
+            test_party,
+            test_enemies,
+            parameters,
+            args.num_sims,
+            collect_log=False,
+            seed=0,
+            map_dict=map_dict,
+        )
+        elapsed = time.perf_counter() - start
+        kept = compile_map(map_dict)._path_cells
+        print(
+            f"{name:>10} {results['total_sims']:>6} {elapsed:>8.3f} "
+            f"{results['timeouts']:>9} {results['rounds']:>7} {kept:>7}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
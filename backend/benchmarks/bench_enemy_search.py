@@ -0,0 +1,128 @@
+"""Times the enemy search against loading the whole table as it grows.
+
+Fills a scratch schema with synthetic catalogs of 1,000 to 20,000 enemies,
+copied from the sample enemies with varied names, levels, traits, and
+immunities, then times a page of each kind of search beside fetching every
+enemy, as the enemy list did before searching. Thanks to the indexes and
+keyset pagination, a page takes about as long at any catalog size, while
+the full table grows with it.
+
+Needs a PostgreSQL database in DATABASE_URL. The scratch schema is dropped
+afterwards. Run from the backend directory with
+`python -m benchmarks.bench_enemy_search`.
+"""
+
+import argparse
+import random
+import time
+
+from sqlalchemy import text
+from sqlalchemy.future import select
+from sqlalchemy.orm import Session
+
+from api.enemy_helpers import build_enemy_search, encode_cursor
+from db import engine_sync
+from models import Enemy
+from schemas import Enemies
+from tests.sample_data import test_enemy, test_enemy_2, test_spider
+
+SCHEMA = "enemy_search_bench"
+PAGE_SIZE = 50
+
+templates = [test_enemy, test_enemy_2, test_spider]
+trait_pool = ["goblin", "humanoid", "undead", "beast", "fiend", "dragon"]
+immunity_pool = ["fire", "cold", "poison", "mental", "bleed"]
+syllables = ["gob", "lin", "kor", "zar", "mok", "thu", "vel", "dra", "ska"]
+searches = {
+    "levels 3-5": {"min_level": 3, "max_level": 5},
+    "trait": {"traits": ["undead"]},
+    "immunity": {"immunities": ["fire", "poison"]},
+    "name prefix": {"name": "Korz"},
+}
+
+
+def synthetic_enemy(rng: random.Random) -> Enemy:
+    """Returns a random enemy built from one of the sample enemies."""
+    enemy = dict(rng.choice(templates))
+    enemy.pop("id", None)
+    name = "".join(rng.choice(syllables) for _ in range(3))
+    enemy["name"] = name.capitalize()
+    enemy["level"] = rng.randint(-1, 25)
+    enemy["traits"] = rng.sample(trait_pool, rng.randint(1, 3))
+    enemy["immunities"] = rng.sample(immunity_pool, rng.randint(0, 2))
+    enemy["weaknesses"] = enemy.get("weaknesses") or {}
+    enemy["resistances"] = enemy.get("resistances") or {}
+    return Enemy(**enemy)
+
+
+def fill_catalog(db: Session, num_enemies: int, seed: int = 0) -> None:
+    """Replaces the scratch enemies table with `num_enemies` enemies."""
+    db.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    db.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    db.commit()
+    Enemy.__table__.create(db.connection())
+    rng = random.Random(seed)
+    db.add_all(synthetic_enemy(rng) for _ in range(num_enemies))
+    db.commit()
+    db.execute(text(f"ANALYZE {SCHEMA}.enemies"))
+    db.commit()
+
+
+def time_query(db: Session, run, repeat: int) -> float:
+    """Returns the fewest seconds `run` took to query `db`."""
+    best = float("inf")
+    for _ in range(repeat):
+        db.expunge_all()
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-s", "--sizes", type=int, nargs="+")
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    engine = engine_sync.execution_options(schema_translate_map={None: SCHEMA})
+    columns = [*searches, "deep page", "full table"]
+    print(f"Pages of {PAGE_SIZE}, best of {args.repeat}, in ms")
+    print(f"{'enemies':>8}" + "".join(f"{name:>13}" for name in columns))
+    try:
+        for num_enemies in args.sizes or [1000, 5000, 10000, 20000]:
+            with Session(engine) as db:
+                fill_catalog(db, num_enemies)
+
+                def page(after=None, **filters):
+                    query = build_enemy_search(after=after, **filters)
+                    db.execute(query.limit(PAGE_SIZE + 1)).scalars().all()
+
+                def full_table():
+                    query = select(Enemy)
+                    enemies = db.execute(query).scalars().all()
+                    Enemies(enemies=[e.__dict__ for e in enemies])
+
+                # Halfway through the catalog
+                middle = db.execute(
+                    build_enemy_search().offset(num_enemies // 2).limit(1)
+                ).scalar_one()
+                cursor = encode_cursor(middle)
+
+                runs = [
+                    *(lambda f=f: page(**f) for f in searches.values()),
+                    lambda: page(after=cursor),
+                    full_table,
+                ]
+                times = [time_query(db, run, args.repeat) for run in runs]
+                print(
+                    f"{num_enemies:>8}"
+                    + "".join(f"{seconds * 1000:>13.2f}" for seconds in times)
+                )
+    finally:
+        with engine_sync.begin() as conn:
+            conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Benchmarks the process pool executor against the number of worker processes.
+
+Run from the backend directory with `python -m benchmarks.bench_executor`.
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from simulation.core.executor import (
+    ProcessPoolSimulationExecutor,
+    SimulationExecutor,
+)
+from tests.sample_data import test_enemies, test_party
+
+parameters = {"starting_distance": 50, "health_multiplier": 1.0}
+
+
+async def time_executor(
+    executor: SimulationExecutor, total_sims: int
+) -> float:
+    """Returns the seconds taken by `executor` to run `total_sims` sims."""
+    # Warm up the pool so process start-up is not included in the timing
+    await executor.run(test_party, test_enemies, parameters, 1)
+
+    start = time.perf_counter()
+    await executor.run(test_party, test_enemies, parameters, total_sims)
+    return time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--sims", type=int, default=1000)
+    args = parser.parse_args()
+
+    baseline = await time_executor(SimulationExecutor(), args.sims)
+    print(f"{args.sims} simulations, {os.cpu_count()} cores available")
+    print(f"{'workers':>8} {'seconds':>8} {'speedup':>8}")
+    print(f"{'serial':>8} {baseline:>8.3f} {1.0:>8.2f}")
+
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        executor = ProcessPoolSimulationExecutor(max_workers=workers)
+        elapsed = await time_executor(executor, args.sims)
+        executor.shutdown()
+        print(f"{workers:>8} {elapsed:>8.3f} {baseline / elapsed:>8.2f}")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,86 @@
+"""Compares the spatial grid with scanning every opponent for range queries.
+
+Runs one seeded battle each of 20, 100, and 500 creatures, half players and
+half enemies, first with the encounter's spatial grid and then with a grid
+that answers every query by scanning the whole opposing team, as target
+selection did before. Both play out identically, so only the time differs.
+
+Run from the backend directory with `python -m benchmarks.bench_grid`.
+"""
+
+import argparse
+import time
+
+from simulation.core.simulation import run_simulation, simulation_rng
+from simulation.encounters.encounter import Encounter
+from simulation.encounters.grid import SpatialGrid
+from tests.sample_data import (
+    test_enemy,
+    test_enemy_2,
+    test_enemy_3,
+    test_party,
+    test_spider,
+)
+
+parameters = {"starting_distance": 30, "health_multiplier": 1.0}
+enemy_types = [test_enemy, test_enemy_2, test_enemy_3, test_spider]
+
+
+class LinearScan(SpatialGrid):
+    """A grid that always scans the whole team, for comparison."""
+
+    def within(self, creature, team: int, distance: int) -> list:
+        return [
+            other
+            for other in self._members[team]
+            if creature.calculate_distance(other) <= distance
+        ]
+
+
+def time_battle(num_creatures: int, grid_class: type, seed: int = 0) -> float:
+    """Returns the seconds taken to run one battle of `num_creatures`."""
+    players = [
+        test_party[i % len(test_party)] for i in range(num_creatures // 2)
+    ]
+    enemies = [
+        enemy_types[i % len(enemy_types)] for i in range(num_creatures // 2)
+    ]
+
+    Encounter.grid_class = grid_class
+    try:
+        start = time.perf_counter()
+        run_simulation(
+            players,
+            enemies,
+            parameters,
+            collect_log=False,
+            rng=simulation_rng(seed, 1),
+        )
+        return time.perf_counter() - start
+    finally:
+        Encounter.grid_class = SpatialGrid
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-s", "--sizes", type=int, nargs="+")
+    parser.add_argument("-r", "--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"One battle per size, best of {args.repeat}")
+    print(f"{'creatures':>10} {'scan':>9} {'grid':>9} {'speedup':>8}")
+    for num_creatures in args.sizes or [20, 100, 500]:
+        scan = min(
+            time_battle(num_creatures, LinearScan) for _ in range(args.repeat)
+        )
+        grid = min(
+            time_battle(num_creatures, SpatialGrid) for _ in range(args.repeat)
+        )
+        print(
+            f"{num_creatures:>10} {scan * 1000:>7.1f}ms {grid * 1000:>7.1f}ms "
+            f"{scan / grid:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
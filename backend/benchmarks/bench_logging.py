@@ -0,0 +1,42 @@
+"""Compares simulation throughput with and without building the combat log.
+
+Run from the backend directory with `python -m benchmarks.bench_logging`.
+"""
+
+import argparse
+import time
+
+from simulation.core.simulation import run_simulation
+from tests.sample_data import test_enemies, test_party
+
+parameters = {"starting_distance": 50, "health_multiplier": 1.0}
+
+
+def time_simulations(total_sims: int, collect_log: bool) -> float:
+    """Returns the seconds taken to run `total_sims` simulations."""
+    start = time.perf_counter()
+    for _ in range(total_sims):
+        run_simulation(test_party, test_enemies, parameters, collect_log)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--sims", type=int, default=2000)
+    args = parser.parse_args()
+
+    with_log = time_simulations(args.sims, collect_log=True)
+    without_log = time_simulations(args.sims, collect_log=False)
+
+    print(f"{args.sims} simulations")
+    print(f"{'mode':>12} {'seconds':>8} {'sims/sec':>9}")
+    print(f"{'with log':>12} {with_log:>8.3f} {args.sims / with_log:>9.0f}")
+    print(
+        f"{'stats only':>12} {without_log:>8.3f} "
+        f"{args.sims / without_log:>9.0f}"
+    )
+    print(f"Speedup: {with_log / without_log:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
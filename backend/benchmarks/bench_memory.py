@@ -0,0 +1,63 @@
+"""Reports the memory used by each creature and action built for a run.
+
+Uses tracemalloc to measure the memory allocated while building the creatures
+for many simulations from compiled templates, which is what every run of a
+request does, then divides by the number of objects built.
+
+Run from the backend directory with `python -m benchmarks.bench_memory`.
+"""
+
+import argparse
+import tracemalloc
+
+from simulation.creatures.enemy import Enemy
+from simulation.creatures.player import Player
+from simulation.creatures.template import EnemyTemplate, PlayerTemplate
+from simulation.mechanics.actions import Attack
+from tests.sample_data import (
+    test_enemy,
+    test_enemy_3,
+    test_party,
+    test_player,
+)
+
+
+def measure(build, count: int) -> float:
+    """Returns the average bytes allocated by each call to `build`."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    built = [build() for _ in range(count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    total = sum(stat.size_diff for stat in after.compare_to(before, "lineno"))
+    del built
+    return total / count
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--count", type=int, default=10000)
+    args = parser.parse_args()
+
+    party = [PlayerTemplate(player) for player in test_party]
+    goblin = EnemyTemplate(test_enemy)
+    igniter = EnemyTemplate(test_enemy_3)
+    attack_dict = test_player["actions"]["attacks"][0]
+
+    results = {
+        "player": measure(lambda: Player(party[0]), args.count),
+        "caster": measure(lambda: Player(party[3]), args.count),
+        "enemy": measure(lambda: Enemy(goblin), args.count),
+        "enemy caster": measure(lambda: Enemy(igniter), args.count),
+        "attack": measure(lambda: Attack(attack_dict), args.count),
+    }
+
+    print(f"Average memory per object, {args.count} objects each")
+    print(f"{'object':>14} {'bytes':>8}")
+    for name, size in results.items():
+        print(f"{name:>14} {size:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
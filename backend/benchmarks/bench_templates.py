@@ -0,0 +1,92 @@
+"""Compares building creatures from dictionaries with cloning templates.
+
+Times a request of 100 simulations with a 4-player party against 10 enemies,
+first building every creature from its dictionary in each run, then compiling
+templates once and cloning them in each run. Creature construction is also
+timed on its own, since it is what the templates speed up.
+
+Run from the backend directory with `python -m benchmarks.bench_templates`.
+"""
+
+import argparse
+import time
+
+from simulation.core.simulation import _Simulation, run_simulation
+from simulation.creatures.template import (
+    EnemyTemplate,
+    PlayerTemplate,
+    compile_templates,
+)
+from tests.sample_data import (
+    test_enemy,
+    test_enemy_2,
+    test_enemy_3,
+    test_enemy_sneak,
+    test_party,
+    test_spider,
+)
+
+parameters = {"starting_distance": 50, "health_multiplier": 1.0}
+enemies = [
+    test_enemy,
+    test_enemy,
+    test_enemy,
+    test_enemy_2,
+    test_enemy_2,
+    test_enemy_3,
+    test_enemy_3,
+    test_enemy_sneak,
+    test_spider,
+    test_spider,
+]
+
+
+def time_request(total_sims: int, use_templates: bool) -> float:
+    """Returns the seconds taken to run one request of `total_sims`."""
+    start = time.perf_counter()
+    players, request_enemies = test_party, enemies
+    if use_templates:
+        players = compile_templates(players, PlayerTemplate)
+        request_enemies = compile_templates(request_enemies, EnemyTemplate)
+    for _ in range(total_sims):
+        run_simulation(players, request_enemies, parameters, False)
+    return time.perf_counter() - start
+
+
+def time_setup(total_sims: int, use_templates: bool) -> float:
+    """Returns the seconds spent only building creatures for a request."""
+    start = time.perf_counter()
+    players, request_enemies = test_party, enemies
+    if use_templates:
+        players = compile_templates(players, PlayerTemplate)
+        request_enemies = compile_templates(request_enemies, EnemyTemplate)
+    for _ in range(total_sims):
+        _Simulation(players, request_enemies, parameters, False)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--sims", type=int, default=100)
+    parser.add_argument("-r", "--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(
+        f"{args.sims} simulations, {len(test_party)} players vs "
+        f"{len(enemies)} enemies, best of {args.repeat}"
+    )
+    print(f"{'':>10} {'dicts':>9} {'templates':>9} {'speedup':>8}")
+    for label, timer in (("setup", time_setup), ("request", time_request)):
+        from_dicts = min(timer(args.sims, False) for _ in range(args.repeat))
+        from_templates = min(
+            timer(args.sims, True) for _ in range(args.repeat)
+        )
+        print(
+            f"{label:>10} {from_dicts * 1000:>7.1f}ms "
+            f"{from_templates * 1000:>7.1f}ms "
+            f"{from_dicts / from_templates:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
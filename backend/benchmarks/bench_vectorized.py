@@ -0,0 +1,83 @@
+"""Compares the reference engine with the vectorized batch engine.
+
+Runs the same encounters with both engines and prints the outcome stats of
+each side by side, along with how long each took. The stats should agree
+within sampling error, while the vectorized engine should be several times
+faster, more so as the number of simulations grows.
+
+Run from the backend directory with `python -m benchmarks.bench_vectorized`.
+"""
+
+import argparse
+import time
+
+from simulation.core.executor import run_batch
+from simulation.vectorized.engine import run_vectorized_batch
+from tests.sample_data import (
+    test_enemies,
+    test_enemy,
+    test_enemy_2,
+    test_enemy_3,
+    test_enemy_sneak,
+    test_party,
+    test_player,
+    test_player_4,
+    test_spider,
+)
+
+parameters = {"starting_distance": 50, "health_multiplier": 1.0}
+encounters = {
+    "party vs 3": (test_party, test_enemies),
+    "party vs 10": (
+        test_party,
+        [test_enemy] * 3
+        + [test_enemy_2] * 2
+        + [test_enemy_3] * 2
+        + [test_enemy_sneak, test_spider, test_spider],
+    ),
+    "2 vs 2": ([test_player, test_player_4], [test_enemy_3, test_enemy_sneak]),
+}
+
+
+def stats(batch: dict) -> str:
+    """Returns the win rate, average deaths, and average rounds of `batch`."""
+    total_sims = batch["total_sims"]
+    return (
+        f"{batch['wins'] / total_sims:>6.3f} "
+        f"{batch['players_killed'] / total_sims:>6.3f} "
+        f"{batch['rounds'] / total_sims:>6.3f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--sims", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"{args.sims} simulations, wins / deaths / rounds per simulation")
+    print(
+        f"{'':>12} {'reference':>20} {'vectorized':>20} "
+        f"{'ref':>7} {'vec':>7} {'speedup':>8}"
+    )
+    for name, (players, enemies) in encounters.items():
+        start = time.perf_counter()
+        reference = run_batch(
+            players, enemies, parameters, 1, args.sims, collect_log=False
+        )
+        reference_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        vectorized = run_vectorized_batch(
+            players, enemies, parameters, args.sims
+        )
+        vectorized_time = time.perf_counter() - start
+
+        print(
+            f"{name:>12} {stats(reference)} {stats(vectorized)} "
+            f"{reference_time:>6.2f}s {vectorized_time:>6.2f}s "
+            f"{reference_time / vectorized_time:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Reports how many action weights the per-turn weight cache avoids.
+
+Runs a seeded batch of the sample party against the sample enemies, and one
+large battle, counting how often a creature's action weight was reused from
+its cache instead of being calculated again.
+
+Run from the backend directory with `python -m benchmarks.bench_weights`.
+"""
+
+import argparse
+import time
+
+from simulation.core.executor import run_batch
+from simulation.creatures.creature import Creature
+from tests.sample_data import test_enemies, test_enemy_3, test_party
+
+parameters = {"starting_distance": 50, "health_multiplier": 1.0}
+
+
+def count_weights(players: list, enemies: list, num_sims: int) -> tuple:
+    """Returns the seconds taken, cache hits, and misses for a batch.
+
+    The batch is timed as it runs normally, then run again with
+    `Creature._action_weight` wrapped to count whether each weight is
+    already in the creature's cache, so the simulation keeps no counters of
+    its own.
+    """
+    start = time.perf_counter()
+    run_batch(
+        players, enemies, parameters, 1, num_sims, collect_log=False, seed=0
+    )
+    seconds = time.perf_counter() - start
+
+    counts = {"hits": 0, "misses": 0}
+    action_weight = Creature._action_weight
+
+    def counted(creature, action, in_melee):
+        key = (action, creature.multi_attack, creature.num_actions, in_melee)
+        cached = (
+            creature._weights_version == creature.encounter.version
+            and key in creature._weights
+        )
+        counts["hits" if cached else "misses"] += 1
+        return action_weight(creature, action, in_melee)
+
+    Creature._action_weight = counted
+    try:
+        run_batch(
+            players,
+            enemies,
+            parameters,
+            1,
+            num_sims,
+            collect_log=False,
+            seed=0,
+        )
+    finally:
+        Creature._action_weight = action_weight
+    return seconds, counts["hits"], counts["misses"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--num-sims", type=int, default=1000)
+    args = parser.parse_args()
+
+    battles = {
+        "sample": (test_party, test_enemies, args.num_sims),
+        "large": (test_party * 25, [test_enemy_3] * 100, 5),
+    }
+    print(
+        f"{'battle':>8} {'sims':>6} {'time':>9} {'weighed':>9} "
+        f"{'reused':>9} {'avoided':>8}"
+    )
+    for name, (players, enemies, num_sims) in battles.items():
+        seconds, hits, misses = count_weights(players, enemies, num_sims)
+        print(
+            f"{name:>8} {num_sims:>6} {seconds * 1000:>7.1f}ms "
+            f"{misses:>9} {hits:>9} {hits / (hits + misses):>8.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
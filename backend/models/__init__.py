@@ -1,7 +1,19 @@
 """Defines the tables in the PostgreSQL database."""
 
-from sqlalchemy import ARRAY, JSON, Column, ForeignKey, Integer, String
+from sqlalchemy import (
+    JSON,
+    Column,
+    Connection,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    func,
+    text,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import declarative_base, relationship
+from sqlalchemy.schema import CreateIndex
 
 Base = declarative_base()
 
@@ -37,6 +49,18 @@ class Enemy(Base):
     speed = Column(Integer, nullable=False)
     actions = Column(JSON)
 
+    # Back the filters and ordering of the enemy search
+    __table_args__ = (
+        Index("ix_enemies_level_name_id", "level", "name", "id"),
+        Index(
+            "ix_enemies_name_prefix",
+            func.lower(name).label("name_lower"),
+            postgresql_ops={"name_lower": "text_pattern_ops"},
+        ),
+        Index("ix_enemies_traits", "traits", postgresql_using="gin"),
+        Index("ix_enemies_immunities", "immunities", postgresql_using="gin"),
+    )
+
 
 class Character(Base):
     __tablename__ = "characters"
@@ -74,3 +98,53 @@ class Encounter(Base):
     user = relationship("User", back_populates="encounters")
     name = Column(String)
     enemies = Column(JSON)
+    battle_map = Column(JSON)
+
+
+class CatalogVersion(Base):
+    __tablename__ = "catalog_versions"
+
+    name = Column(String, primary_key=True)
+    version = Column(String, nullable=False)
+
+
+# Columns added to tables after they were first created. create_all only
+# creates missing tables, so these are added to existing ones on startup.
+ADDED_COLUMNS = [
+    Encounter.__table__.c.battle_map,
+]
+
+# Likewise, indexes added to tables after they were first created
+ADDED_INDEXES = [
+    *Enemy.__table_args__,
+]
+
+
+def add_missing_columns(connection: Connection) -> None:
+    """Adds each column in `ADDED_COLUMNS` to its table if it is missing.
+
+    Safe to run every time the tables are created, after `create_all`.
+
+    Args:
+        connection (Connection): A connection to the database
+    """
+    for column in ADDED_COLUMNS:
+        column_type = column.type.compile(dialect=connection.dialect)
+        connection.execute(
+            text(
+                f"ALTER TABLE {column.table.name} "
+                f"ADD COLUMN IF NOT EXISTS {column.name} {column_type}"
+            )
+        )
+
+
+def add_missing_indexes(connection: Connection) -> None:
+    """Creates each index in `ADDED_INDEXES` if it is missing.
+
+    Safe to run every time the tables are created, after `create_all`.
+
+    Args:
+        connection (Connection): A connection to the database
+    """
+    for index in ADDED_INDEXES:
+        connection.execute(CreateIndex(index, if_not_exists=True))
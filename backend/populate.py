@@ -14,7 +14,14 @@ from sqlalchemy.future import select
 from sqlalchemy.orm import Session
 
 from db import engine_sync
-from models import Base, Character, Enemy, User
+from models import (
+    Base,
+    Character,
+    Enemy,
+    User,
+    add_missing_columns,
+    add_missing_indexes,
+)
 from populate.populate_characters import initialize_characters
 from populate.populate_enemies import initialize_enemies
 
@@ -173,6 +180,9 @@ Dropping and recreating the characters table only.
     print("Creating database tables...")
     try:
         Base.metadata.create_all(bind=engine_sync)
+        with engine_sync.begin() as connection:
+            add_missing_columns(connection)
+            add_missing_indexes(connection)
         print("Tables created successfully")
     except Exception as e:
         print(f"Error creating tables: {e}")
@@ -1,3 +1,4 @@
+import hashlib
 import json
 import os
 from pathlib import Path
@@ -6,7 +7,7 @@ from sqlalchemy.future import select
 from sqlalchemy.orm import Session
 
 from api.character_helpers import convert_to_db_character
-from models import User
+from models import CatalogVersion, Character, User
 from schemas import CharacterCreate
 
 
@@ -24,3 +25,34 @@ def initialize_characters(db: Session):
         db.add(db_character)
 
     db.commit()
+    stamp_characters(db)
+
+
+def stamp_characters(db: Session) -> str:
+    """Records a hash of the characters table as its version.
+
+    The API caches each user's converted party, and drops every cached party
+    when this version changes, so it must be stamped whenever the table is
+    changed outside the API.
+
+    Args:
+        db (Session): A SQLAlchemy database session
+
+    Returns:
+        str: The new version of the characters table
+    """
+    digest = hashlib.sha256()
+    query = select(Character).order_by(Character.id)
+    characters = db.execute(query).scalars().all()
+    for character in characters:
+        row = {
+            attribute.key: getattr(character, attribute.key)
+            for attribute in Character.__mapper__.column_attrs
+        }
+        digest.update(json.dumps(row, sort_keys=True).encode())
+
+    version = digest.hexdigest()
+    db.merge(CatalogVersion(name=Character.__tablename__, version=version))
+    db.commit()
+    print(f"Characters version is now {version}")
+    return version
@@ -1,3 +1,4 @@
+import hashlib
 import json
 import os
 import shutil
@@ -6,9 +7,10 @@ from typing import Any
 
 import requests
 from github import Github
+from sqlalchemy.future import select
 from sqlalchemy.orm import Session
 
-from models import Enemy
+from models import CatalogVersion, Enemy
 
 
 def initialize_enemies(db: Session):
@@ -24,6 +26,7 @@ def initialize_enemies(db: Session):
 
     fetch_enemies(raw_path)
     add_enemies(raw_path, db)
+    stamp_enemy_catalog(db)
 
     print("Cleaning up...")
     shutil.rmtree(raw_path)
@@ -140,6 +143,34 @@ def add_enemies(raw_path: str, db: Session) -> None:
     print("Enemies added to database!")
 
 
+def stamp_enemy_catalog(db: Session) -> str:
+    """Records a hash of the enemies table as the enemy catalog's version.
+
+    The API keeps every enemy in memory and only reloads them when this
+    version changes, so it must be stamped whenever the table is changed.
+
+    Args:
+        db (Session): A SQLAlchemy database session
+
+    Returns:
+        str: The new version of the enemy catalog
+    """
+    digest = hashlib.sha256()
+    enemies = db.execute(select(Enemy).order_by(Enemy.id)).scalars().all()
+    for enemy in enemies:
+        row = {
+            column.name: getattr(enemy, column.name)
+            for column in Enemy.__table__.columns
+        }
+        digest.update(json.dumps(row, sort_keys=True).encode())
+
+    version = digest.hexdigest()
+    db.merge(CatalogVersion(name=Enemy.__tablename__, version=version))
+    db.commit()
+    print(f"Enemy catalog version is now {version}")
+    return version
+
+
 def build_enemy_dict(raw_dict: dict[str, Any]) -> dict[str, Any]:
     """Converts the json file into a reformatted dictionary.
 
@@ -1,19 +1,48 @@
 """Defines the pydantic models used throughout the API."""
 
-from typing import Any, Optional
+import secrets
+from typing import Any, Literal, Optional
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 
 class BasicResponse(BaseModel):
     message: str
 
 
+# Maps
+MAX_MAP_SIZE = 200
+
+
+class BattleMap(BaseModel):
+    width: int = Field(ge=1, le=MAX_MAP_SIZE)
+    height: int = Field(ge=1, le=MAX_MAP_SIZE)
+    # Squares are (x, y) pairs, from (0, 0) to (width - 1, height - 1)
+    blocked: list[tuple[int, int]] = []
+    difficult: list[tuple[int, int]] = []
+    player_spawns: list[tuple[int, int]] = Field(min_length=1)
+    enemy_spawns: list[tuple[int, int]] = Field(min_length=1)
+
+    @model_validator(mode="after")
+    def check_squares(self):
+        squares = (
+            self.blocked
+            + self.difficult
+            + self.player_spawns
+            + self.enemy_spawns
+        )
+        for x, y in squares:
+            if not (0 <= x < self.width and 0 <= y < self.height):
+                raise ValueError(f"Square ({x}, {y}) is off the map")
+        return self
+
+
 # Encounters
 class Encounter(BaseModel):
     id: int
     name: str
     enemies: list[dict[str, str | int]]
+    battle_map: Optional[BattleMap] = None
 
 
 class Encounters(BaseModel):
@@ -197,22 +226,93 @@ class Enemies(BaseModel):
     enemies: list[Enemy]
 
 
+class EnemyPage(BaseModel):
+    enemies: list[Enemy]
+    next_cursor: Optional[str] = None
+
+
 class Characters(BaseModel):
     characters: list[Character]
 
 
 # Simulation
+# Requests answered while the client waits are kept small, larger ones are
+# submitted as background jobs
+MAX_SYNC_SIMS = 100
+MAX_SIMS = 10000
+MAX_VECTORIZED_SIMS = 100000
+
+
+# Encounters that cannot finish are stopped as a draw after at most this many
+# rounds, or this many rounds in a row without progress
+MAX_ROUNDS = 1000
+MAX_STALEMATE_ROUNDS = 100
+
+
 class SimEnemyInfo(BaseModel):
     id: int
     quantity: int
 
 
+class SimParameters(BaseModel):
+    starting_distance: int = 50
+    health_multiplier: float = 1.0
+    max_rounds: int = Field(MAX_ROUNDS, ge=1, le=MAX_ROUNDS)
+    stalemate_rounds: int = Field(10, ge=1, le=MAX_STALEMATE_ROUNDS)
+
+
 class SimRequest(BaseModel):
     enemies: list[SimEnemyInfo]
-    parameters: Optional[dict[str, int | float]] = {
-        "starting_distance": 50,
-        "health_multiplier": 1.0,
-    }
+    parameters: SimParameters = SimParameters()
+    total_sims: int = Field(100, ge=1, le=MAX_SYNC_SIMS)
+    collect_log: bool = True
+    log_format: Literal["text", "events"] = "text"
+    # The vectorized engine only returns overall stats, never combat logs
+    engine: Literal["reference", "vectorized"] = "reference"
+    # A random seed is picked if none is given, and returned in the response
+    seed: int = Field(default_factory=lambda: secrets.randbits(32), ge=0)
+    # With a margin of error in percentage points for wins_ratio, total_sims
+    # is the most that are run, stopping early once the margin is reached
+    margin: Optional[float] = Field(None, gt=0, le=50)
+    # Fights on an open plane if no map is given
+    battle_map: Optional[BattleMap] = None
+
+    @model_validator(mode="after")
+    def check_total_sims(self):
+        if self.engine == "reference" and self.total_sims > MAX_SIMS:
+            raise ValueError(
+                f"total_sims must be at most {MAX_SIMS} unless the "
+                "vectorized engine is used"
+            )
+        return self
+
+    @model_validator(mode="after")
+    def check_battle_map(self):
+        if self.engine == "vectorized" and self.battle_map is not None:
+            raise ValueError("Maps are only supported by the reference engine")
+        return self
+
+
+class SimJobRequest(SimRequest):
+    total_sims: int = Field(100, ge=1, le=MAX_VECTORIZED_SIMS)
+    # Logs are kept with a job's results until they expire, so large jobs
+    # leave them out, and any one simulation's log is fetched from
+    # /simulation/replay instead
+    collect_log: bool = False
+
+    @model_validator(mode="after")
+    def check_collect_log(self):
+        if (
+            self.collect_log
+            and self.engine == "reference"
+            and self.total_sims > MAX_SYNC_SIMS
+        ):
+            raise ValueError(
+                f"collect_log is only allowed for jobs of at most "
+                f"{MAX_SYNC_SIMS} simulations, replay a simulation with "
+                "/simulation/replay to see its log"
+            )
+        return self
 
 
 class SimData(BaseModel):
@@ -221,16 +321,58 @@ class SimData(BaseModel):
     players_killed: int
     total_players: int
     sim_num: int
-    log: list[str]
+    log: Optional[list[str]] = None
+    events: Optional[list[int]] = None
+    creatures: Optional[list[str]] = None
+    strings: Optional[list[str]] = None
+
+
+class EventTemplate(BaseModel):
+    template: str
+    kinds: str
+    tail_kind: Optional[str] = None
+    tail_name: str
+    separator: str
+    optional: dict[str, tuple[int, str]]
 
 
 class SimResponse(BaseModel):
     total_sims: int
     wins: int
     wins_ratio: float
+    # Encounters stopped without a winner, as a stalemate or for running
+    # out of rounds, or for running out of time. A request that runs out of
+    # time stops early and cannot be reproduced from its seed.
+    draws: int = 0
+    timeouts: int = 0
     average_deaths: float
     average_rounds: float
+    # The 95% confidence interval of wins_ratio, in percent
+    wins_interval: tuple[float, float]
     sim_data: list[SimData]
+    event_templates: Optional[dict[int, EventTemplate]] = None
+    seed: int
+
+
+class SimReplayRequest(BaseModel):
+    enemies: list[SimEnemyInfo]
+    parameters: SimParameters = SimParameters()
+    seed: int = Field(ge=0)
+    sim_num: int = Field(ge=1)
+    log_format: Literal["text", "events"] = "text"
+    battle_map: Optional[BattleMap] = None
+
+
+class SimReplayResponse(BaseModel):
+    sim_data: SimData
+    event_templates: Optional[dict[int, EventTemplate]] = None
+
+
+class SimJob(BaseModel):
+    job_id: str
+    status: str
+    completed_sims: int
+    total_sims: int
 
 
 # Authentication
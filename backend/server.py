@@ -7,8 +7,13 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 import models
+from api.dependencies import (
+    enemy_catalog,
+    simulation_executor,
+    simulation_jobs,
+)
 from api.routes import auth, characters, encounters, enemies, simulation, user
-from db import engine
+from db import AsyncSessionLocal, engine
 
 is_production = os.getenv("ENVIRONMENT") == "production"
 
@@ -46,6 +51,17 @@ app.include_router(auth.router, prefix="/auth")
 async def startup():
     async with engine.begin() as conn:
         await conn.run_sync(models.Base.metadata.create_all)
+        await conn.run_sync(models.add_missing_columns)
+        await conn.run_sync(models.add_missing_indexes)
+    async with AsyncSessionLocal() as db:
+        await enemy_catalog.refresh(db)
+    simulation_jobs.start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await simulation_jobs.stop()
+    simulation_executor.shutdown()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,55 @@
+"""Defines functions for the confidence intervals of simulation results."""
+
+import math
+from statistics import NormalDist
+
+# The confidence level of every interval reported, and its z-score
+CONFIDENCE = 0.95
+Z_SCORE = NormalDist().inv_cdf((1 + CONFIDENCE) / 2)
+
+
+def wilson_interval(successes: int, trials: int) -> tuple[float, float]:
+    """Returns the Wilson score interval of a proportion.
+
+    Unlike the normal approximation, the Wilson interval stays inside [0, 1]
+    and keeps a sensible width when the proportion is close to 0 or 1, which
+    is common for lopsided encounters.
+
+    Args:
+        successes (int): The number of successes, such as player wins.
+        trials (int): The number of trials, such as simulations run.
+
+    Returns:
+        tuple[float, float]: The lower and upper bounds of the interval at
+            the `CONFIDENCE` level, or (0, 1) if there have been no trials.
+    """
+    if trials <= 0:
+        return 0.0, 1.0
+
+    proportion = successes / trials
+    z_squared = Z_SCORE**2
+    denominator = 1 + z_squared / trials
+    center = (proportion + z_squared / (2 * trials)) / denominator
+    half_width = (
+        Z_SCORE
+        * math.sqrt(
+            proportion * (1 - proportion) / trials
+            + z_squared / (4 * trials**2)
+        )
+        / denominator
+    )
+    return max(center - half_width, 0.0), min(center + half_width, 1.0)
+
+
+def margin_of_error(successes: int, trials: int) -> float:
+    """Returns half the width of the Wilson interval of a proportion.
+
+    Args:
+        successes (int): The number of successes, such as player wins.
+        trials (int): The number of trials, such as simulations run.
+
+    Returns:
+        float: The margin of error of the proportion.
+    """
+    lower, upper = wilson_interval(successes, trials)
+    return (upper - lower) / 2
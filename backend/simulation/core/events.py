@@ -0,0 +1,369 @@
+"""Defines the compact event log recorded by the simulation.
+
+Rather than formatting a message for every action taken, the simulation
+records typed events: an event code followed by a handful of integers. Each
+argument of an event is one of three kinds:
+
+- A creature, stored as its index in the log's table of creature names.
+- A string, such as a damage type or spell name, stored as its index in the
+  log's table of strings.
+- A plain integer, such as a roll, an amount of damage, or hit points.
+
+Events are rendered to text lazily using `EVENT_SPECS`, either on the server
+when text is requested, or by a client using the same table of templates.
+Templates use positional fields for the event's fixed arguments, plus a few
+named fields:
+
+- The event's variable-length tail, such as damage rolls, joined together.
+- Optional numbers, which are rendered with a prefix such as " + " if they
+  are non-zero, and left out entirely if they are zero.
+
+"""
+
+from array import array
+from enum import IntEnum
+from typing import Any
+
+CREATURE = "c"
+STRING = "s"
+INT = "i"
+
+
+class Event(IntEnum):
+    """IntEnum representing every kind of message in the combat log."""
+
+    PARTY_HEADER = 0
+    ENEMIES_HEADER = 1
+    BLANK = 2
+    INITIATIVE_HEADER = 3
+    PARTICIPANT = 4
+    INITIATIVE = 5
+    ROUND = 6
+    WINNER = 7
+    TURN_START = 8
+    CURRENT_HIT_POINTS = 9
+    NO_ACTIONS = 10
+    STRIDE = 11
+    VITALITY_INVALID = 12
+    HIT_POINTS_REMAINING = 13
+    SAVE_ROLL = 14
+    SAVE_CRITICAL_SUCCESS = 15
+    SAVE_SUCCESS = 16
+    SAVE_FAILURE = 17
+    SAVE_CRITICAL_FAILURE = 18
+    HEALED = 19
+    RAISE_SHIELD = 20
+    DIED = 21
+    IMMUNE = 22
+    WEAK = 23
+    RESIST_ALL = 24
+    RESIST = 25
+    STRIKE = 26
+    SPELL_ATTACK = 27
+    STRIKE_ROLL = 28
+    SPELL_ATTACK_ROLL = 29
+    MISS = 30
+    HIT = 31
+    SNEAK_ATTACK = 32
+    CRITICAL_HIT = 33
+    DAMAGE = 34
+    CRITICAL_DAMAGE = 35
+    CAST = 36
+    AREA_ATTACK = 37
+    HEAL = 38
+    DRAW = 39
+    TIMEOUT = 40
+
+
+class EventSpec:
+    """Describes the arguments of an event and how to render it as text.
+
+    Attributes:
+        template: A format string for the event's text.
+        kinds: The kind of each fixed argument, one character per argument.
+        tail_kind: The kind of the variable-length arguments after the fixed
+            ones, if the event has any.
+        tail_name: The name of the template field the tail is rendered into.
+        separator: The string placed between the rendered tail arguments.
+        optional: Maps a template field name to the index of a fixed argument
+            and the prefix to render it with, if it is non-zero.
+    """
+
+    def __init__(
+        self,
+        template: str,
+        kinds: str = "",
+        tail_kind: str = None,
+        tail_name: str = "rolls",
+        separator: str = " + ",
+        optional: dict[str, tuple[int, str]] = {},
+    ):
+        self.template: str = template
+        self.kinds: str = kinds
+        self.tail_kind: str = tail_kind
+        self.tail_name: str = tail_name
+        self.separator: str = separator
+        self.optional: dict[str, tuple[int, str]] = optional
+
+    def to_dict(self) -> dict[str, Any]:
+        """Returns the spec as a dictionary, for clients to render events.
+
+        Returns:
+            dict[str, Any]: The spec's attributes.
+        """
+        return {
+            "template": self.template,
+            "kinds": self.kinds,
+            "tail_kind": self.tail_kind,
+            "tail_name": self.tail_name,
+            "separator": self.separator,
+            "optional": self.optional,
+        }
+
+
+EVENT_SPECS: dict[Event, EventSpec] = {
+    Event.PARTY_HEADER: EventSpec("Party:"),
+    Event.ENEMIES_HEADER: EventSpec("Enemies:"),
+    Event.BLANK: EventSpec(""),
+    Event.INITIATIVE_HEADER: EventSpec("Initiative order: "),
+    Event.PARTICIPANT: EventSpec("{0}. {1}", "ic"),
+    Event.INITIATIVE: EventSpec("{0}. {1}: {2}", "ici"),
+    Event.ROUND: EventSpec("Round {0}:", "i"),
+    Event.WINNER: EventSpec("{0} won in {1} rounds!", "si"),
+    Event.DRAW: EventSpec("The encounter was a draw after {0} rounds!", "i"),
+    Event.TIMEOUT: EventSpec(
+        "The encounter ran out of time after {0} rounds!", "i"
+    ),
+    Event.TURN_START: EventSpec("{0}'s turn:", "c"),
+    Event.CURRENT_HIT_POINTS: EventSpec("{0}'s current hit points: {1}", "ci"),
+    Event.NO_ACTIONS: EventSpec(
+        "{0} has no valid actions. Skipping turn", "c"
+    ),
+    Event.STRIDE: EventSpec("{0} Strides toward {1}, {2} feet away.", "cci"),
+    Event.VITALITY_INVALID: EventSpec(
+        "{0} is not undead, vitality damage invalid", "c"
+    ),
+    Event.HIT_POINTS_REMAINING: EventSpec("{0} has {1} HP remaining!", "ci"),
+    Event.SAVE_ROLL: EventSpec(
+        "{0} rolled a {1} ({2} + {3}) {4} save against {5} (DC {6})!",
+        "ciiissi",
+    ),
+    Event.SAVE_CRITICAL_SUCCESS: EventSpec(
+        "{0} critically succeeded. No damage taken!", "c"
+    ),
+    Event.SAVE_SUCCESS: EventSpec(
+        "{0} succeeded and takes {1} ({rolls}{bonus} halved) damage",
+        "cii",
+        INT,
+        optional={"bonus": (2, " + ")},
+    ),
+    Event.SAVE_FAILURE: EventSpec(
+        "{0} failed and takes {1} ({rolls}{bonus}) damage",
+        "cii",
+        INT,
+        optional={"bonus": (2, " + ")},
+    ),
+    Event.SAVE_CRITICAL_FAILURE: EventSpec(
+        "{0} critically failed and takes {1} ({rolls}{bonus} doubled) damage",
+        "cii",
+        INT,
+        optional={"bonus": (2, " + ")},
+    ),
+    Event.HEALED: EventSpec("{0} is now at {1} hit points!", "ci"),
+    Event.RAISE_SHIELD: EventSpec("{0} raises their shield!", "c"),
+    Event.DIED: EventSpec("{0} has died!", "c"),
+    Event.IMMUNE: EventSpec("{0} is immune to {1}. No damage taken!", "cs"),
+    Event.WEAK: EventSpec(
+        "{0} is weak to {1}, {2} extra damage taken, total {3} damage.",
+        "csii",
+    ),
+    Event.RESIST_ALL: EventSpec(
+        "{0} is resistant to all damage, {1} damage resisted, total {2} "
+        "damage.",
+        "cii",
+    ),
+    Event.RESIST: EventSpec(
+        "{0} is resistant to {1}, {2} damage resisted, total {3} damage.",
+        "csii",
+    ),
+    Event.STRIKE: EventSpec("{0} Strikes {1} with their {2}.", "ccs"),
+    Event.SPELL_ATTACK: EventSpec("{0} attacks {1} with their {2}.", "ccs"),
+    Event.STRIKE_ROLL: EventSpec(
+        "{0} rolled {1} ({3}{bonus}{penalty}) to attack against AC {2}.",
+        "ciiiii",
+        optional={"bonus": (4, " + "), "penalty": (5, " - ")},
+    ),
+    Event.SPELL_ATTACK_ROLL: EventSpec(
+        "{0} rolled {1} ({3} + {4}) to attack against AC {2}.", "ciiii"
+    ),
+    Event.MISS: EventSpec("Miss!"),
+    Event.HIT: EventSpec("Hit!"),
+    Event.SNEAK_ATTACK: EventSpec(
+        "{0} sneak attacks for {1} extra damage.", "ci"
+    ),
+    Event.CRITICAL_HIT: EventSpec("{0} dealt a critical hit to {1}!", "cc"),
+    Event.DAMAGE: EventSpec(
+        "{0} dealt {2} ({rolls}{bonus}{sneak}) {3} damage to {1}!",
+        "ccisii",
+        INT,
+        optional={"bonus": (4, " + "), "sneak": (5, " + ")},
+    ),
+    Event.CRITICAL_DAMAGE: EventSpec(
+        "{0} dealt {2} ({rolls}{bonus}{sneak} doubled{deadly}) {3} damage to "
+        "{1}!",
+        "ccisiii",
+        INT,
+        optional={
+            "bonus": (4, " + "),
+            "sneak": (5, " + "),
+            "deadly": (6, " + "),
+        },
+    ),
+    Event.CAST: EventSpec("{0} casts {1}!", "cs"),
+    Event.AREA_ATTACK: EventSpec(
+        "{0} attacks {targets} with {1}!",
+        "cs",
+        CREATURE,
+        tail_name="targets",
+        separator=", ",
+    ),
+    Event.HEAL: EventSpec(
+        "{0} cast Heal on {1} for {2} hit points ({3} + {4})", "cciii"
+    ),
+}
+
+
+def render_event(event: Event, args: list[Any]) -> str:
+    """Renders an event as a line of text.
+
+    Args:
+        event (Event): The kind of event.
+        args (list[Any]): The event's arguments. Creatures and strings may be
+            passed as objects, or as names already looked up from the log.
+
+    Returns:
+        str: The text of the event.
+    """
+    spec = EVENT_SPECS[event]
+    num_fixed = len(spec.kinds)
+    fixed = args[:num_fixed]
+
+    fields = {}
+    if spec.tail_kind:
+        fields[spec.tail_name] = spec.separator.join(
+            str(arg) for arg in args[num_fixed:]
+        )
+    for name, (index, prefix) in spec.optional.items():
+        value = fixed[index]
+        fields[name] = f"{prefix}{value}" if value else ""
+
+    return spec.template.format(*fixed, **fields)
+
+
+class EventLog:
+    """A compact log of the events that happened in one simulation.
+
+    Attributes:
+        events: Every recorded event as a flat array of integers. Each event
+            is stored as its code, its number of arguments, then its
+            arguments.
+        creatures: The name of each creature, indexed by `log_index`.
+        strings: Every string referenced by an event, each stored once.
+    """
+
+    def __init__(self):
+        self.events: array = array("i")
+        self.creatures: list[str] = []
+        self.strings: list[str] = []
+        self._string_ids: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        """Returns the number of integers stored in the log."""
+        return len(self.events)
+
+    def add_creature(self, creature) -> None:
+        """Adds `creature` to the table of creatures and sets its log index.
+
+        Args:
+            creature (Creature): The creature to be added.
+        """
+        creature.log_index = len(self.creatures)
+        self.creatures.append(str(creature))
+
+    def record(self, event: Event, args: tuple[Any]) -> None:
+        """Appends an event to the log.
+
+        Args:
+            event (Event): The kind of event.
+            args (tuple[Any]): The event's arguments, with creatures passed as
+                Creature objects and strings as any object to be converted to
+                a string.
+        """
+        spec = EVENT_SPECS[event]
+        kinds = spec.kinds
+        num_fixed = len(kinds)
+        events = self.events
+        events.append(event)
+        events.append(len(args))
+        for i, arg in enumerate(args):
+            kind = kinds[i] if i < num_fixed else spec.tail_kind
+            if kind == CREATURE:
+                events.append(arg.log_index)
+            elif kind == STRING:
+                events.append(self._intern(str(arg)))
+            else:
+                events.append(arg)
+
+    def render(self) -> list[str]:
+        """Renders every event in the log as text.
+
+        Returns:
+            list[str]: One line of text per event.
+        """
+        lines = []
+        events = self.events
+        i = 0
+        while i < len(events):
+            event = Event(events[i])
+            start = i + 2
+            end = start + events[i + 1]
+            args = events[start:end]
+            lines.append(render_event(event, self._resolve(event, args)))
+            i = end
+
+        return lines
+
+    def to_dict(self) -> dict[str, Any]:
+        """Returns the log's events and lookup tables.
+
+        Returns:
+            dict[str, Any]: The events, creature names, and strings.
+        """
+        return {
+            "events": self.events,
+            "creatures": self.creatures,
+            "strings": self.strings,
+        }
+
+    def _intern(self, string: str) -> int:
+        string_id = self._string_ids.get(string)
+        if string_id is None:
+            string_id = len(self.strings)
+            self._string_ids[string] = string_id
+            self.strings.append(string)
+        return string_id
+
+    def _resolve(self, event: Event, args: array) -> list[Any]:
+        spec = EVENT_SPECS[event]
+        kinds = spec.kinds
+        num_fixed = len(kinds)
+        resolved = []
+        for i, arg in enumerate(args):
+            kind = kinds[i] if i < num_fixed else spec.tail_kind
+            if kind == CREATURE:
+                resolved.append(self.creatures[arg])
+            elif kind == STRING:
+                resolved.append(self.strings[arg])
+            else:
+                resolved.append(arg)
+        return resolved
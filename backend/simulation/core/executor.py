@@ -0,0 +1,481 @@
+"""Defines executors used to run batches of simulations off the event loop."""
+
+import asyncio
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Awaitable, Callable
+
+from ..creatures.template import (
+    EnemyTemplate,
+    PlayerTemplate,
+    compile_templates,
+)
+from ..encounters.battle_map import compile_map
+from ..encounters.encounter import MAX_ROUNDS
+from ..vectorized.engine import run_vectorized_batch
+from .confidence import margin_of_error
+from .simulation import run_simulation, simulation_rng
+
+# The sims in each wave's chunks when stopping early, before the waves grow
+FIRST_WAVE_CHUNK_SIZE = 4
+
+# Seeded vectorized sims are rolled in fixed blocks, each with its own stream
+VECTORIZED_BLOCK_SIZE = 1000
+
+# The most seconds a request's simulations may run for by default
+TIME_LIMIT = 10.0
+
+
+def run_batch(
+    player_dicts: list[dict[str, Any]],
+    enemy_dicts: list[dict[str, Any]],
+    parameters: dict[str, int],
+    first_sim: int,
+    num_sims: int,
+    collect_log: bool = True,
+    log_format: str = "text",
+    engine: str = "reference",
+    seed: int = None,
+    map_dict: dict[str, Any] = None,
+    deadline: float = None,
+) -> dict[str, Any]:
+    """Runs `num_sims` simulations and returns their combined results.
+
+    Each simulation is numbered starting from `first_sim`, so that batches run
+    in separate processes can be merged back together in order. Creatures are
+    compiled into templates once, then shared by every simulation in the
+    batch. Likewise the map, if any, is built once per process along with
+    the paths found on it.
+
+    With a `seed`, each simulation rolls with its own generator from
+    `simulation_rng`, so it can be replayed later on its own. The vectorized
+    engine runs many simulations at once and only counts the results, so the
+    batch has no data from individual simulations. Seeded, it rolls each
+    block of `VECTORIZED_BLOCK_SIZE` simulations with a stream derived from
+    the seed and the block's number alone, so the results do not depend on
+    how the request was split, as long as batches start on a block.
+
+    Once the `deadline` passes, the simulation running times out and the
+    rest of the batch is dropped, though the first always runs. Where the
+    deadline falls depends on how busy the server is, so a seeded request
+    that hits it is not reproducible, and replaying a simulation that timed
+    out may play it further.
+
+    Args:
+        player_dicts (list[dict[str, Any]]): Dictionaries to initialize
+            Players.
+        enemy_dicts (list[dict[str, Any]]): Dictionaries to initialize Enemies.
+        parameters (dict[str, int]): Settings for fine-tuning the simulation.
+        first_sim (int): The number of the first simulation in the batch.
+        num_sims (int): The number of simulations to run.
+        collect_log (bool, optional): Whether to build each simulation's
+            combat log. Defaults to True.
+        log_format (str, optional): Either "text" or "events", the format of
+            each simulation's combat log. Defaults to "text".
+        engine (str, optional): Either "reference" or "vectorized", the
+            engine used to run the simulations. Defaults to "reference".
+        seed (int, optional): The seed of the whole request. Defaults to
+            None, rolling with the random module's shared generator.
+        map_dict (dict[str, Any], optional): The map to fight on. Defaults to
+            None, fighting on an open plane.
+        deadline (float, optional): The `time.time()` after which no more
+            simulations are run. Defaults to None, for no limit.
+
+    Returns:
+        dict[str, Any]: The number of player wins, draws, timeouts, total
+            players killed, total rounds, and the data from each simulation
+            in the batch.
+
+    Raises:
+        ValueError: If a map is given to the vectorized engine.
+    """
+    players = compile_templates(player_dicts, PlayerTemplate)
+    enemies = compile_templates(enemy_dicts, EnemyTemplate)
+    battle_map = compile_map(map_dict)
+    if engine == "vectorized":
+        if battle_map is not None:
+            raise ValueError("The vectorized engine does not support maps")
+        max_rounds = parameters.get("max_rounds", MAX_ROUNDS)
+        if seed is None:
+            return run_vectorized_batch(
+                players, enemies, parameters, num_sims, None, max_rounds
+            )
+        blocks = []
+        last_sim = first_sim + num_sims - 1
+        while first_sim <= last_sim:
+            if blocks and _past(deadline):
+                break
+            block = (first_sim - 1) // VECTORIZED_BLOCK_SIZE
+            block_end = (block + 1) * VECTORIZED_BLOCK_SIZE
+            block_sims = min(block_end, last_sim) - first_sim + 1
+            blocks.append(
+                run_vectorized_batch(
+                    players,
+                    enemies,
+                    parameters,
+                    block_sims,
+                    [seed, block],
+                    max_rounds,
+                )
+            )
+            first_sim += block_sims
+        return merge_batches(blocks)
+
+    batch = new_batch()
+    for sim_num in range(first_sim, first_sim + num_sims):
+        if batch["total_sims"] and _past(deadline):
+            break
+        rng = None if seed is None else simulation_rng(seed, sim_num)
+        sim_data = run_simulation(
+            players,
+            enemies,
+            parameters,
+            collect_log,
+            log_format,
+            rng,
+            battle_map,
+            deadline,
+        )
+        sim_data["sim_num"] = sim_num
+        add_to_batch(batch, sim_data)
+
+    return batch
+
+
+def _past(deadline: float) -> bool:
+    return deadline is not None and time.time() >= deadline
+
+
+def new_batch() -> dict[str, Any]:
+    """Returns an empty batch of simulation results.
+
+    Returns:
+        dict[str, Any]: A batch with every counter set to zero.
+    """
+    return {
+        "total_sims": 0,
+        "wins": 0,
+        "draws": 0,
+        "timeouts": 0,
+        "players_killed": 0,
+        "rounds": 0,
+        "sim_data": [],
+    }
+
+
+def add_to_batch(batch: dict[str, Any], sim_data: dict[str, Any]) -> None:
+    """Adds the results of a single simulation to `batch`.
+
+    Args:
+        batch (dict[str, Any]): The batch being added to.
+        sim_data (dict[str, Any]): The data returned by `run_simulation`.
+    """
+    batch["total_sims"] += 1
+    if sim_data["winner"] == "players":
+        batch["wins"] += 1
+    elif sim_data["winner"] == "draw":
+        batch["draws"] += 1
+    elif sim_data["winner"] == "timeout":
+        batch["timeouts"] += 1
+    batch["players_killed"] += sim_data["players_killed"]
+    batch["rounds"] += sim_data["rounds"]
+    batch["sim_data"].append(sim_data)
+
+
+def merge_batches(batches: list[dict[str, Any]]) -> dict[str, Any]:
+    """Combines the counters and simulation data of several batches.
+
+    Args:
+        batches (list[dict[str, Any]]): The batches to merge, in order.
+
+    Returns:
+        dict[str, Any]: A single batch containing the results of all batches.
+    """
+    merged = new_batch()
+    for batch in batches:
+        merged["total_sims"] += batch["total_sims"]
+        merged["wins"] += batch["wins"]
+        merged["draws"] += batch["draws"]
+        merged["timeouts"] += batch["timeouts"]
+        merged["players_killed"] += batch["players_killed"]
+        merged["rounds"] += batch["rounds"]
+        merged["sim_data"].extend(batch["sim_data"])
+
+    return merged
+
+
+def split_into_chunks(
+    total_sims: int, num_chunks: int, first_sim: int = 1
+) -> list[tuple[int, int]]:
+    """Splits `total_sims` simulations into at most `num_chunks` chunks.
+
+    Chunk sizes differ by at most one, and simulations are numbered from
+    `first_sim`.
+
+    Args:
+        total_sims (int): The total number of simulations to be run.
+        num_chunks (int): The number of chunks to split the simulations into.
+        first_sim (int, optional): The number of the first simulation.
+            Defaults to 1.
+
+    Returns:
+        list[tuple[int, int]]: The number of the first simulation in each
+            chunk and the number of simulations in the chunk.
+    """
+    num_chunks = max(1, min(num_chunks, total_sims))
+    chunk_size, remainder = divmod(total_sims, num_chunks)
+
+    chunks = []
+    for i in range(num_chunks):
+        num_sims = chunk_size + (1 if i < remainder else 0)
+        if num_sims:
+            chunks.append((first_sim, num_sims))
+        first_sim += num_sims
+
+    return chunks
+
+
+class SimulationExecutor:
+    """Runs simulations one chunk at a time on a background worker thread.
+
+    The base executor keeps the event loop free by running each chunk of
+    simulations on a background thread, reporting progress after every chunk.
+    Subclasses override `_run_chunks` to distribute the work differently.
+
+    Attributes:
+        max_chunk_size: The largest number of simulations run in one chunk,
+            which bounds how often progress is reported.
+        max_vectorized_chunk_size: The largest number of simulations run in
+            one chunk by the vectorized engine, which is much faster per
+            simulation and works best on large batches.
+    """
+
+    def __init__(
+        self,
+        max_chunk_size: int = 100,
+        max_vectorized_chunk_size: int = 10000,
+    ):
+        """Initializes the executor.
+
+        Args:
+            max_chunk_size (int, optional): The largest number of simulations
+                run in one chunk. Defaults to 100.
+            max_vectorized_chunk_size (int, optional): The largest number of
+                simulations run in one chunk by the vectorized engine.
+                Defaults to 10000.
+        """
+        self.max_chunk_size: int = max_chunk_size
+        self.max_vectorized_chunk_size: int = max_vectorized_chunk_size
+
+    async def run(
+        self,
+        player_dicts: list[dict[str, Any]],
+        enemy_dicts: list[dict[str, Any]],
+        parameters: dict[str, int],
+        total_sims: int,
+        on_progress: Callable[[int], None] = None,
+        collect_log: bool = True,
+        log_format: str = "text",
+        engine: str = "reference",
+        seed: int = None,
+        margin: float = None,
+        map_dict: dict[str, Any] = None,
+        time_limit: float = TIME_LIMIT,
+    ) -> dict[str, Any]:
+        """Runs `total_sims` simulations and returns their merged results.
+
+        With a `margin`, simulations are run in waves of one set of chunks
+        at a time, stopping early once the margin of error of the players'
+        win rate is at most `margin`. `total_sims` is then the most
+        simulations that will be run. The first wave gives each chunk only
+        `FIRST_WAVE_CHUNK_SIZE` simulations, and each wave after doubles
+        that up to the largest chunk, so lopsided encounters stop after a
+        handful of simulations and close ones soon reach full chunks.
+
+        The vectorized engine's chunks always start on a block of
+        `VECTORIZED_BLOCK_SIZE` simulations, so seeded results are the same
+        whatever the executor or the chunk sizes.
+
+        The request as a whole may run for `time_limit` seconds. After that,
+        no more waves are started, and each chunk stops after the simulation
+        it is running, which times out. Fewer than `total_sims` simulations
+        are then returned, and seeded results are no longer reproducible.
+
+        Args:
+            player_dicts (list[dict[str, Any]]): Dictionaries to initialize
+                Players.
+            enemy_dicts (list[dict[str, Any]]): Dictionaries to initialize
+                Enemies.
+            parameters (dict[str, int]): Settings for fine-tuning the
+                simulation.
+            total_sims (int): The number of simulations to run.
+            on_progress (Callable[[int], None], optional): Called with the
+                number of simulations in each chunk as it finishes. Defaults
+                to None.
+            collect_log (bool, optional): Whether to build each simulation's
+                combat log. Defaults to True.
+            log_format (str, optional): Either "text" or "events", the format
+                of each simulation's combat log. Defaults to "text".
+            engine (str, optional): Either "reference" or "vectorized", the
+                engine used to run the simulations. Defaults to "reference".
+            seed (int, optional): Seeds every simulation, so that they can be
+                reproduced. Defaults to None.
+            margin (float, optional): The target margin of error of the win
+                rate, as a proportion from 0 to 1. Defaults to None, running
+                every simulation.
+            map_dict (dict[str, Any], optional): The map to fight on.
+                Defaults to None, fighting on an open plane.
+            time_limit (float, optional): The most seconds the simulations
+                may run for. Defaults to `TIME_LIMIT`, and None means no
+                limit.
+
+        Returns:
+            dict[str, Any]: The merged results of every simulation.
+        """
+        deadline = None if time_limit is None else time.time() + time_limit
+
+        # Simulations are split in whole units, blocks for the vectorized
+        # engine and single simulations otherwise
+        if engine == "vectorized":
+            unit = VECTORIZED_BLOCK_SIZE
+            max_units = max(self.max_vectorized_chunk_size // unit, 1)
+        else:
+            unit = 1
+            max_units = self.max_chunk_size
+        total_units = math.ceil(total_sims / unit)
+        chunk_units = max(FIRST_WAVE_CHUNK_SIZE // unit, 1)
+
+        async def run_chunk(chunk: tuple[int, int]) -> dict[str, Any]:
+            first_sim, num_sims = chunk
+            batch = await self._run_batch(
+                player_dicts,
+                enemy_dicts,
+                parameters,
+                first_sim,
+                num_sims,
+                collect_log,
+                log_format,
+                engine,
+                seed,
+                map_dict,
+                deadline,
+            )
+            if on_progress:
+                on_progress(batch["total_sims"])
+            return batch
+
+        batches = []
+        first_unit = 0
+        while first_unit < total_units:
+            wave_units = total_units - first_unit
+            if margin is not None:
+                wave_units = min(wave_units, self._min_chunks() * chunk_units)
+                chunk_units = min(chunk_units * 2, max_units)
+            num_chunks = max(
+                self._min_chunks(), math.ceil(wave_units / max_units)
+            )
+            chunks = [
+                (unit * first + 1, min(unit * size, total_sims - unit * first))
+                for first, size in split_into_chunks(
+                    wave_units, num_chunks, first_unit
+                )
+            ]
+            batches.extend(await self._run_chunks(run_chunk, chunks))
+            first_unit += wave_units
+            if _past(deadline):
+                break
+
+            if margin is not None:
+                wins = sum(batch["wins"] for batch in batches)
+                num_sims = sum(batch["total_sims"] for batch in batches)
+                if margin_of_error(wins, num_sims) <= margin:
+                    break
+
+        return merge_batches(batches)
+
+    def shutdown(self) -> None:
+        """Releases any resources held by the executor."""
+        pass
+
+    def _min_chunks(self) -> int:
+        return 1
+
+    async def _run_batch(self, *args) -> dict[str, Any]:
+        return await asyncio.to_thread(run_batch, *args)
+
+    async def _run_chunks(
+        self,
+        run_chunk: Callable[[tuple[int, int]], Awaitable[dict[str, Any]]],
+        chunks: list[tuple[int, int]],
+    ) -> list[dict[str, Any]]:
+        # One chunk at a time, so only one thread is ever busy
+        return [await run_chunk(chunk) for chunk in chunks]
+
+
+class ProcessPoolSimulationExecutor(SimulationExecutor):
+    """Runs simulations in parallel on a long-lived pool of processes.
+
+    The pool is created on first use and reused by every request until
+    `shutdown` is called. Each request is split into chunks which are run in
+    parallel, then their counters are merged back together.
+
+    Attributes:
+        max_workers: The number of worker processes in the pool.
+        chunks_per_worker: How many chunks each worker is given per request.
+            More chunks balance load better at the cost of more overhead.
+        max_chunk_size: The largest number of simulations run in one chunk.
+        max_vectorized_chunk_size: The largest number of simulations run in
+            one chunk by the vectorized engine.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = None,
+        chunks_per_worker: int = 1,
+        max_chunk_size: int = 100,
+        max_vectorized_chunk_size: int = 10000,
+    ):
+        """Initializes the executor without starting any processes.
+
+        Args:
+            max_workers (int, optional): The number of worker processes.
+                Defaults to the number of CPU cores.
+            chunks_per_worker (int, optional): The number of chunks each worker
+                is given per request. Defaults to 1.
+            max_chunk_size (int, optional): The largest number of simulations
+                run in one chunk. Defaults to 100.
+            max_vectorized_chunk_size (int, optional): The largest number of
+                simulations run in one chunk by the vectorized engine.
+                Defaults to 10000.
+        """
+        super().__init__(max_chunk_size, max_vectorized_chunk_size)
+        self.max_workers: int = max_workers or os.cpu_count() or 1
+        self.chunks_per_worker: int = chunks_per_worker
+        self._pool: ProcessPoolExecutor = None
+
+    def shutdown(self) -> None:
+        """Shuts down the pool of processes, if it has been started."""
+        if self._pool:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _min_chunks(self) -> int:
+        return self.max_workers * self.chunks_per_worker
+
+    async def _run_batch(self, *args) -> dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_pool(), run_batch, *args)
+
+    async def _run_chunks(
+        self,
+        run_chunk: Callable[[tuple[int, int]], Awaitable[dict[str, Any]]],
+        chunks: list[tuple[int, int]],
+    ) -> list[dict[str, Any]]:
+        return await asyncio.gather(*(run_chunk(chunk) for chunk in chunks))
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if not self._pool:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
@@ -1,20 +1,29 @@
 """Defines core simulation driver function and private Simulation class."""
 
+import random
 from typing import Any
 
 from ..creatures.enemy import Enemy
 from ..creatures.player import Player
-from ..encounters.encounter import Encounter
+from ..creatures.template import EnemyTemplate, PlayerTemplate
+from ..encounters.battle_map import BattleMap
+from ..encounters.encounter import MAX_ROUNDS, STALEMATE_ROUNDS, Encounter
+from .events import Event, EventLog
 
 
 def run_simulation(
-    player_dicts: list[dict[str, Any]],
-    enemy_dicts: list[dict[str, Any]],
+    player_dicts: list[dict[str, Any] | PlayerTemplate],
+    enemy_dicts: list[dict[str, Any] | EnemyTemplate],
     parameters: dict[str, int] = {
         "starting_distance": 50,
         "health_multiplier": 1.0,
     },
-) -> dict[str, str | int | list[str]]:
+    collect_log: bool = True,
+    log_format: str = "text",
+    rng: random.Random = None,
+    battle_map: BattleMap = None,
+    deadline: float = None,
+) -> dict[str, Any]:
     """Runs one simulation and returns a dictionary with the data from it.
 
     Uses the private _Simulation class to keep track of data while the
@@ -22,26 +31,78 @@ def run_simulation(
     winner, the number of rounds played, number of players killed, total
     number of players, and a combat log of actions taken during the simulation.
 
+    The combat log is recorded as compact events, and is only rendered to text
+    if `log_format` is "text". Otherwise, the events and the tables needed to
+    render them are returned as they are.
+
     Args:
-        player_dicts (list[dict[str, Any]]): Dictionaries to initialize
-            Players.
-        enemy_dicts (list[dict[str, Any]]): Dictionaries to initialize Enemies.
+        player_dicts (list[dict[str, Any] | PlayerTemplate]): Dictionaries
+            or compiled templates to initialize Players.
+        enemy_dicts (list[dict[str, Any] | EnemyTemplate]): Dictionaries or
+            compiled templates to initialize Enemies.
         parameters: Dictionary with various settings for fine-tuning the
             simulation, such as starting distance and player health multiplier.
+            It may also set "max_rounds" and "stalemate_rounds", when the
+            encounter is stopped as a draw.
+        collect_log (bool, optional): Whether to build the combat log. When
+            False, no log messages are formatted and the returned log is
+            empty. Defaults to True.
+        log_format (str, optional): Either "text" to return the log as lines
+            of text, or "events" to return the recorded events. Defaults to
+            "text".
+        rng (random.Random, optional): The random number generator used for
+            every roll in the simulation. Passing a generator from
+            `simulation_rng` makes the simulation reproducible. Defaults to
+            the random module's shared generator.
+        battle_map (BattleMap, optional): The map the encounter is fought
+            on. Defaults to None, fighting on an open plane.
+        deadline (float, optional): The `time.time()` at which the
+            encounter times out. Defaults to None, for no limit.
 
     Returns:
-        dict[str, str | int | list[str]]: Dict with data from the simulation.
+        dict[str, Any]: Dict with data from the simulation.
     """
 
-    simulation = _Simulation(player_dicts, enemy_dicts, parameters)
+    simulation = _Simulation(
+        player_dicts,
+        enemy_dicts,
+        parameters,
+        collect_log,
+        rng,
+        battle_map,
+        deadline,
+    )
     simulation.run()
-    return {
+    sim_data = {
         "winner": simulation.winner,
         "rounds": simulation.rounds,
         "players_killed": simulation.players_killed,
         "total_players": simulation.total_players,
-        "log": simulation.sim_log,
     }
+    if log_format == "events":
+        sim_data.update(simulation.event_log.to_dict())
+    else:
+        sim_data["log"] = simulation.event_log.render()
+
+    return sim_data
+
+
+def simulation_rng(seed: int, sim_num: int) -> random.Random:
+    """Returns the random number generator for one simulation of a request.
+
+    Every simulation gets its own stream, derived from the request's seed and
+    the simulation's number alone. Any single simulation can then be replayed
+    without running the ones before it, no matter how the request was split
+    into batches.
+
+    Args:
+        seed (int): The seed of the whole request.
+        sim_num (int): The number of the simulation, starting from 1.
+
+    Returns:
+        random.Random: A generator seeded for simulation `sim_num`.
+    """
+    return random.Random(f"{seed}:{sim_num}")
 
 
 class _Simulation:
@@ -53,8 +114,15 @@ class _Simulation:
         rounds: The number of rounds the simulation lasted.
         starting_distance: The distance between the players and enemies at the
             start of the simulation.
-        sim_log: A list of messages to be displayed by the frontend, showing
-            a play-by-play description of the actions taken in the simulation.
+        max_rounds: The most rounds played before the encounter is a draw.
+        stalemate_rounds: The most rounds in a row without progress before
+            the encounter is a draw.
+        event_log: The events recorded in the simulation, to be displayed by
+            the frontend as a play-by-play description of the actions taken.
+        collect_log: Whether events should be recorded in `event_log`.
+        rng: The random number generator used for every roll.
+        battle_map: The map the encounter is fought on, if any.
+        deadline: The `time.time()` at which the encounter times out, if any.
         players: The Player objects used in the simulation.
         enemies: The enemy objects used in the simulation.
         total_players: The total number of players in the simulation.
@@ -62,15 +130,27 @@ class _Simulation:
 
     def __init__(
         self,
-        player_dicts: list[dict[str, Any]],
-        enemy_dicts: list[dict[str, Any]],
+        player_dicts: list[dict[str, Any] | PlayerTemplate],
+        enemy_dicts: list[dict[str, Any] | EnemyTemplate],
         parameters: dict[str, int],
+        collect_log: bool = True,
+        rng: random.Random = None,
+        battle_map: BattleMap = None,
+        deadline: float = None,
     ):
         self.winner: str = ""
         self.players_killed: int = 0
         self.rounds: int = 0
         self.starting_distance = parameters["starting_distance"]
-        self.sim_log: list[str] = []
+        self.max_rounds: int = parameters.get("max_rounds", MAX_ROUNDS)
+        self.stalemate_rounds: int = parameters.get(
+            "stalemate_rounds", STALEMATE_ROUNDS
+        )
+        self.event_log: EventLog = EventLog()
+        self.collect_log: bool = collect_log
+        self.rng: random.Random = rng or random
+        self.battle_map: BattleMap = battle_map
+        self.deadline: float = deadline
 
         self.players: list[Player] = []
         self.enemies: list[Enemy] = []
@@ -83,17 +163,33 @@ class _Simulation:
 
         self.total_players: int = len(self.players)
 
+        if collect_log:
+            for creature in self.players + self.enemies:
+                self.event_log.add_creature(creature)
+
     def run(self):
-        """Runs one encounter, setting `self.winner` based on the results."""
+        """Runs one encounter, setting `self.winner` based on the results.
+
+        The winner is "draw" or "timeout" if the encounter was stopped
+        without one.
+        """
         encounter = Encounter(
-            self.players, self.enemies, self, self.starting_distance
+            self.players,
+            self.enemies,
+            self,
+            self.starting_distance,
+            self.battle_map,
+            self.max_rounds,
+            self.stalemate_rounds,
+            self.deadline,
         )
         self.winner = encounter.run_encounter()
 
-    def log(self, message: str):
-        """Appends `message` to `sim_log`. To be displayed by the frontend.
+    def log(self, event: Event, *args: Any):
+        """Records an event in `event_log`. To be displayed by the frontend.
 
         Args:
-            message (str): The message to be appended.
+            event (Event): The kind of event.
+            *args (Any): The event's arguments, such as creatures and rolls.
         """
-        self.sim_log.append(message)
+        self.event_log.record(event, args)
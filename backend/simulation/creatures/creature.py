@@ -1,11 +1,22 @@
 """Defines the Creature class and its methods."""
 
 import math
+import random
 from typing import Any, Self
 
+from ..core.events import Event, render_event
+from ..encounters.battle_map import BattleMap
 from ..mechanics.actions import Action, Attack, Spell
 from ..mechanics.heal import Heal
-from ..mechanics.misc import Degree, calculate_dos, d20
+from ..mechanics.misc import (
+    Degree,
+    calculate_dos,
+    d20,
+    grid_distance,
+    stride,
+)
+from .skills import Skills
+from .template import CreatureTemplate
 
 
 class Creature:
@@ -32,13 +43,10 @@ class Creature:
         spell_dc: The DC enemies must meet or exceed on saves against the
             creature's spells, if the creature is a spellcaster.
 
-        attribute_modifiers: The six core PF2E attribute modifiers —
-            strength, dexterity, constitution, intelligence, wisdom, and
-            charisma — each stored as an individual integer attribute.
-
-        skills: The creature's skill modifiers for all standard PF2E skills.
-            If a skill is not explicitly defined, it defaults to the modifier
-            of its governing attribute.
+        skills: The creature's six core PF2E attribute modifiers and its
+            skill modifiers for all standard PF2E skills, kept in a Skills
+            object shared with the creature's template. Each modifier can
+            also be read directly from the creature, ex. `creature.stealth`.
 
         fortitude: The creature's Fortitude saving throw modifier.
         reflex: The creature's Reflex saving throw modifier.
@@ -54,6 +62,7 @@ class Creature:
         actions: A combined list of all Action objects available to the
             creature, including attacks, spells, heals, and shield actions.
         sneak_attack: Whether the creature has the sneak attack ability.
+        template: The compiled template the creature was built from.
 
         encounter: The encounter the creature is in, if any, primarily used
             for removing the creature from the encounter on death.
@@ -70,6 +79,10 @@ class Creature:
 
         simulation: The simulation the creature is in, if any, primarily used
             for adding messages to the simulation's combat log.
+        collect_log: Whether events should be recorded for the combat log.
+        log_index: The creature's index in the simulation's event log.
+        rng: The random number generator used for the creature's rolls,
+            shared with its simulation.
 
         position_x: The creature's current x-coordinate on the encounter map,
             measured in 5-foot squares.
@@ -77,111 +90,89 @@ class Creature:
             measured in 5-foot squares.
     """
 
+    __slots__ = (
+        "name",
+        "level",
+        "perception",
+        "max_hit_points",
+        "current_hit_points",
+        "speed",
+        "armor_class",
+        "spell_attack_bonus",
+        "spell_dc",
+        "fortitude",
+        "reflex",
+        "will",
+        "attacks",
+        "spells",
+        "heals",
+        "shield_value",
+        "actions",
+        "sneak_attack",
+        "template",
+        "encounter",
+        "initiative",
+        "num_actions",
+        "multi_attack",
+        "team",
+        "is_dead",
+        "shield_raised",
+        "simulation",
+        "collect_log",
+        "log_index",
+        "rng",
+        "position_x",
+        "position_y",
+        "_weights",
+        "_weights_version",
+    )
+
+    template_class: type = CreatureTemplate
+
     # Built-in Methods
 
-    def __init__(self, creature_dict: dict[str, Any], simulation=None):
-        """Initializes the creature based on the values in `creature_dict`
+    def __init__(
+        self,
+        creature: dict[str, Any] | CreatureTemplate,
+        simulation=None,
+    ):
+        """Initializes the creature from `creature`.
 
         Args:
-            creature_dict (dict[str, Any]): Data used to build the Creature.
+            creature (dict[str, Any] | CreatureTemplate): Data used to build
+                the Creature, or a template already compiled from that data.
+                Passing a template skips parsing the data again, which is
+                much faster when many simulations use the same creature.
             simulation (Simulation, optional): The simulation the creature is
                 in. Defaults to None.
         """
+        if not isinstance(creature, CreatureTemplate):
+            creature = self.template_class(creature)
+        self.template: CreatureTemplate = creature
+
         # Basic Stats
-        self.name: str = creature_dict["name"]
-        self.level: int = creature_dict["level"]
-        self.perception: int = creature_dict["perception"]
-        self.max_hit_points: int = creature_dict["max_hit_points"]
+        self.name: str = creature.name
+        self.level: int = creature.level
+        self.perception: int = creature.perception
+        self.max_hit_points: int = creature.max_hit_points
         self.current_hit_points: int = self.max_hit_points
-        self.speed: int = creature_dict["speed"]
-        self.armor_class: int = creature_dict["defenses"]["armor_class"]
-        self.spell_attack_bonus: int = creature_dict.get("spell_attack_bonus")
-        self.spell_dc: int = creature_dict.get("spell_dc")
-
-        # Attribute Modifiers
-        attributes = creature_dict["attribute_modifiers"]
-        self.strength: int = attributes["strength"]
-        self.constitution: int = attributes["constitution"]
-        self.dexterity: int = attributes["dexterity"]
-        self.intelligence: int = attributes["intelligence"]
-        self.wisdom: int = attributes["wisdom"]
-        self.charisma: int = attributes["charisma"]
-
-        # Skills
-        skills = creature_dict["skills"]
-        self.acrobatics: int = skills.get("acrobatics", self.dexterity)
-        self.arcana: int = skills.get("arcana", self.intelligence)
-        self.athletics: int = skills.get("athletics", self.strength)
-        self.crafting: int = skills.get("crafting", self.intelligence)
-        self.deception: int = skills.get("deception", self.charisma)
-        self.diplomacy: int = skills.get("diplomacy", self.charisma)
-        self.intimidation: int = skills.get("intimidation", self.charisma)
-        self.lore: int = skills.get("lore", self.intelligence)
-        self.medicine: int = skills.get("medicine", self.wisdom)
-        self.nature: int = skills.get("nature", self.wisdom)
-        self.occultism: int = skills.get("occultism", self.intelligence)
-        self.performance: int = skills.get("performance", self.charisma)
-        self.religion: int = skills.get("religion", self.wisdom)
-        self.society: int = skills.get("society", self.intelligence)
-        self.stealth: int = skills.get("stealth", self.dexterity)
-        self.survival: int = skills.get("survival", self.wisdom)
-        self.thievery: int = skills.get("thievery", self.dexterity)
+        self.speed: int = creature.speed
+        self.armor_class: int = creature.armor_class
+        self.spell_attack_bonus: int = creature.spell_attack_bonus
+        self.spell_dc: int = creature.spell_dc
 
         # Saving Throws
-        saves = creature_dict["defenses"]["saves"]
-        self.fortitude: int = saves["fortitude"]
-        self.reflex: int = saves["reflex"]
-        self.will: int = saves["will"]
+        self.fortitude: int = creature.fortitude
+        self.reflex: int = creature.reflex
+        self.will: int = creature.will
 
         # Actions
-        self.attacks: list[Attack] = []
-        try:
-            attack_dicts = creature_dict["actions"]["attacks"]
-        except KeyError:
-            self.attacks = None
-        else:
-            for attack_dict in attack_dicts:
-                try:
-                    attack = Attack(attack_dict)
-                    self.attacks.append(attack)
-                except KeyError as e:
-                    print(f"Invalid attack: {attack_dict}, {e}")
-                    continue
-
-        self.spells: list[Spell] = []
-        try:
-            spell_dicts = creature_dict["actions"]["spells"]
-        except KeyError:
-            self.spells = None
-        else:
-            for spell_dict in spell_dicts:
-                spell = Spell(spell_dict, self.spell_attack_bonus)
-                self.spells.append(spell)
-
-        try:
-            self.heals: int = creature_dict["actions"].get("heals")
-        except KeyError:
-            self.heals: int = None
-
-        try:
-            self.shield_value: int = creature_dict["actions"].get("shield")
-        except KeyError:
-            self.shield_value: int = None
-
-        self.actions: list[Action] = []
-        if "actions" in creature_dict.keys():
-            if self.attacks:
-                self.actions.extend(self.attacks)
-            if self.spells:
-                self.actions.extend(self.spells)
-            if self.heals:
-                heal = Heal(self.heals)
-                self.actions.append(heal)
-            if self.shield_value:
-                raise_shield = Action(name="Raise Shield", weight=10)
-                self.actions.append(raise_shield)
-
-        self.sneak_attack = False
+        self.attacks: list[Attack] = creature.attacks
+        self.spells: list[Spell] = creature.new_spells()
+        self.heals: int = creature.heals
+        self.shield_value: int = creature.shield_value
+        self.actions: list[Action] = creature.new_actions(self.spells)
+        self.sneak_attack: bool = creature.sneak_attack
 
         # Encounter Data
         self.encounter = None
@@ -194,15 +185,48 @@ class Creature:
 
         # Simulation Data
         self.simulation = simulation
+        self.collect_log: bool = simulation.collect_log if simulation else True
+        self.log_index: int = 0
+        self.rng: random.Random = simulation.rng if simulation else random
 
         # Map Data
         self.position_x: int = 0
         self.position_y: int = 0
 
+        # Action weights this turn, valid while the encounter's version holds
+        self._weights: dict = {}
+        self._weights_version: int = -1
+
     def __repr__(self) -> str:
         """Returns the creature's name"""
         return self.name
 
+    def __getattr__(self, name: str) -> int:
+        """Looks up attribute and skill modifiers on `skills`.
+
+        Only called when `name` is not one of the creature's own attributes,
+        so combat stats are not slowed down.
+
+        Args:
+            name (str): The name of the attribute being looked up.
+
+        Raises:
+            AttributeError: If `name` is not an attribute or skill modifier.
+
+        Returns:
+            int: The modifier called `name`.
+        """
+        if name in Skills.__slots__:
+            return getattr(self.skills, name)
+        raise AttributeError(
+            f"'{type(self).__name__}' object has no attribute '{name}'"
+        )
+
+    @property
+    def skills(self) -> Skills:
+        """The creature's attribute and skill modifiers."""
+        return self.template.skills
+
     # Public Methods
 
     def join_encounter(self, encounter) -> None:
@@ -227,13 +251,16 @@ class Creature:
         if self.is_dead:
             return
 
-        self.log(f"{self}'s turn:")
-        self.log(f"{self}'s current hit points: {self.current_hit_points}")
+        if self.collect_log:
+            self.log(Event.TURN_START, self)
+            self.log(Event.CURRENT_HIT_POINTS, self, self.current_hit_points)
         if not self.actions:
-            self.log(f"{self} has no valid actions. Skipping turn")
+            if self.collect_log:
+                self.log(Event.NO_ACTIONS, self)
             return
         self.num_actions = 3
         self.multi_attack = 0
+        self.clear_weights()
 
         if self.shield_raised:
             self.shield_raised = False
@@ -245,6 +272,15 @@ class Creature:
             else:
                 break
 
+    def clear_weights(self) -> None:
+        """Forgets the action weights cached for the creature's turn.
+
+        Called at the start of each turn, and whenever something the weights
+        depend on changes outside of the encounter's version, such as a spell
+        slot being spent.
+        """
+        self._weights.clear()
+
     def calculate_weight(
         self, attacker: Self, attack: Action, consider_distance: bool
     ) -> int:
@@ -290,13 +326,19 @@ class Creature:
     def pick_target(self, attack: Action) -> Self:
         """Picks the best target for the given attack.
 
-        Creates a list of creatures on the opposite side. If there are already
-        targets in range, it replaces the list with a list of only targets that
-        are in range. If not, it considers all possible targets. For each
-        target in the list, it calculates the target's weight, checks if it is
-        greater than the currently highest weight seen, and replaces the
-        current best target with that target if so. After checking all targets,
-        it returns the best target.
+        If there are already targets in range, only they are considered,
+        without regard to distance. If not, every possible target is
+        considered, losing weight for its distance. The target with the
+        highest weight is picked, with ties going to the first in the
+        opposing team's order.
+
+        Targets in a short range are few, so they are found with the
+        encounter's spatial grid and weighed one by one. In a longer range,
+        the opposing team's score heap gives the most damaged targets first,
+        and the search stops once no target left could beat the best so far.
+        Out of range, the grid gives the targets nearest first, and the
+        search stops once anything further could not beat the best so far
+        even with the team's highest score.
 
         Args:
             attack (Action): The attack being used.
@@ -304,132 +346,107 @@ class Creature:
         Returns:
             Self: The most valuable target
         """
-        targets = []
-        consider_distance = True
-        attack_range = attack.range
-        targets = (
-            self.encounter.enemies
-            if self.team == 1
-            else self.encounter.players
-        )
-
-        targets_in_range = []
-        for target in targets:
-            if self.calculate_distance(target) <= attack_range:
-                targets_in_range.append(target)
+        if self.team == 1:
+            opponent_team, targets = 2, self.encounter.enemies
+        else:
+            opponent_team, targets = 1, self.encounter.players
+        grid = self.encounter.grid
+        bound = self._weight_bound(targets, attack)
 
         # If we're already in range of targets, only consider them
-        if targets_in_range:
-            targets = targets_in_range
-            consider_distance = False
-
-        best_target = targets[0]
-        best_weight = best_target.calculate_weight(
-            self, attack, consider_distance
-        )
-
-        for target in targets[1:]:
-            target_weight = target.calculate_weight(
-                self, attack, consider_distance
+        if attack.range <= 5 * grid.cell_size:
+            targets_in_range = grid.within(self, opponent_team, attack.range)
+            if targets_in_range:
+                return self._heaviest(targets_in_range, attack)
+        elif grid.any_within(self, opponent_team, attack.range):
+            return targets.best(
+                lambda target: (
+                    target.calculate_weight(self, attack, False)
+                    if self.calculate_distance(target) <= attack.range
+                    else None
+                ),
+                bound,
             )
-            if target_weight > best_weight:
-                best_target = target
-                best_weight = best_target.calculate_weight(
-                    self, attack, consider_distance
-                )
 
-        return best_target
+        # Every target beats this key, so with all weights -inf the first
+        # target in order is picked, like a scan starting with it
+        best, best_key = None, (-math.inf, -math.inf)
+        max_score = targets.max_score()
+        for found, beyond in grid.rings(self, opponent_team):
+            for target in found:
+                weight = target.calculate_weight(self, attack, True)
+                key = (weight, -targets.index(target))
+                if key > best_key:
+                    best, best_key = target, key
+            # Anything further loses at least `beyond / 5` for distance
+            if bound(max_score - beyond / 5) < best_key[0]:
+                break
+
+        return best
 
     def move_to(self, target: Self, action_range: int) -> None:
         """Finds the best route to `target` and moves towards it.
 
         Repeatedly uses move actions until either `target` is in range or
-        move actions are exhausted. Implemented with an outer loop with each
-        iteration representing one Stride action and an inner loop with each
-        iteration representing one square of movement.
-
-        The outer loop executes as long as the creature has actions remaining.
-        It resets the speed per turn and number of diagonal moves taken,
-        calculates the distance to `target`, returns if it is in range, and
-        takes steps toward `target` until speed runs out if not. Then it
-        deducts an action and starts again.
-
-        The inner loop executes as long as `target` is still out of range and
-        there is movement speed left to use in this action. It calculates if
-        the creature should move diagonally, horizontally, or vertically then
-        does so, deducting the amount of speed used then resetting. If the
-        creature does not need to move horizontally or vertically, then the
-        creature is in range so an action is deducted and the move is complete.
+        move actions are exhausted. Each iteration of the loop is one Stride
+        action.
+
+        Each Stride calculates the distance to `target` and returns if it is
+        in range. If not, it moves toward `target` until either speed runs
+        out or the creature is adjacent to `target`. Then it deducts an
+        action, and the move is complete if the creature reached `target`
+        with speed to spare.
+
+        On an open plane, `stride` works out where the creature's speed
+        takes it: diagonally toward `target` while it is more than one square
+        away along both axes, then straight along x and then y. On a map,
+        the creature follows the cheapest path toward `target`'s square
+        instead, going around obstacles and paying extra for difficult terrain.
 
         Args:
             target (Self): The target to move toward
             action_range (int): The range of the action being used
         """
-        # Outer loop for each Stride action (move up to speed)
+        battle_map = self.encounter.battle_map if self.encounter else None
+        start = (self.position_x, self.position_y)
         while self.num_actions > 0:
-            speed_remaining = self.speed
-            diagonal_moves = 1
             distance = self.calculate_distance(target)
-
             if distance <= action_range:
-                return
+                break
 
-            self.log(f"{self} Strides toward {target}, {distance} feet away.")
-
-            # Inner loop for the logic of each individual step (one square)
-            while distance > action_range and speed_remaining > 0:
-                out_of_range_x = abs(self.position_x - target.position_x) > 1
-                out_of_range_y = abs(self.position_y - target.position_y) > 1
-                can_travel_diagonally = True
-                if diagonal_moves % 2 == 0 and speed_remaining <= 10:
-                    can_travel_diagonally = False
-
-                # Both x and y are out of range, step diagonally
-                if out_of_range_x and out_of_range_y and can_travel_diagonally:
-                    self._step_x(target)
-                    self._step_y(target)
-                    # Every other diagonal step is five feet of extra movement
-                    if diagonal_moves % 2 == 0:
-                        speed_remaining -= 5
-                    diagonal_moves += 1
-                elif out_of_range_x:
-                    self._step_x(target)
-                elif out_of_range_y:
-                    self._step_y(target)
-                # In range, done moving
-                else:
-                    self.num_actions -= 1
-                    return
-                speed_remaining -= 5
+            if self.collect_log:
+                self.log(Event.STRIDE, self, target, distance)
+
+            if battle_map is None:
+                speed_remaining = self._stride(target)
+            else:
+                speed_remaining = self._stride_on_map(target, battle_map)
 
-            # At the end of each Stride, reset speed and deduct an action
             self.num_actions -= 1
+            if speed_remaining > 0:
+                break
+
+        if self.encounter and (self.position_x, self.position_y) != start:
+            self.encounter.grid.move(self)
+            self.encounter.version += 1
 
     def calculate_distance(self, target: Self) -> int:
         """Calculates and returns the distance in feet to `target`.
 
-        Uses math.dist to find the distance to `target` in co-ordinates, then
-        multiplies by five to get the distance in feet, and rounds to the
-        nearest multiple of five since distance is still considered by each
-        5-foot square grid tile.
+        Distance follows the PF2E grid rules, where every second diagonal
+        square counts as 10 feet.
 
         Args:
             target (Self): The creature whose distance is being found.
 
         Returns:
-            int: The distance in feet, rounded to five, to `target`.
+            int: The distance in feet to `target`.
         """
-        base_distance = math.dist(
-            [target.position_x, target.position_y],
-            [self.position_x, self.position_y],
+        return grid_distance(
+            target.position_x - self.position_x,
+            target.position_y - self.position_y,
         )
 
-        distance_in_feet = 5 * base_distance
-
-        rounded_distance = 5 * round(distance_in_feet / 5)
-
-        return rounded_distance
-
     def take_damage(self, damage: int, damage_type: str) -> None:
         """Subtracts `damage` from the creature's HP.
 
@@ -444,20 +461,24 @@ class Creature:
             damage (int): The damage the creature is to take.
             damage_type (str): The type of damage being dealt, ex. fire
         """
-        self.current_hit_points -= damage
-
         # Non-undead targets shouldn't be chosen for vitality attacks, but just
         # in case, vitality attacks cannot damage them
         if damage_type == "vitality":
             undead = hasattr(self, "traits") and "undead" in self.traits
             if not undead:
-                self.log(f"{self} is not undead, vitality damage invalid")
+                if self.collect_log:
+                    self.log(Event.VITALITY_INVALID, self)
                 return
 
+        self.current_hit_points -= damage
+        if self.encounter:
+            self.encounter.version += 1
+            self.encounter.teams[self.team].update(self)
+
         if self.current_hit_points <= 0:
             self._die()
-        else:
-            self.log(f"{self} has {self.current_hit_points} HP remaining!")
+        elif self.collect_log:
+            self.log(Event.HIT_POINTS_REMAINING, self, self.current_hit_points)
 
     def spell_save(
         self,
@@ -494,21 +515,21 @@ class Creature:
             case _:
                 raise ValueError(f"Invalid save type: {spell.save}")
 
-        roll = d20.roll()
+        roll = d20.roll(self.rng)
         saving_throw = roll + save_bonus
-        save_display = f"{roll} + {save_bonus}"
-        self.log(
-            f"{self} rolled a {saving_throw} ({save_display}) {spell.save} save against {spell} (DC {attacker.spell_dc})!"  # noqa: E501
-        )
+        if self.collect_log:
+            self.log(
+                Event.SAVE_ROLL,
+                self,
+                saving_throw,
+                roll,
+                save_bonus,
+                spell.save,
+                spell,
+                attacker.spell_dc,
+            )
 
         damage = sum(damage_rolls) + damage_bonus
-        damage_display = f"{damage_rolls[0]}"
-
-        for damage_roll in damage_rolls[1:]:
-            damage_display += f" + {damage_roll}"
-
-        if damage_bonus:
-            damage_display += f" + {damage_bonus}"
 
         degree_of_success = calculate_dos(
             roll, saving_throw, attacker.spell_dc
@@ -516,25 +537,21 @@ class Creature:
 
         match degree_of_success:
             case Degree.CRITICAL_SUCCESS:
-                self.log(f"{self} critically succeeded. No damage taken!")
+                if self.collect_log:
+                    self.log(Event.SAVE_CRITICAL_SUCCESS, self)
                 return
             case Degree.SUCCESS:
                 damage_taken = damage // 2
-                damage_display += " halved"
-                self.log(
-                    f"{self} succeeded and takes {damage_taken} ({damage_display}) damage"  # noqa: E501
-                )
+                event = Event.SAVE_SUCCESS
             case Degree.FAILURE:
                 damage_taken = damage
-                self.log(
-                    f"{self} failed and takes {damage_taken} ({damage_display}) damage"  # noqa: E501
-                )
+                event = Event.SAVE_FAILURE
             case Degree.CRITICAL_FAILURE:
                 damage_taken = damage * 2
-                damage_display += " doubled"
-                self.log(
-                    f"{self} critically failed and takes {damage_taken} ({damage_display}) damage"  # noqa: E501
-                )
+                event = Event.SAVE_CRITICAL_FAILURE
+
+        if self.collect_log:
+            self.log(event, self, damage_taken, damage_bonus, *damage_rolls)
 
         self.take_damage(damage_taken, spell.damage_type)
 
@@ -547,21 +564,24 @@ class Creature:
         self.current_hit_points += amount
         if self.current_hit_points > self.max_hit_points:
             self.current_hit_points = self.max_hit_points
+        if self.encounter:
+            self.encounter.version += 1
+            self.encounter.teams[self.team].update(self)
 
-        self.log(f"{self} is now at {self.current_hit_points} hit points!")
+        if self.collect_log:
+            self.log(Event.HEALED, self, self.current_hit_points)
 
-    def log(self, message: str | Any) -> None:
-        """Adds `message` to the simulation log, or prints it to the console.
+    def log(self, event: Event, *args: Any) -> None:
+        """Adds an event to the simulation log, or prints it to the console.
 
         Args:
-            message (str): The message to be printed.
+            event (Event): The kind of event.
+            *args (Any): The event's arguments, such as creatures and rolls.
         """
-        if type(message) is not str:
-            message = str(message)
         if self.simulation:
-            self.simulation.log(message)
+            self.simulation.log(event, *args)
         else:
-            print(message)
+            print(render_event(event, args))
 
     # Private Methods
 
@@ -569,30 +589,25 @@ class Creature:
         # Don't know if a creature is sneaking at the start of the encounter,
         # so assume creatures with higher stealth will typically sneak and
         # roll stealth for initiative
-        if self.stealth > self.perception:
-            self.initiative = d20.roll() + self.stealth
+        stealth = self.skills.stealth
+        if stealth > self.perception:
+            self.initiative = d20.roll(self.rng) + stealth
         else:
-            self.initiative = d20.roll() + self.perception
+            self.initiative = d20.roll(self.rng) + self.perception
 
     def _perform_action(self) -> None:
         in_melee = self._check_adjacent_creatures()
         best_action = self.actions[0]
-        best_weight = best_action.calculate_weight(
-            self.multi_attack, self.num_actions, in_melee, self
-        )
+        best_weight = self._action_weight(best_action, in_melee)
 
         # Just a simple linear search because number of actions should never
         # get too high (typically 3-5, 10-15 at most w/ spells)
         if len(self.actions) > 1:
             for action in self.actions[1:]:
-                action_weight = action.calculate_weight(
-                    self.multi_attack, self.num_actions, in_melee, self
-                )
+                action_weight = self._action_weight(action, in_melee)
                 if action_weight > best_weight:
                     best_action = action
-                    best_weight = best_action.calculate_weight(
-                        self.multi_attack, self.num_actions, in_melee, self
-                    )
+                    best_weight = self._action_weight(best_action, in_melee)
 
         if isinstance(best_action, Attack):
             target = self.pick_target(best_action)
@@ -604,39 +619,118 @@ class Creature:
         elif isinstance(best_action, Spell) or isinstance(best_action, Heal):
             best_action.cast(self)
         elif best_action.name.lower() == "raise shield":
-            self.log(f"{self} raises their shield!")
+            if self.collect_log:
+                self.log(Event.RAISE_SHIELD, self)
             self.armor_class += self.shield_value
             self.shield_raised = True
 
         self.num_actions -= best_action.cost
 
-    def _check_adjacent_creatures(self):
-        opponents = (
-            self.encounter.enemies
-            if self.team == 1
-            else self.encounter.players
+    def _action_weight(self, action: Action, in_melee: bool) -> float:
+        # Weights only change with the turn's state in the key, or with a
+        # change to the encounter, which bumps its version
+        version = self.encounter.version
+        if version != self._weights_version:
+            self._weights.clear()
+            self._weights_version = version
+
+        key = (action, self.multi_attack, self.num_actions, in_melee)
+        weight = self._weights.get(key)
+        if weight is not None:
+            return weight
+
+        weight = action.calculate_weight(
+            self.multi_attack, self.num_actions, in_melee, self
         )
+        self._weights[key] = weight
+        return weight
 
-        for opponent in opponents:
-            if self.calculate_distance(opponent) <= 5:
-                return True
+    def _heaviest(self, targets: list, attack: Action) -> Self:
+        # The first of `targets` with the highest weight
+        best_target = targets[0]
+        best_weight = best_target.calculate_weight(self, attack, False)
+        for target in targets[1:]:
+            target_weight = target.calculate_weight(self, attack, False)
+            if target_weight > best_weight:
+                best_target = target
+                best_weight = target_weight
 
-        return False
+        return best_target
 
-    def _step_x(self, target):
-        if self.position_x < target.position_x:
-            self.position_x += 1
-        else:
-            self.position_x -= 1
+    def _weight_bound(self, targets, attack: Action):
+        # The highest weight a target could have given its damage taken
+        # times level, or that less its distance, from `calculate_weight`.
+        # Halving a negative weight for resistance raises it. Immune targets
+        # are never weighed above -inf, since their damage is invalid.
+        resistant = targets.num_resistant.get(attack.damage_type, 0) > 0
+        weak = targets.num_weak.get(attack.damage_type, 0) > 0
+
+        def bound(weight: float) -> float:
+            highest = weight
+            if resistant and weight < 0:
+                highest = weight / 2
+            if weak and weight > 0:
+                highest = weight * 2
+            return highest
+
+        return bound
 
-    def _step_y(self, target):
-        if self.position_y < target.position_y:
-            self.position_y += 1
+    def _check_adjacent_creatures(self):
+        opponent_team = 2 if self.team == 1 else 1
+        return self.encounter.grid.any_within(self, opponent_team, 5)
+
+    def _stride(self, target: Self) -> int:
+        offset_x = target.position_x - self.position_x
+        offset_y = target.position_y - self.position_y
+        diagonals, straight_x, straight_y, speed_remaining = stride(
+            abs(offset_x), abs(offset_y), self.speed
+        )
+        if offset_x < 0:
+            self.position_x -= diagonals + straight_x
+        else:
+            self.position_x += diagonals + straight_x
+        if offset_y < 0:
+            self.position_y -= diagonals + straight_y
         else:
-            self.position_y -= 1
+            self.position_y += diagonals + straight_y
+
+        return speed_remaining
+
+    def _stride_on_map(self, target: Self, battle_map: BattleMap) -> int:
+        # Steps along the cheapest path, paying for each step as it goes,
+        # until adjacent to the target or unable to afford the next step
+        steps = battle_map.next_steps(
+            (self.position_x, self.position_y),
+            (target.position_x, target.position_y),
+        )
+        speed_remaining = self.speed
+        diagonal_moves = 1
+        while (
+            abs(self.position_x - target.position_x) > 1
+            or abs(self.position_y - target.position_y) > 1
+        ):
+            next_step = steps.get((self.position_x, self.position_y))
+            if next_step is None:
+                break
+
+            next_x, next_y = next_step
+            diagonal = next_x != self.position_x and next_y != self.position_y
+            # Every other diagonal step is five feet of extra movement
+            cost = 10 if diagonal and diagonal_moves % 2 == 0 else 5
+            if next_step in battle_map.difficult:
+                cost += 5
+            if cost > speed_remaining:
+                return 0
+
+            self.position_x, self.position_y = next_x, next_y
+            speed_remaining -= cost
+            diagonal_moves += diagonal
+
+        return speed_remaining
 
     def _die(self) -> None:
-        self.log(f"{self} has died!")
+        if self.collect_log:
+            self.log(Event.DIED, self)
         self.is_dead = True
         if self.encounter:
             self.encounter.remove_creature(self)
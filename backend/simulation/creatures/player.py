@@ -4,6 +4,7 @@ import math
 from typing import Any
 
 from .creature import Creature
+from .template import PlayerTemplate
 
 
 class Player(Creature):
@@ -15,18 +16,23 @@ class Player(Creature):
         class_: The character's class, ex. fighter or wizard
     """
 
+    __slots__ = ("ancestry", "heritage", "class_")
+
+    template_class: type = PlayerTemplate
+
     # Built-in Methods
 
     def __init__(
         self,
-        player: dict[str, Any],
+        player: dict[str, Any] | PlayerTemplate,
         simulation=None,
         health_multiplier: float = 1.0,
     ):
         """Initializes the player based on the passed in dictionary.
 
         Args:
-            player (dict[str, Any]): The data used to build the player
+            player (dict[str, Any] | PlayerTemplate): The data used to build
+                the player, or a template compiled from it.
             simulation (Simulation, optional): The simulation the creature is
                 in. Defaults to None.
             health_multiplier (float, optional): A multiplier applied to the
@@ -38,11 +44,9 @@ class Player(Creature):
             self.current_hit_points * health_multiplier
         )
         self.team = 1
-        self.ancestry: str = player["ancestry"]
-        self.heritage: str = player["heritage"]
-        self.class_: str = player["class"]
-        if self.class_.lower() == "rogue":
-            self.sneak_attack = True
+        self.ancestry: str = self.template.ancestry
+        self.heritage: str = self.template.heritage
+        self.class_: str = self.template.class_
 
     # Public Methods
 
@@ -0,0 +1,80 @@
+"""Defines the Skills class, holding a creature's non-combat modifiers."""
+
+from typing import Any
+
+# The attribute each skill defaults to if the creature's data leaves it out
+SKILL_ATTRIBUTES: dict[str, str] = {
+    "acrobatics": "dexterity",
+    "arcana": "intelligence",
+    "athletics": "strength",
+    "crafting": "intelligence",
+    "deception": "charisma",
+    "diplomacy": "charisma",
+    "intimidation": "charisma",
+    "lore": "intelligence",
+    "medicine": "wisdom",
+    "nature": "wisdom",
+    "occultism": "intelligence",
+    "performance": "charisma",
+    "religion": "wisdom",
+    "society": "intelligence",
+    "stealth": "dexterity",
+    "survival": "wisdom",
+    "thievery": "dexterity",
+}
+
+
+class Skills:
+    """A creature's attribute modifiers and skill modifiers.
+
+    The simulation rarely needs these outside of rolling initiative, so they
+    are kept apart from the creature's combat stats, built only when first
+    needed, and shared by every creature built from the same template.
+
+    Attributes:
+        strength, constitution, dexterity, intelligence, wisdom, charisma:
+            The six core PF2E attribute modifiers.
+        acrobatics, arcana, athletics, crafting, deception, diplomacy,
+        intimidation, lore, medicine, nature, occultism, performance,
+        religion, society, stealth, survival, thievery: The creature's skill
+            modifiers. If a skill is not explicitly defined, it defaults to
+            the modifier of its governing attribute.
+    """
+
+    __slots__ = (
+        "strength",
+        "constitution",
+        "dexterity",
+        "intelligence",
+        "wisdom",
+        "charisma",
+        *SKILL_ATTRIBUTES,
+    )
+
+    def __init__(
+        self,
+        attributes: dict[str, int],
+        skills: dict[str, Any],
+        replace_none: bool = False,
+    ):
+        """Initializes the modifiers from the creature's data.
+
+        Args:
+            attributes (dict[str, int]): The creature's attribute modifiers.
+            skills (dict[str, Any]): The creature's skill modifiers.
+            replace_none (bool, optional): Whether skills other than Lore
+                listed with a value of None should also default to their
+                governing attribute. Defaults to False.
+        """
+        self.strength: int = attributes["strength"]
+        self.constitution: int = attributes["constitution"]
+        self.dexterity: int = attributes["dexterity"]
+        self.intelligence: int = attributes["intelligence"]
+        self.wisdom: int = attributes["wisdom"]
+        self.charisma: int = attributes["charisma"]
+
+        for skill, attribute in SKILL_ATTRIBUTES.items():
+            value = skills.get(skill, attributes[attribute])
+            if value is None and replace_none and skill != "lore":
+                value = attributes[attribute]
+            setattr(self, skill, value)
@@ -0,0 +1,235 @@
+"""Defines creature templates, compiled once and shared by many simulations.
+
+Building a creature from its dictionary parses damage strings, precomputes
+action weights, and resolves every skill. None of that changes from one run
+of a simulation to the next, so templates do the work once per request. Each
+run then only creates the state that can change during an encounter, such as
+hit points, position, spell slots, and shield state.
+"""
+
+import copy
+from typing import Any
+
+from ..mechanics.actions import Action, Attack, Spell
+from ..mechanics.heal import Heal
+from .skills import Skills
+
+
+class CreatureTemplate:
+    """The compiled, read-only data of a creature.
+
+    Attributes:
+        name, level, perception, max_hit_points, speed, armor_class,
+        spell_attack_bonus, spell_dc, fortitude, reflex, will, heals,
+        shield_value, sneak_attack: The creature's combat stats, copied to
+            each creature built from the template. See `Creature`.
+        attacks: The creature's Attack objects, shared by every run since
+            attacks have no state of their own.
+        spells: The creature's Spell objects, copied for each run since
+            spells track their remaining slots.
+        heal: The creature's Heal action, copied for each run, if any.
+        raise_shield: The creature's Raise Shield action, if any.
+        has_actions: Whether the creature's data listed any actions.
+    """
+
+    def __init__(self, creature_dict: dict[str, Any]):
+        """Compiles the template from the values in `creature_dict`.
+
+        Args:
+            creature_dict (dict[str, Any]): Data used to build the creature.
+        """
+        # Basic Stats
+        self.name: str = creature_dict["name"]
+        self.level: int = creature_dict["level"]
+        self.perception: int = creature_dict["perception"]
+        self.max_hit_points: int = creature_dict["max_hit_points"]
+        self.speed: int = creature_dict["speed"]
+        self.armor_class: int = creature_dict["defenses"]["armor_class"]
+        self.spell_attack_bonus: int = creature_dict.get("spell_attack_bonus")
+        self.spell_dc: int = creature_dict.get("spell_dc")
+
+        # Saving Throws
+        saves = creature_dict["defenses"]["saves"]
+        self.fortitude: int = saves["fortitude"]
+        self.reflex: int = saves["reflex"]
+        self.will: int = saves["will"]
+
+        # Skills are only compiled if they are needed
+        self._attribute_dict: dict[str, int] = creature_dict[
+            "attribute_modifiers"
+        ]
+        self._skill_dict: dict[str, Any] = creature_dict["skills"]
+        self._skills: Skills = None
+
+        # Actions
+        self.attacks: list[Attack] = []
+        try:
+            attack_dicts = creature_dict["actions"]["attacks"]
+        except KeyError:
+            self.attacks = None
+        else:
+            for attack_dict in attack_dicts:
+                try:
+                    attack = Attack(attack_dict)
+                    self.attacks.append(attack)
+                except KeyError as e:
+                    print(f"Invalid attack: {attack_dict}, {e}")
+                    continue
+
+        self.spells: list[Spell] = []
+        try:
+            spell_dicts = creature_dict["actions"]["spells"]
+        except KeyError:
+            self.spells = None
+        else:
+            for spell_dict in spell_dicts:
+                spell = Spell(spell_dict, self.spell_attack_bonus)
+                self.spells.append(spell)
+
+        try:
+            self.heals: int = creature_dict["actions"].get("heals")
+        except KeyError:
+            self.heals: int = None
+
+        try:
+            self.shield_value: int = creature_dict["actions"].get("shield")
+        except KeyError:
+            self.shield_value: int = None
+
+        self.has_actions: bool = "actions" in creature_dict.keys()
+        self.heal: Heal = Heal(self.heals) if self.heals else None
+        self.raise_shield: Action = None
+        if self.shield_value:
+            self.raise_shield = Action(name="Raise Shield", weight=10)
+
+        self.sneak_attack: bool = False
+
+    def __repr__(self) -> str:
+        """Returns the name of the creature the template builds."""
+        return self.name
+
+    @property
+    def skills(self) -> Skills:
+        """The creature's attribute and skill modifiers, built on first use."""
+        if self._skills is None:
+            self._skills = self._build_skills()
+        return self._skills
+
+    def new_spells(self) -> list[Spell]:
+        """Returns fresh copies of the template's spells for a single run.
+
+        Returns:
+            list[Spell]: The copied spells, with every slot available, or None
+                if the creature has no spells.
+        """
+        if self.spells is None:
+            return None
+        return [copy.copy(spell) for spell in self.spells]
+
+    def new_actions(self, spells: list[Spell]) -> list[Action]:
+        """Returns the list of actions available to a creature for one run.
+
+        Args:
+            spells (list[Spell]): The run's copies of the template's spells.
+
+        Returns:
+            list[Action]: The creature's attacks, spells, heal, and Raise
+                Shield actions, in that order.
+        """
+        actions = []
+        if self.has_actions:
+            if self.attacks:
+                actions.extend(self.attacks)
+            if spells:
+                actions.extend(spells)
+            if self.heal:
+                actions.append(copy.copy(self.heal))
+            if self.raise_shield:
+                actions.append(self.raise_shield)
+
+        return actions
+
+    def _build_skills(self) -> Skills:
+        return Skills(self._attribute_dict, self._skill_dict)
+
+
+class PlayerTemplate(CreatureTemplate):
+    """The compiled, read-only data of a player character.
+
+    Attributes:
+        ancestry, heritage, class_: See `Player`.
+    """
+
+    def __init__(self, player: dict[str, Any]):
+        """Compiles the template from the values in `player`.
+
+        Args:
+            player (dict[str, Any]): The data used to build the player.
+        """
+        super().__init__(player)
+        self.ancestry: str = player["ancestry"]
+        self.heritage: str = player["heritage"]
+        self.class_: str = player["class"]
+        if self.class_.lower() == "rogue":
+            self.sneak_attack = True
+
+
+class EnemyTemplate(CreatureTemplate):
+    """The compiled, read-only data of an enemy.
+
+    Attributes:
+        traits, immunities, weaknesses, resistances: See `Enemy`.
+    """
+
+    def __init__(self, enemy: dict[str, Any]):
+        """Compiles the template from the values in `enemy`.
+
+        Args:
+            enemy (dict[str, Any]): The data used to build the enemy.
+        """
+        super().__init__(enemy)
+        self.traits: list[str] = enemy["traits"]
+        self.immunities: list[str] = enemy["immunities"]
+        self.weaknesses: dict[str, int] = enemy.get("weaknesses", {})
+        self.resistances: dict[str, int] = enemy.get("resistances", {})
+
+        if enemy["actions"]["sneak_attack"]:
+            self.sneak_attack = True
+
+    def _build_skills(self) -> Skills:
+        # Any skill not specified in enemy data is set to none
+        # None skills need to be set to correct base amount: the base attribute
+        return Skills(self._attribute_dict, self._skill_dict, True)
+
+
+def compile_templates(
+    creature_dicts: list[dict[str, Any] | CreatureTemplate],
+    template_class: type,
+) -> list[CreatureTemplate]:
+    """Compiles a template for each dictionary in `creature_dicts`.
+
+    The same dictionary is often repeated, such as when several copies of an
+    enemy are fought, so each distinct dictionary is only compiled once.
+    Templates that have already been compiled are used as they are.
+
+    Args:
+        creature_dicts (list[dict[str, Any] | CreatureTemplate]): The data of
+            each creature, or its compiled template.
+        template_class (type): The CreatureTemplate subclass to compile.
+
+    Returns:
+        list[CreatureTemplate]: One template per dictionary, in order.
+    """
+    compiled = {}
+    templates = []
+    for creature_dict in creature_dicts:
+        if isinstance(creature_dict, CreatureTemplate):
+            templates.append(creature_dict)
+            continue
+        template = compiled.get(id(creature_dict))
+        if template is None:
+            template = template_class(creature_dict)
+            compiled[id(creature_dict)] = template
+        templates.append(template)
+
+    return templates
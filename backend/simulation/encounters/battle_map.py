@@ -0,0 +1,332 @@
+"""Defines the BattleMap class, the terrain an encounter is fought on."""
+
+import heapq
+import json
+from array import array
+from functools import lru_cache
+from typing import Any
+
+# The eight squares around a square, straight neighbors first
+NEIGHBORS = (
+    (1, 0),
+    (-1, 0),
+    (0, 1),
+    (0, -1),
+    (1, 1),
+    (1, -1),
+    (-1, 1),
+    (-1, -1),
+)
+
+
+class BattleMap:
+    """A rectangular map of 5-foot squares with obstacles and terrain.
+
+    Squares are (x, y) pairs from (0, 0) up to but not including
+    (width, height). Creatures cannot enter blocked squares, and entering a
+    square of difficult terrain costs an extra 5 feet of movement. Players
+    and enemies start on their side's spawn squares, in order.
+
+    Movement toward a square follows the cheapest path from the mover to
+    that square, found with an A* search that stops as soon as it reaches
+    the square's neighbors. Its estimates also measure from two landmark
+    squares, worked out once per map, so on winding maps it follows the
+    way through instead of filling the map. Every path found is kept as
+    next steps toward its square, so later moves toward the same square
+    from anywhere along it, in this or any other simulation on this map,
+    skip the search.
+
+    Attributes:
+        width: The number of squares along x.
+        height: The number of squares along y.
+        blocked: The squares creatures cannot enter.
+        difficult: The squares of difficult terrain.
+        player_spawns: The squares players start on.
+        enemy_spawns: The squares enemies start on.
+        max_path_cells: The most path squares kept at once, over all
+            targets.
+    """
+
+    def __init__(self, map_dict: dict[str, Any], max_path_cells: int = 50000):
+        """Initializes the map from a dictionary.
+
+        Args:
+            map_dict (dict[str, Any]): The map's width, height, blocked and
+                difficult squares, and player and enemy spawn squares.
+            max_path_cells (int, optional): The most path squares kept at
+                once, dropping the oldest target's paths beyond that.
+                Defaults to 50000.
+
+        Raises:
+            ValueError: If a square is off the map, a spawn square is
+                blocked, or the spawn squares cannot all reach each other.
+        """
+        self.width: int = map_dict["width"]
+        self.height: int = map_dict["height"]
+        self.blocked: frozenset[tuple[int, int]] = frozenset(
+            map(tuple, map_dict.get("blocked", ()))
+        )
+        self.difficult: frozenset[tuple[int, int]] = frozenset(
+            map(tuple, map_dict.get("difficult", ()))
+        )
+        self.player_spawns: list[tuple[int, int]] = [
+            tuple(cell) for cell in map_dict["player_spawns"]
+        ]
+        self.enemy_spawns: list[tuple[int, int]] = [
+            tuple(cell) for cell in map_dict["enemy_spawns"]
+        ]
+        self.max_path_cells: int = max_path_cells
+        self._paths: dict[tuple[int, int], dict] = {}
+        self._path_cells: int = 0
+        self._landmark_distances: list[array] = None
+
+        cells = [
+            *self.blocked,
+            *self.difficult,
+            *self.player_spawns,
+            *self.enemy_spawns,
+        ]
+        for x, y in cells:
+            if not (0 <= x < self.width and 0 <= y < self.height):
+                raise ValueError(f"Square ({x}, {y}) is off the map")
+
+        # The cost of stepping straight into each square, or 0 if blocked
+        self._entry_costs: bytearray = bytearray(
+            [10] * (self.width * self.height)
+        )
+        for x, y in self.difficult:
+            self._entry_costs[y * self.width + x] = 20
+        for x, y in self.blocked:
+            self._entry_costs[y * self.width + x] = 0
+
+        spawns = self.player_spawns + self.enemy_spawns
+        if any(cell in self.blocked for cell in spawns):
+            raise ValueError("Spawn squares cannot be blocked")
+        if spawns:
+            reachable = self._reachable(spawns[0])
+            if any(y * self.width + x not in reachable for x, y in spawns):
+                raise ValueError("Every spawn square must be reachable")
+
+    # Public Methods
+
+    def is_open(self, x: int, y: int) -> bool:
+        """Returns whether a creature can stand on square (x, y).
+
+        Args:
+            x (int): The square's x co-ordinate.
+            y (int): The square's y co-ordinate.
+
+        Returns:
+            bool: True if the square is on the map and not blocked.
+        """
+        return (
+            0 <= x < self.width
+            and 0 <= y < self.height
+            and (x, y) not in self.blocked
+        )
+
+    def next_steps(
+        self, start: tuple[int, int], target: tuple[int, int]
+    ) -> dict[tuple[int, int], tuple[int, int]]:
+        """Returns next steps toward `target` that lead on from `start`.
+
+        The cheapest path is found with an A* search from `start`, costing
+        10 for a straight step and 15 for a diagonal one, the average of
+        the alternating 5 and 10 feet, with 10 more for stepping into
+        difficult terrain. Diagonal steps cannot cut the corner of a
+        blocked square. The search ends on the first square next to
+        `target` it settles, so it only looks at the squares between the
+        two rather than the whole map. Each path is added to the steps
+        kept for `target`, and a later call from a square already on one
+        of them reuses it without searching.
+
+        Args:
+            start (tuple[int, int]): The square being moved from.
+            target (tuple[int, int]): The square being moved toward.
+
+        Returns:
+            dict[tuple[int, int], tuple[int, int]]: The next square to step
+                to from each square on the way, with squares next to
+                `target` stepping to themselves. Empty if `start` cannot
+                reach `target`.
+        """
+        steps = self._paths.get(target)
+        if steps is not None and start in steps:
+            return steps
+
+        path = self._search(start, target)
+        if not path:
+            return {}
+        # Moves this target's paths to the end, so they are dropped last
+        steps = self._paths.pop(target, {})
+        self._paths[target] = steps
+        path_steps = dict(zip(path, path[1:]))
+        path_steps[path[-1]] = path[-1]
+        for cell, step in path_steps.items():
+            if cell not in steps:
+                steps[cell] = step
+                self._path_cells += 1
+
+        # Drops the oldest targets' paths beyond the limit
+        while self._path_cells > self.max_path_cells and len(self._paths) > 1:
+            self._path_cells -= len(self._paths.pop(next(iter(self._paths))))
+        return steps
+
+    # Private Methods
+
+    def _moves(self, index: int) -> list[tuple[int, int]]:
+        # Returns each square a creature can step to from the square at
+        # `index`, and the cost of stepping there, with squares numbered
+        # y * width + x
+        width, costs = self.width, self._entry_costs
+        x, y = index % width, index // width
+        right = x + 1 < width and costs[index + 1]
+        left = x > 0 and costs[index - 1]
+        down = y + 1 < self.height and costs[index + width]
+        up = y > 0 and costs[index - width]
+        moves = []
+        if right:
+            moves.append((index + 1, right))
+        if left:
+            moves.append((index - 1, left))
+        if down:
+            moves.append((index + width, down))
+        if up:
+            moves.append((index - width, up))
+        for across, along, offset in (
+            (right, down, width + 1),
+            (right, up, 1 - width),
+            (left, down, width - 1),
+            (left, up, -width - 1),
+        ):
+            if across and along and costs[index + offset]:
+                moves.append((index + offset, costs[index + offset] + 5))
+        return moves
+
+    def _reachable(self, start: tuple[int, int]) -> set[int]:
+        start_index = start[1] * self.width + start[0]
+        reachable = {start_index}
+        frontier = [start_index]
+        while frontier:
+            for neighbor, _ in self._moves(frontier.pop()):
+                if neighbor not in reachable:
+                    reachable.add(neighbor)
+                    frontier.append(neighbor)
+        return reachable
+
+    def _distances(self, start: int) -> array:
+        # The cost of the cheapest path from square `start` to every square,
+        # by Dijkstra's algorithm, with -1 for the squares it cannot reach
+        distances = array("i", [-1]) * len(self._entry_costs)
+        distances[start] = 0
+        queue = [(0, start)]
+        while queue:
+            cost, index = heapq.heappop(queue)
+            if cost > distances[index]:
+                continue
+            for neighbor, step_cost in self._moves(index):
+                new_cost = cost + step_cost
+                if distances[neighbor] < 0 or new_cost < distances[neighbor]:
+                    distances[neighbor] = new_cost
+                    heapq.heappush(queue, (new_cost, neighbor))
+        return distances
+
+    def _landmarks(self) -> list[array]:
+        # Distances from the first spawn and from the square farthest from
+        # it, worked out on the first search rather than when the map is
+        # built
+        if self._landmark_distances is None:
+            spawns = self.player_spawns + self.enemy_spawns
+            self._landmark_distances = []
+            if spawns:
+                x, y = spawns[0]
+                first = self._distances(y * self.width + x)
+                farthest = max(range(len(first)), key=first.__getitem__)
+                self._landmark_distances = [first, self._distances(farthest)]
+        return self._landmark_distances
+
+    def _search(
+        self, start: tuple[int, int], target: tuple[int, int]
+    ) -> list[tuple[int, int]]:
+        # A* from `start` to any square next to `target`. The estimate is
+        # the larger of the octile distance to those squares and, for each
+        # landmark, how much farther from it they are than the square being
+        # estimated. Neither ever overestimates, since terrain only adds
+        # cost and no square is farther from a landmark than a square
+        # before it plus the path between them. On winding maps the
+        # landmarks keep the search on the path instead of filling the map.
+        width = self.width
+        target_x, target_y = target
+        goals = [
+            (target_y + dy) * width + target_x + dx
+            for dx, dy in ((0, 0), *NEIGHBORS)
+            if self.is_open(target_x + dx, target_y + dy)
+        ]
+        bounds = []
+        for distances in self._landmarks():
+            goal_costs = [distances[i] for i in goals if distances[i] >= 0]
+            if goal_costs:
+                bounds.append((distances, min(goal_costs)))
+
+        def estimate(index: int) -> int:
+            dx = max(abs(index % width - target_x) - 1, 0)
+            dy = max(abs(index // width - target_y) - 1, 0)
+            best = 10 * max(dx, dy) + 5 * min(dx, dy)
+            for distances, goal_cost in bounds:
+                best = max(best, goal_cost - distances[index])
+            return best
+
+        start_index = start[1] * width + start[0]
+        goals = set(goals)
+        came_from = {start_index: start_index}
+        costs = {start_index: 0}
+        # Ties go to the square farthest along, which keeps the search on
+        # one path when the estimate is exact
+        queue = [(estimate(start_index), 0, start_index)]
+        while queue:
+            _, cost, index = heapq.heappop(queue)
+            cost = -cost
+            if cost > costs[index]:
+                continue
+            if index in goals:
+                path = [index]
+                while index != start_index:
+                    index = came_from[index]
+                    path.append(index)
+                return [
+                    (index % width, index // width) for index in path[::-1]
+                ]
+            for neighbor, step_cost in self._moves(index):
+                new_cost = cost + step_cost
+                if new_cost < costs.get(neighbor, new_cost + 1):
+                    costs[neighbor] = new_cost
+                    came_from[neighbor] = index
+                    heapq.heappush(
+                        queue,
+                        (new_cost + estimate(neighbor), -new_cost, neighbor),
+                    )
+        return []
+
+
+def compile_map(map_dict: dict[str, Any] | BattleMap) -> BattleMap:
+    """Returns the BattleMap for `map_dict`, building each map only once.
+
+    Maps are cached by their contents, so every batch of a request, and any
+    later request on the same map, shares one BattleMap and the paths it
+    has found.
+
+    Args:
+        map_dict (dict[str, Any] | BattleMap): The map's data, or a map that
+            has already been built. None means no map.
+
+    Returns:
+        BattleMap: The map, or None if `map_dict` is None.
+    """
+    if map_dict is None or isinstance(map_dict, BattleMap):
+        return map_dict
+    return _compile_map(json.dumps(map_dict, sort_keys=True))
+
+
+@lru_cache(maxsize=16)
+def _compile_map(map_json: str) -> BattleMap:
+    return BattleMap(json.loads(map_json))
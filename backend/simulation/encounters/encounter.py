@@ -1,10 +1,20 @@
 """Defines the encounter class and its methods."""
 
+import time
 from operator import attrgetter
+from typing import Any
 
+from ..core.events import Event, render_event
 from ..creatures.creature import Creature
 from ..creatures.enemy import Enemy
 from ..creatures.player import Player
+from .battle_map import BattleMap
+from .grid import SpatialGrid
+from .team import Team
+
+# Defaults for when an encounter is stopped without a winner
+MAX_ROUNDS = 1000
+STALEMATE_ROUNDS = 10
 
 
 class Encounter:
@@ -14,15 +24,40 @@ class Encounter:
     team is defeated. At which point the encounter ends and returns a string
     telling who won the encounter.
 
+    An encounter that cannot finish, such as when no one left can hurt the
+    other side, is stopped instead. It ends in a draw after `max_rounds`
+    rounds, or once `stalemate_rounds` rounds in a row pass without any
+    creature moving or its hit points changing. It times out once its
+    `deadline` passes, which the executor sets for the whole request.
+
     Attributes:
-        players: A list of the Players in the encounter.
-        enemies: A list of the Enemies in the encounter.
-        creatures: A combined list of all Players and Enemies in the encounter.
+        players: The Team of Players in the encounter.
+        enemies: The Team of Enemies in the encounter.
+        teams: The players and enemies by team number, 1 and 2.
+        creatures: A combined list of all Players and Enemies in the encounter,
+            in turn order. Dead creatures stay in it and are skipped.
         simulation: The simulation running the encounter, if any, primarily
             used for adding to the simulation's combat log.
-        winner: String showing whether enemies or players won the encounter.
+        collect_log: Whether events should be recorded for the combat log.
+        winner: String showing whether enemies or players won the encounter,
+            or "draw" or "timeout" if it was stopped without a winner.
+        grid: An index of the living creatures by position, used to find the
+            creatures in range of each other.
+        battle_map: The map the encounter is fought on, or None for an open
+            plane.
+        version: A count of the changes that can change which action a
+            creature picks, namely damage, healing, deaths, and movement.
+            Creatures reuse their cached action weights while it is
+            unchanged.
+        max_rounds: The most rounds played before the encounter is a draw.
+        stalemate_rounds: The most rounds in a row without progress before
+            the encounter is a draw.
+        deadline: The `time.time()` at which the encounter times out, or
+            None for no limit.
     """
 
+    grid_class: type = SpatialGrid
+
     # Built-in Methods
 
     def __init__(
@@ -31,13 +66,20 @@ class Encounter:
         enemies: list[Enemy],
         simulation=None,
         starting_distance: int = 50,
+        battle_map: BattleMap = None,
+        max_rounds: int = MAX_ROUNDS,
+        stalemate_rounds: int = STALEMATE_ROUNDS,
+        deadline: float = None,
     ):
         """Initializes the encounter with the given players and enemies.
 
-        Sets the player and enemy lists to the given lists, then builds the
-        creatures list from them, rolls initiative for each creature, and
+        Builds a team from each of the given lists, then builds the creatures
+        list from them, rolls initiative for each creature, and
         sorts the creature list by initiative.
 
+        Without a map, players line up at x=0 and enemies `starting_distance`
+        away. With one, each side starts on its spawn squares in order.
+
         Args:
             players (list[Player]): A list of the Players in the encounter.
             enemies (list[Enemy]): A list of the Enemies in the encounter.
@@ -45,31 +87,58 @@ class Encounter:
                 encounter. Defaults to None.
             starting_distance (int, Optional): The distance between the players
                 and enemies at the start of the encounter. Defaults to 50.
+            battle_map (BattleMap, optional): The map to fight on. Defaults to
+                None, fighting on an open plane.
+            max_rounds (int, optional): The most rounds played before the
+                encounter is a draw. Defaults to `MAX_ROUNDS`.
+            stalemate_rounds (int, optional): The most rounds in a row without
+                progress before the encounter is a draw. Defaults to
+                `STALEMATE_ROUNDS`.
+            deadline (float, optional): The `time.time()` at which the
+                encounter times out. Defaults to None, for no limit.
+
+        Raises:
+            ValueError: If a side has more creatures than spawn squares.
         """
-        self.players: list[Player] = players
-        self.enemies: list[Enemy] = enemies
-        self.creatures: list[Creature] = self.players + self.enemies
+        self.players: Team = Team(players)
+        self.enemies: Team = Team(enemies)
+        self.teams: dict[int, Team] = {1: self.players, 2: self.enemies}
+        self.creatures: list[Creature] = players + enemies
         self.simulation = simulation
+        self.collect_log: bool = simulation.collect_log if simulation else True
         self.winner = None
+        self.battle_map: BattleMap = battle_map
+        self.version: int = 0
+        self.max_rounds: int = max_rounds
+        self.stalemate_rounds: int = stalemate_rounds
+        self.deadline: float = deadline
 
         for creature in self.creatures:
             creature.join_encounter(self)
 
-        position_x = 0
-        position_y = 0
-        if players:
-            for player in players:
-                player.position_x = position_x
-                player.position_y = position_y
-                position_y += 1
-
-        if enemies:
-            position_x = starting_distance // 5
+        if battle_map is not None:
+            self._place_on_spawns(players, battle_map.player_spawns)
+            self._place_on_spawns(enemies, battle_map.enemy_spawns)
+        else:
+            position_x = 0
             position_y = 0
-            for enemy in enemies:
-                enemy.position_x = position_x
-                enemy.position_y = position_y
-                position_y += 1
+            if players:
+                for player in players:
+                    player.position_x = position_x
+                    player.position_y = position_y
+                    position_y += 1
+
+            if enemies:
+                position_x = starting_distance // 5
+                position_y = 0
+                for enemy in enemies:
+                    enemy.position_x = position_x
+                    enemy.position_y = position_y
+                    position_y += 1
+
+        self.grid: SpatialGrid = self.grid_class()
+        for creature in self.creatures:
+            self.grid.add(creature)
 
         # Sort by initiative before starting encounter
         self.creatures = sorted(
@@ -84,31 +153,39 @@ class Encounter:
         """Repeatedly runs rounds of combat until one side is defeated.
 
         Returns:
-            str: The winner of the encounter.
+            str: The winner of the encounter, or "draw" or "timeout" if it was
+                stopped without one.
         """
-        self._log("Party:")
-        for i in range(len(self.players)):
-            self._log(f"{i + 1}. {self.players[i]}")
-
-        self._log("Enemies:")
-        for i in range(len(self.enemies)):
-            self._log(f"{i + 1}. {self.enemies[i]}")
-        self._log()
-
-        self._log("Initiative order: ")
-        for i in range(len(self.creatures)):
-            creature = self.creatures[i]
-            self._log(f"{i + 1}. {creature}: {creature.initiative}")
+        if self.collect_log:
+            self._log_participants()
 
         rounds = 0
+        stalled_rounds = 0
         while not self._check_winner():
+            if self._stopped(rounds, stalled_rounds):
+                break
             rounds += 1
-            self._log(f"Round {rounds}:")
-            for creature in list(self.creatures):
-                if not self._check_winner() and not creature.is_dead:
+            if self.collect_log:
+                self._log(Event.ROUND, rounds)
+
+            # Damage, healing, deaths, and movement all bump the version
+            version = self.version
+            for creature in self.creatures:
+                if self._check_winner():
+                    break
+                if not creature.is_dead:
                     creature.take_turn()
-
-        self._log(f"{self.winner.capitalize()} won in {rounds} rounds!")
+            stalled_rounds = (
+                stalled_rounds + 1 if version == self.version else 0
+            )
+
+        if self.collect_log:
+            if self.winner == "draw":
+                self._log(Event.DRAW, rounds)
+            elif self.winner == "timeout":
+                self._log(Event.TIMEOUT, rounds)
+            else:
+                self._log(Event.WINNER, self.winner.capitalize(), rounds)
         if self.simulation:
             self.simulation.rounds = rounds
 
@@ -117,8 +194,8 @@ class Encounter:
     def remove_creature(self, creature: Creature) -> None:
         """Removes a creature from the encounter.
 
-        Determines if the creature is a player or enemy, removes it from the
-        appropriate list, and then removes it from the overall creatures list.
+        Marks the creature dead on its team and takes it off the grid. It
+        keeps its place in the turn order, where its turns are skipped.
 
         Args:
             creature (Creature): The creature to be removed.
@@ -128,10 +205,36 @@ class Encounter:
         elif creature.team == 2:
             self.enemies.remove(creature)
 
-        self.creatures.remove(creature)
+        self.grid.remove(creature)
+        self.version += 1
 
     # Private Methods
 
+    def _place_on_spawns(
+        self, creatures: list[Creature], spawns: list[tuple[int, int]]
+    ) -> None:
+        if len(creatures) > len(spawns):
+            raise ValueError(
+                f"{len(creatures)} creatures need at least as many spawn "
+                f"squares, but only {len(spawns)} were given"
+            )
+        for creature, (position_x, position_y) in zip(creatures, spawns):
+            creature.position_x = position_x
+            creature.position_y = position_y
+
+    def _stopped(self, rounds: int, stalled_rounds: int) -> bool:
+        # Ends an encounter that cannot or will not finish in time
+        if (
+            rounds >= self.max_rounds
+            or stalled_rounds >= self.stalemate_rounds
+        ):
+            self.winner = "draw"
+            return True
+        if self.deadline is not None and time.time() >= self.deadline:
+            self.winner = "timeout"
+            return True
+        return False
+
     def _check_winner(self) -> bool:
         """Checks if either side has won the encounter.
 
@@ -151,13 +254,29 @@ class Encounter:
         else:
             return False
 
-    def _log(self, message: str = "") -> None:
-        """Adds `message` to the simulation log, or prints it to the console.
+    def _log_participants(self) -> None:
+        self._log(Event.PARTY_HEADER)
+        for i, player in enumerate(self.players):
+            self._log(Event.PARTICIPANT, i + 1, player)
+
+        self._log(Event.ENEMIES_HEADER)
+        for i, enemy in enumerate(self.enemies):
+            self._log(Event.PARTICIPANT, i + 1, enemy)
+        self._log(Event.BLANK)
+
+        self._log(Event.INITIATIVE_HEADER)
+        for i in range(len(self.creatures)):
+            creature = self.creatures[i]
+            self._log(Event.INITIATIVE, i + 1, creature, creature.initiative)
+
+    def _log(self, event: Event, *args: Any) -> None:
+        """Adds an event to the simulation log, or prints it to the console.
 
         Args:
-            message (str): The message to be printed.
+            event (Event): The kind of event.
+            *args (Any): The event's arguments, such as creatures and rolls.
         """
         if self.simulation:
-            self.simulation.log(message)
+            self.simulation.log(event, *args)
         else:
-            print(message)
+            print(render_event(event, args))
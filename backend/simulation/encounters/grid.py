@@ -0,0 +1,254 @@
+"""Defines the SpatialGrid class, an index of creatures by position."""
+
+import math
+
+
+class SpatialGrid:
+    """The living creatures of an encounter, bucketed by where they stand.
+
+    The map is split into square cells `cell_size` squares across, and each
+    team's creatures are kept in a dictionary from cell to the creatures in
+    it. A range query then only looks at the cells that could hold creatures
+    in range, rather than measuring the distance to every creature on the
+    other team. When a query would cover more cells than the team has
+    creatures, such as in small encounters, the team is scanned directly
+    instead.
+
+    Queries return creatures in the order they were added, the same order as
+    the encounter's player and enemy lists, so ties are broken exactly as a
+    scan of those lists would break them.
+
+    Attributes:
+        cell_size: The width and height of each cell, in 5-foot squares.
+    """
+
+    def __init__(self, cell_size: int = 4):
+        """Initializes an empty grid.
+
+        Args:
+            cell_size (int, optional): The width and height of each cell, in
+                5-foot squares. Defaults to 4.
+        """
+        self.cell_size: int = cell_size
+        # For each team, its creatures in order, and the creatures in each cell
+        self._members: dict[int, dict] = {1: {}, 2: {}}
+        self._cells: dict[int, dict[tuple[int, int], list]] = {1: {}, 2: {}}
+        self._order: dict = {}
+        self._cell_of: dict = {}
+
+    # Public Methods
+
+    def add(self, creature) -> None:
+        """Adds `creature` to the grid at its current position.
+
+        Args:
+            creature (Creature): The creature to add.
+        """
+        self._order[creature] = len(self._order)
+        self._members[creature.team][creature] = None
+        cell = self._cell(creature.position_x, creature.position_y)
+        self._cell_of[creature] = cell
+        self._cells[creature.team].setdefault(cell, []).append(creature)
+
+    def remove(self, creature) -> None:
+        """Removes `creature` from the grid, such as when it dies.
+
+        Args:
+            creature (Creature): The creature to remove.
+        """
+        del self._members[creature.team][creature]
+        self._remove_from_cell(creature, self._cell_of.pop(creature))
+
+    def move(self, creature) -> None:
+        """Moves `creature` to the cell of its current position.
+
+        Args:
+            creature (Creature): The creature that has moved.
+        """
+        cell = self._cell(creature.position_x, creature.position_y)
+        old_cell = self._cell_of[creature]
+        if cell != old_cell:
+            self._remove_from_cell(creature, old_cell)
+            self._cell_of[creature] = cell
+            self._cells[creature.team].setdefault(cell, []).append(creature)
+
+    def within(self, creature, team: int, distance: int) -> list:
+        """Returns the creatures on `team` within `distance` of `creature`.
+
+        Args:
+            creature (Creature): The creature measuring from.
+            team (int): The team whose creatures are wanted.
+            distance (int): The greatest distance in feet, measured the same
+                way as `Creature.calculate_distance`.
+
+        Returns:
+            list[Creature]: The creatures in range, in the order they were
+                added.
+        """
+        # A creature in range is at most this many squares away along
+        # either axis, since each square costs at least 5 feet
+        radius = distance // 5
+        members = self._members[team]
+
+        # At most this many cells across can overlap the range
+        span = 2 * radius // self.cell_size + 2
+        if span * span >= len(members):
+            return [
+                other
+                for other in members
+                if creature.calculate_distance(other) <= distance
+            ]
+
+        low_x, high_x = self._cell_range(creature.position_x, radius)
+        low_y, high_y = self._cell_range(creature.position_y, radius)
+        cells = self._cells[team]
+        found = []
+        for cell_x in range(low_x, high_x + 1):
+            for cell_y in range(low_y, high_y + 1):
+                for other in cells.get((cell_x, cell_y), ()):
+                    if creature.calculate_distance(other) <= distance:
+                        found.append(other)
+
+        found.sort(key=self._order.__getitem__)
+        return found
+
+    def any_within(self, creature, team: int, distance: int) -> bool:
+        """Returns whether any creature on `team` is within `distance`.
+
+        Args:
+            creature (Creature): The creature measuring from.
+            team (int): The team whose creatures are checked.
+            distance (int): The greatest distance in feet.
+
+        Returns:
+            bool: True if a creature on `team` is in range, False if not.
+        """
+        members = self._members[team]
+        if len(members) <= 2 * (distance // 5) // self.cell_size + 2:
+            for other in members:
+                if creature.calculate_distance(other) <= distance:
+                    return True
+            return False
+        return bool(self.within(creature, team, distance))
+
+    def nearest(self, creature, team: int):
+        """Returns the creature on `team` closest to `creature`.
+
+        Searches outward one ring of cells at a time, stopping once no
+        unsearched cell could hold anything closer. Ties are broken by the
+        order creatures were added.
+
+        Args:
+            creature (Creature): The creature measuring from.
+            team (int): The team whose closest creature is wanted.
+
+        Returns:
+            Creature: The closest creature, or None if `team` has none left.
+        """
+        cells = self._cells[team]
+        remaining = len(self._members[team])
+        center_x, center_y = self._cell(
+            creature.position_x, creature.position_y
+        )
+
+        best, best_key = None, None
+        ring = 0
+        while remaining > 0:
+            for cell in self._ring(center_x, center_y, ring):
+                for other in cells.get(cell, ()):
+                    remaining -= 1
+                    key = (
+                        creature.calculate_distance(other),
+                        self._order[other],
+                    )
+                    if best_key is None or key < best_key:
+                        best, best_key = other, key
+
+            # Anything in a further ring is more than this many feet away
+            if best_key is not None and best_key[0] <= (
+                5 * ring * self.cell_size
+            ):
+                break
+            ring += 1
+
+        return best
+
+    def rings(self, creature, team: int):
+        """Yields the creatures on `team` outward from `creature`.
+
+        Each step yields the creatures in one more ring of cells around
+        `creature`'s cell, along with the least distance any creature in a
+        later ring can be, so a search can stop once nothing further out
+        could matter.
+
+        Args:
+            creature (Creature): The creature searching from.
+            team (int): The team whose creatures are wanted.
+
+        Yields:
+            tuple[list[Creature], float]: The creatures in the next ring, in
+                no particular order, and the least distance in feet of any
+                creature not yet yielded. Once the rings would hold more
+                cells than creatures are left, the rest are yielded at once
+                with a distance of inf.
+        """
+        cells = self._cells[team]
+        remaining = len(self._members[team])
+        center_x, center_y = self._cell(
+            creature.position_x, creature.position_y
+        )
+
+        ring = 0
+        while remaining > 0:
+            if 8 * ring > remaining:
+                # More cells in the ring than creatures left, so gather the
+                # rest directly rather than searching ever emptier rings
+                yield [
+                    other
+                    for other in self._members[team]
+                    if max(
+                        abs(self._cell_of[other][0] - center_x),
+                        abs(self._cell_of[other][1] - center_y),
+                    )
+                    >= ring
+                ], math.inf
+                return
+
+            found = [
+                other
+                for cell in self._ring(center_x, center_y, ring)
+                for other in cells.get(cell, ())
+            ]
+            remaining -= len(found)
+            # A later ring is at least this many squares away along an axis
+            yield found, 5 * (ring * self.cell_size + 1)
+            ring += 1
+
+    # Private Methods
+
+    def _cell(self, x: int, y: int) -> tuple[int, int]:
+        return x // self.cell_size, y // self.cell_size
+
+    def _cell_range(self, position: int, radius: int) -> tuple[int, int]:
+        return (
+            (position - radius) // self.cell_size,
+            (position + radius) // self.cell_size,
+        )
+
+    def _ring(self, center_x: int, center_y: int, ring: int):
+        # The cells exactly `ring` cells away from the center cell
+        if ring == 0:
+            yield center_x, center_y
+            return
+        for offset in range(-ring, ring + 1):
+            yield center_x + offset, center_y - ring
+            yield center_x + offset, center_y + ring
+        for offset in range(-ring + 1, ring):
+            yield center_x - ring, center_y + offset
+            yield center_x + ring, center_y + offset
+
+    def _remove_from_cell(self, creature, cell: tuple[int, int]) -> None:
+        cells = self._cells[creature.team]
+        cells[cell].remove(creature)
+        if not cells[cell]:
+            del cells[cell]
@@ -0,0 +1,261 @@
+"""Defines the Team class, one side of an encounter."""
+
+import math
+from heapq import heapify, heappop, heappush
+from itertools import compress
+from typing import Callable
+
+
+class Team:
+    """The creatures on one side of an encounter, and which are still alive.
+
+    Every creature keeps its place for the whole encounter, with a flag for
+    whether it is alive and a count of how many are. A death flips its flag
+    and lowers the count, rather than removing it from a list, so checking
+    whether a side has been defeated and removing the dead both take
+    constant time however large the encounter.
+
+    Iterating over a team gives its living creatures in their original
+    order, and its length is the number still alive.
+
+    The team also counts how many of its living creatures are immune,
+    resistant, or weak to each damage type and how many are undead, kept up
+    to date as they die, so checking whether a damage type can hurt anyone
+    on it does not scan the team.
+
+    Two heaps order the team for picking targets, one by current hit points
+    for healers and one by damage taken times level, the score attackers
+    weigh targets by. Both are updated whenever a creature's hit points
+    change, with entries left behind by a change or a death skipped when
+    they are reached. Ties are broken by the creatures' order, as a scan of
+    the team would break them.
+
+    Attributes:
+        members: Every creature on the team, living or dead, in order.
+        alive: Whether each creature in `members` is still alive.
+        num_alive: The number of creatures on the team still alive.
+        num_immune: The number of living creatures immune to each damage
+            type, leaving out types no one is immune to.
+        num_resistant: The number of living creatures resistant to each
+            damage type.
+        num_weak: The number of living creatures weak to each damage type.
+        num_undead: The number of living creatures with the undead trait.
+    """
+
+    __slots__ = (
+        "members",
+        "alive",
+        "num_alive",
+        "num_immune",
+        "num_resistant",
+        "num_weak",
+        "num_undead",
+        "_index",
+        "_hit_points",
+        "_scores",
+    )
+
+    def __init__(self, members: list):
+        """Initializes the team with every creature alive.
+
+        Args:
+            members (list[Creature]): The creatures on the team, in order.
+        """
+        self.members: list = list(members)
+        self.alive: list[bool] = [True] * len(self.members)
+        self.num_alive: int = len(self.members)
+        self._index: dict = {
+            creature: index for index, creature in enumerate(self.members)
+        }
+        self.num_immune: dict[str, int] = {}
+        self.num_resistant: dict[str, int] = {}
+        self.num_weak: dict[str, int] = {}
+        self.num_undead: int = 0
+        for creature in self.members:
+            self._count(creature, 1)
+        self._build_heaps()
+
+    # Built-in Methods
+
+    def __iter__(self):
+        return compress(self.members, self.alive)
+
+    def __len__(self) -> int:
+        return self.num_alive
+
+    def __contains__(self, creature) -> bool:
+        index = self._index.get(creature)
+        return index is not None and self.alive[index]
+
+    # Public Methods
+
+    def remove(self, creature) -> None:
+        """Marks `creature` as dead.
+
+        Args:
+            creature (Creature): A living creature on the team.
+        """
+        self.alive[self._index[creature]] = False
+        self.num_alive -= 1
+        self._count(creature, -1)
+
+    def update(self, creature) -> None:
+        """Reorders `creature` after its hit points have changed.
+
+        Args:
+            creature (Creature): A living creature on the team.
+        """
+        index = self._index[creature]
+        heappush(self._hit_points, (creature.current_hit_points, index))
+        heappush(self._scores, (-_score(creature), index))
+        # Rebuild once outdated entries outnumber the creatures
+        if len(self._scores) > 2 * len(self.members) + 16:
+            self._build_heaps()
+
+    def index(self, creature) -> int:
+        """Returns `creature`'s place on the team.
+
+        Args:
+            creature (Creature): A creature on the team.
+
+        Returns:
+            int: The index of `creature` in `members`.
+        """
+        return self._index[creature]
+
+    def most_hurt(self):
+        """Returns the living creature with the fewest hit points.
+
+        Returns:
+            Creature: The creature with the fewest current hit points, the
+                first in order on a tie, or None if none are alive.
+        """
+        heap = self._hit_points
+        while heap:
+            hit_points, index = heap[0]
+            creature = self.members[index]
+            if self.alive[index] and creature.current_hit_points == hit_points:
+                return creature
+            heappop(heap)
+        return None
+
+    def max_score(self) -> int:
+        """Returns the highest damage taken times level of any living creature.
+
+        Returns:
+            int: The highest score, or None if none are alive.
+        """
+        heap = self._scores
+        while heap:
+            score, index = heap[0]
+            if self.alive[index] and _score(self.members[index]) == -score:
+                return -score
+            heappop(heap)
+        return None
+
+    def best(
+        self,
+        weigh: Callable[[object], float | None],
+        bound: Callable[[int], float],
+    ):
+        """Returns the living creature `weigh` gives the highest weight.
+
+        Walks the score heap from the top, so creatures are weighed from the
+        highest score down, and stops once no creature left to weigh could
+        beat the best weight so far. Only creatures with a weight above
+        -inf can be picked. If there are none, the first candidate in order
+        is returned, matching a scan that starts with it.
+
+        Args:
+            weigh (Callable[[Creature], float | None]): Returns a creature's
+                weight, or None if it is not a candidate.
+            bound (Callable[[int], float]): Returns the highest weight any
+                creature with a given score can have. Must be strictly
+                increasing in the score.
+
+        Returns:
+            Creature: The creature with the highest weight, the first in
+                order on a tie, or None if there are no candidates.
+        """
+        heap = self._scores
+        best, best_weight, best_index = None, -math.inf, 0
+        first, first_index = None, 0
+        # Heap positions to visit, ordered the same way as the heap
+        frontier = [(heap[0], 0)] if heap else []
+        while frontier:
+            (score, index), position = heappop(frontier)
+            if best is not None:
+                # Every entry left is this one or after it in the heap's
+                # order, so has at most this score and a later index on a tie
+                highest = bound(-score)
+                if highest < best_weight or (
+                    highest == best_weight and index > best_index
+                ):
+                    break
+
+            for child in (2 * position + 1, 2 * position + 2):
+                if child < len(heap):
+                    heappush(frontier, (heap[child], child))
+
+            creature = self.members[index]
+            if not self.alive[index] or _score(creature) != -score:
+                continue
+            weight = weigh(creature)
+            if weight is None:
+                continue
+            if first is None or index < first_index:
+                first, first_index = creature, index
+            if weight > best_weight or (
+                weight == best_weight and index < best_index
+            ):
+                best, best_weight, best_index = creature, weight, index
+
+        return best if best is not None else first
+
+    def all_immune(self, damage_type: str) -> bool:
+        """Returns whether every living creature is immune to `damage_type`.
+
+        Args:
+            damage_type (str): The damage type to check.
+
+        Returns:
+            bool: True if no living creature can take the damage, including
+                when none are left.
+        """
+        return self.num_immune.get(damage_type, 0) == self.num_alive
+
+    # Private Methods
+
+    def _build_heaps(self) -> None:
+        living = [
+            (index, creature)
+            for index, creature in enumerate(self.members)
+            if self.alive[index]
+        ]
+        self._hit_points = [
+            (creature.current_hit_points, index) for index, creature in living
+        ]
+        self._scores = [
+            (-_score(creature), index) for index, creature in living
+        ]
+        heapify(self._hit_points)
+        heapify(self._scores)
+
+    def _count(self, creature, change: int) -> None:
+        # Only enemies have immunities, resistances, weaknesses and traits
+        for counts, damage_types in (
+            (self.num_immune, getattr(creature, "immunities", ())),
+            (self.num_resistant, getattr(creature, "resistances", ())),
+            (self.num_weak, getattr(creature, "weaknesses", ())),
+        ):
+            for damage_type in set(damage_types):
+                counts[damage_type] = counts.get(damage_type, 0) + change
+        if "undead" in getattr(creature, "traits", ()):
+            self.num_undead += change
+
+
+def _score(creature) -> int:
+    # Damage taken times level, how attackers weigh their targets
+    return (
+        creature.max_hit_points - creature.current_hit_points
+    ) * creature.level
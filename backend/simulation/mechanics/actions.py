@@ -5,7 +5,18 @@ import random
 import re
 from typing import Any
 
-from ..mechanics.misc import Degree, Die, calculate_dos, d6, d8, d10, d20
+from ..core.events import Event
+from ..mechanics.misc import (
+    Degree,
+    Die,
+    calculate_dos,
+    d6,
+    d8,
+    d10,
+    d20,
+    grid_distance,
+)
+from .areas import CONE_DIRECTIONS, burst_offsets, in_cone, in_line
 
 
 class Action:
@@ -21,9 +32,24 @@ class Action:
         damage_type: The type of damage the action deals
         num_dice: The number of dice rolled for damage
         die_size: The number of faces on the die rolled for damage
+        damage_die: The die rolled for damage, built once with the action
         damage_bonus: The bonus added to the damage roll for the action
     """
 
+    __slots__ = (
+        "name",
+        "cost",
+        "weight",
+        "traits",
+        "range",
+        "ranged",
+        "damage_type",
+        "num_dice",
+        "die_size",
+        "damage_die",
+        "damage_bonus",
+    )
+
     def __init__(
         self,
         name: str = "Undefined",
@@ -51,6 +77,7 @@ class Action:
         self.damage_type: str = ""
         self.num_dice: int = 0
         self.die_size: int = 0
+        self.damage_die: Die = Die(self.die_size)
         self.damage_bonus: int = 0
 
     def __repr__(self):
@@ -113,91 +140,114 @@ class Action:
             self.name.lower() == "force barrage"
             or self.name.lower() == "force bolt"
         )
-        if isinstance(self, Attack):
-            attacker.log(f"{attacker} Strikes {target} with their {self}.")
-        else:
-            attacker.log(f"{attacker} attacks {target} with their {self}.")
+        if attacker.collect_log:
+            if isinstance(self, Attack):
+                attacker.log(Event.STRIKE, attacker, target, self)
+            else:
+                attacker.log(Event.SPELL_ATTACK, attacker, target, self)
 
         if auto_hit:
             degree_of_success = Degree.SUCCESS
         else:
             # Calculate attack roll and check for hit before calculating damage
-            attack_roll = d20.roll()
-            roll_display = ""
+            attack_roll = d20.roll(attacker.rng)
 
             if isinstance(self, Attack):
                 penalty_per_attack = 4 if "agile" in self.traits else 5
                 total_penalty = penalty_per_attack * attacker.multi_attack
                 attack_total = attack_roll + self.attack_bonus - total_penalty
 
-                roll_display = f"{attack_roll}"
-                if self.attack_bonus:
-                    roll_display += f" + {self.attack_bonus}"
-                if total_penalty:
-                    roll_display += f" - {total_penalty}"
-
                 if attacker.encounter:
                     attacker.multi_attack += 1
             elif isinstance(self, Spell):
                 attack_total = attack_roll + attacker.spell_attack_bonus
-                roll_display = f"{attack_roll} + {attacker.spell_attack_bonus}"
             if attack_total <= 0:
                 attack_total = 1
 
-            attacker.log(
-                f"{attacker} rolled {attack_total} ({roll_display}) to attack against AC {target.armor_class}."  # noqa: E501
-            )
+            if attacker.collect_log:
+                if isinstance(self, Attack):
+                    attacker.log(
+                        Event.STRIKE_ROLL,
+                        attacker,
+                        attack_total,
+                        target.armor_class,
+                        attack_roll,
+                        self.attack_bonus,
+                        total_penalty,
+                    )
+                elif isinstance(self, Spell):
+                    attacker.log(
+                        Event.SPELL_ATTACK_ROLL,
+                        attacker,
+                        attack_total,
+                        target.armor_class,
+                        attack_roll,
+                        attacker.spell_attack_bonus,
+                    )
 
             degree_of_success = calculate_dos(
                 attack_roll, attack_total, target.armor_class
             )
 
             if degree_of_success <= Degree.FAILURE:
-                attacker.log("Miss!")
+                if attacker.collect_log:
+                    attacker.log(Event.MISS)
                 return False
 
-            attacker.log("Hit!")
+            if attacker.collect_log:
+                attacker.log(Event.HIT)
 
         # Attack was successful, proceed to calculate damage
-        damage_rolls = self._roll_for_damage()
+        damage_rolls = self._roll_for_damage(attacker.rng)
         damage = sum(damage_rolls) + self.damage_bonus
 
-        # If damage_rolls is [4, 3, 5] displays rolls as "4 + 3 + 5"
-        damage_display = " + ".join(str(roll) for roll in damage_rolls)
-
-        if self.damage_bonus:
-            damage_display += f" + {self.damage_bonus}"
-
+        sneak_attack_roll = 0
         if attacker.sneak_attack and "finesse" in self.traits:
-            sneak_attack_roll = d6.roll()
+            sneak_attack_roll = d6.roll(attacker.rng)
             damage += sneak_attack_roll
-            attacker.log(
-                f"{attacker} sneak attacks for {sneak_attack_roll} extra damage."  # noqa: E501
-            )
-            damage_display += f" + {sneak_attack_roll}"
+            if attacker.collect_log:
+                attacker.log(Event.SNEAK_ATTACK, attacker, sneak_attack_roll)
 
-        if degree_of_success == Degree.CRITICAL_SUCCESS and not (
+        critical_hit = degree_of_success == Degree.CRITICAL_SUCCESS and not (
             target.team == 2 and "critical-hits" in target.immunities
-        ):
-            attacker.log(f"{attacker} dealt a critical hit to {target}!")
+        )
+        deadly_roll = 0
+        if critical_hit:
+            if attacker.collect_log:
+                attacker.log(Event.CRITICAL_HIT, attacker, target)
             damage *= 2
-            damage_display += " doubled"
             if "deadly-d6" in self.traits:
-                deadly_roll = d6.roll()
-                damage += deadly_roll
-                damage_display += f" + {deadly_roll}"
+                deadly_roll = d6.roll(attacker.rng)
             elif "deadly-d8" in self.traits:
-                deadly_roll = d8.roll()
-                damage += deadly_roll
-                damage_display += f" + {deadly_roll}"
+                deadly_roll = d8.roll(attacker.rng)
             elif "deadly-d10" in self.traits:
-                deadly_roll = d10.roll()
-                damage += deadly_roll
-                damage_display += f" + {deadly_roll}"
-
-        attacker.log(
-            f"{attacker} dealt {damage} ({damage_display}) {self.damage_type} damage to {target}!"  # noqa: E501
-        )
+                deadly_roll = d10.roll(attacker.rng)
+            damage += deadly_roll
+
+        if attacker.collect_log:
+            if critical_hit:
+                attacker.log(
+                    Event.CRITICAL_DAMAGE,
+                    attacker,
+                    target,
+                    damage,
+                    self.damage_type,
+                    self.damage_bonus,
+                    sneak_attack_roll,
+                    deadly_roll,
+                    *damage_rolls,
+                )
+            else:
+                attacker.log(
+                    Event.DAMAGE,
+                    attacker,
+                    target,
+                    damage,
+                    self.damage_type,
+                    self.damage_bonus,
+                    sneak_attack_roll,
+                    *damage_rolls,
+                )
         target.take_damage(damage, self.damage_type)
 
         return True
@@ -231,16 +281,12 @@ class Action:
         if not isinstance(self, Attack) and not isinstance(self, Spell):
             return True
         # First, check if all targets are immune to the damage type:
+        enemies = creature.encounter.enemies
         if creature.team == 1:  # Only enemies have immunities
             if target:
                 if self.damage_type in target.immunities:
                     return False
-            all_targets_immune = True
-            for enemy in creature.encounter.enemies:
-                if self.damage_type not in enemy.immunities:
-                    all_targets_immune = False
-                    break
-            if all_targets_immune:
+            if enemies.all_immune(self.damage_type):
                 return False
 
         # Doesn't deal vitality damage, no need to continue the checks
@@ -257,20 +303,19 @@ class Action:
             else:
                 return False
 
-        for enemy in creature.encounter.enemies:
-            # We found an undead enemy, vitality damage can work
-            if "undead" in enemy.traits:
-                return True
+        # The encounter keeps count of the undead enemies still alive
+        if enemies.num_undead:
+            return True
 
         # Every possible check has failed, the attack is dealing vitality
         # damage and no undead enemy has been found. Damage is invalid
         return False
 
-    def _roll_for_damage(self) -> list[int]:
-        damage_die = Die(self.die_size)
+    def _roll_for_damage(self, rng: random.Random) -> list[int]:
+        damage_die = self.damage_die
         damage_rolls = []
         for i in range(self.num_dice):
-            damage_rolls.append(damage_die.roll())
+            damage_rolls.append(damage_die.roll(rng))
 
         return damage_rolls
 
@@ -287,11 +332,14 @@ class Attack(Action):
         damage_type: The type of damage the action deals
         num_dice: The number of dice rolled for damage
         die_size: The number of faces on the die rolled for damage
+        damage_die: The die rolled for damage, built once with the action
         damage_bonus: The bonus added to the damage roll for the action
         attack_bonus: The bonus added to the attack roll for the attack
         weight: An integer indicating how likely the action is to be selected
     """
 
+    __slots__ = ("attack_bonus",)
+
     def __init__(self, attack_dict: dict[str, Any]):
         """Uses the values in `attack_dict` to intialize the `Attack`.
 
@@ -316,6 +364,7 @@ class Attack(Action):
         split_string = re.split(r"d|\+|-", damage_roll_string)
         self.num_dice: int = int(split_string[0])
         self.die_size: int = int(split_string[1])
+        self.damage_die: Die = Die(self.die_size)
         if len(split_string) == 3:
             self.damage_bonus: int = int(split_string[2])
         else:
@@ -391,6 +440,7 @@ class Spell(Action):
         damage_type: The type of damage the action deals
         num_dice: The number of dice rolled for damage
         die_size: The number of faces on the die rolled for damage
+        damage_die: The die rolled for damage, built once with the action
         damage_bonus: The bonus added to the damage roll for the action
         range: The distance at which the action can target a creature
         ranged: Whether the action can be used at a distance
@@ -400,6 +450,16 @@ class Spell(Action):
         targets: The number of creatures the spell can target, if any
     """
 
+    __slots__ = (
+        "slots",
+        "level",
+        "bonus",
+        "area_type",
+        "area_size",
+        "save",
+        "targets",
+    )
+
     def __init__(self, spell_dict: dict[str, Any], bonus: int = 0):
         """Uses the values in `spell_dict` to intialize the `Spell`.
 
@@ -419,6 +479,7 @@ class Spell(Action):
         split_string = re.split(r"d|\+|-", damage_roll_string)
         self.num_dice: int = int(split_string[0])
         self.die_size: int = int(split_string[1])
+        self.damage_die: Die = Die(self.die_size)
         if len(split_string) == 3:
             self.damage_bonus: int = int(split_string[2])
         else:
@@ -525,9 +586,10 @@ class Spell(Action):
         """Implements the effects of the spell being cast.
 
         Determines whether the spell is an AOE or targeted spell. If it is an
-        AOE spell, it determines the number of targets the AOE should affect,
-        rolls for damage, and makes the target make a spell save against the
-        spell, with the rolled damage. If it is a targeted spell, picks a
+        AOE spell, it aims the area where it covers the most opponents, moving
+        closer first if it would cover none, then rolls for damage and makes
+        each opponent covered make a spell save against the spell, with the
+        rolled damage. If it is a targeted spell, picks a
         target(s), moves the caster in range of the target if necessary, and
         makes an attack against the target.
 
@@ -535,8 +597,8 @@ class Spell(Action):
             caster (Creature): The creature casting the spell.
         """
         if self.area_type:
-            caster.log(f"{caster} casts {self}!")
-            self._aoe(caster)
+            if not self._aoe(caster):
+                return
         elif self.targets:
             targets = []
 
@@ -550,7 +612,8 @@ class Spell(Action):
             ):
                 return
 
-            caster.log(f"{caster} casts {self}!")
+            if caster.collect_log:
+                caster.log(Event.CAST, caster, self)
             # Pick remaining targets, there will already be targets in range,
             # so pick_target will only pick from them.
             for i in range(self.targets - 1):
@@ -558,7 +621,7 @@ class Spell(Action):
                 targets.append(target)
             for target in targets:
                 if self.save:
-                    damage_rolls = self._roll_for_damage()
+                    damage_rolls = self._roll_for_damage(caster.rng)
                     target.spell_save(
                         damage_rolls, self.damage_bonus, self, caster
                     )
@@ -567,38 +630,85 @@ class Spell(Action):
 
         if self.level >= 1:
             self.slots -= 1
+            caster.clear_weights()
             if self.slots <= 0:
                 caster.actions.remove(self)
 
-    def _aoe(self, caster):
-        # NOTE: AOE spells calculate an abstract number of targets
-        # May modify to use proper positioning in the future
-        num_targets = 0
+    def _aoe(self, caster) -> bool:
+        targets = self._area_targets(caster)
+        if not targets:
+            # Nothing to hit from here, so move until the best target could
+            # be covered. Bursts are centered on a square within range.
+            reach = self.range if self.area_type == "burst" else self.area_size
+            caster.move_to(caster.pick_target(self), reach)
+            if caster.num_actions < self.cost:
+                return False
+            targets = self._area_targets(caster)
+            if not targets:
+                return False
+
+        damage_rolls = self._roll_for_damage(caster.rng)
+
+        if caster.collect_log:
+            caster.log(Event.CAST, caster, self)
+            caster.log(Event.AREA_ATTACK, caster, self, *targets)
+        for target in targets:
+            target.spell_save(damage_rolls, self.damage_bonus, self, caster)
+        return True
+
+    def _area_targets(self, caster) -> list:
+        # The opponents covered by the area, aimed to cover as many as
+        # possible. Ties go to the first aim found, in opponent order.
+        grid = caster.encounter.grid
+        team = 2 if caster.team == 1 else 1
         match self.area_type:
-            case "burst":
-                num_targets = math.ceil(self.area_size / 5)
-            case "cone":
-                num_targets = math.ceil(self.area_size / 10)
             case "emanation":
-                num_targets = math.ceil(self.area_size / 5)
-            case "line":
-                num_targets = math.ceil(self.area_size / 30)
+                return grid.within(caster, team, self.area_size)
+            case "burst":
+                # Centered on a square in range. Only squares within the
+                # burst of an opponent can cover one, so each opponent adds
+                # itself to the squares around it. Grid distances can add
+                # up to 5 feet more than the two legs, hence the slack.
+                aims = {}
+                reach = self.range + self.area_size + 5
+                for opponent in grid.within(caster, team, reach):
+                    for dx, dy in burst_offsets(self.area_size):
+                        x = opponent.position_x + dx
+                        y = opponent.position_y + dy
+                        if (
+                            grid_distance(
+                                x - caster.position_x, y - caster.position_y
+                            )
+                            <= self.range
+                        ):
+                            aims.setdefault((x, y), []).append(opponent)
+                aims = aims.values()
+            case "cone" | "line":
+                nearby = [
+                    (
+                        opponent,
+                        opponent.position_x - caster.position_x,
+                        opponent.position_y - caster.position_y,
+                    )
+                    for opponent in grid.within(caster, team, self.area_size)
+                ]
+                if self.area_type == "cone":
+                    shapes = [
+                        (in_cone, direction_x, direction_y)
+                        for direction_x, direction_y in CONE_DIRECTIONS
+                    ]
+                else:
+                    # Aimed straight at an opponent
+                    shapes = [(in_line, dx, dy) for _, dx, dy in nearby]
+                aims = [
+                    [
+                        opponent
+                        for opponent, dx, dy in nearby
+                        if shape(dx, dy, aim_x, aim_y, self.area_size)
+                    ]
+                    for shape, aim_x, aim_y in shapes
+                ]
             case _:
                 raise Exception("Invalid spell area type")
 
-        opponents = (
-            caster.encounter.enemies
-            if caster.team == 1
-            else caster.encounter.players
-        )
-        if num_targets < len(opponents):
-            targets = random.sample(opponents, num_targets)
-        else:
-            targets = opponents
-
-        damage_rolls = self._roll_for_damage()
-
-        target_names = ", ".join(map(str, targets))
-        caster.log(f"{caster} attacks {target_names} with {self}!")
-        for target in targets:
-            target.spell_save(damage_rolls, self.damage_bonus, self, caster)
+        return max(aims, key=len, default=[])
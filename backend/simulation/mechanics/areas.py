@@ -0,0 +1,100 @@
+"""Defines the shapes of area spells on the grid.
+
+Bursts and emanations cover every square within their radius, which the
+encounter's spatial grid finds directly. A burst can be centered on any
+square in range, so the squares worth trying are those within its radius of
+an opponent, found from `burst_offsets`. Cones and lines also depend on
+which way they point, so each is tested against an offset in squares from
+the caster. Sizes are in feet, measured with `grid_distance`.
+"""
+
+from functools import cache
+
+from .misc import grid_distance
+
+# The eight directions a cone can point in, straight ones first
+CONE_DIRECTIONS = (
+    (1, 0),
+    (0, 1),
+    (-1, 0),
+    (0, -1),
+    (1, 1),
+    (-1, 1),
+    (-1, -1),
+    (1, -1),
+)
+
+
+def in_cone(
+    dx: int, dy: int, direction_x: int, direction_y: int, size: int
+) -> bool:
+    """Returns whether an offset from the caster is within a cone.
+
+    A cone covers a quarter of the area around the caster out to its size.
+    Cones pointing straight cover every square at most 45 degrees to either
+    side, and diagonal cones every square between the two straight
+    directions either side of them.
+
+    Args:
+        dx (int): The offset in squares along x from the caster.
+        dy (int): The offset in squares along y from the caster.
+        direction_x (int): The direction of the cone along x, -1, 0, or 1.
+        direction_y (int): The direction of the cone along y, -1, 0, or 1.
+        size (int): The length of the cone in feet.
+
+    Returns:
+        bool: True if the offset is inside the cone.
+    """
+    if (dx == 0 and dy == 0) or grid_distance(dx, dy) > size:
+        return False
+    if direction_x and direction_y:
+        return dx * direction_x >= 0 and dy * direction_y >= 0
+    if direction_x:
+        return dx * direction_x >= abs(dy)
+    return dy * direction_y >= abs(dx)
+
+
+def in_line(dx: int, dy: int, aim_x: int, aim_y: int, size: int) -> bool:
+    """Returns whether an offset from the caster is within a line.
+
+    A line is one square wide, running from the caster toward the aimed
+    square and on past it up to its length. A square is inside it if the
+    line passes within half a square of its center along the line's major
+    axis.
+
+    Args:
+        dx (int): The offset in squares along x from the caster.
+        dy (int): The offset in squares along y from the caster.
+        aim_x (int): The offset in squares along x of the aimed square.
+        aim_y (int): The offset in squares along y of the aimed square.
+        size (int): The length of the line in feet.
+
+    Returns:
+        bool: True if the offset is inside the line.
+    """
+    if dx * aim_x + dy * aim_y <= 0 or grid_distance(dx, dy) > size:
+        return False
+    return 2 * abs(dx * aim_y - dy * aim_x) <= max(abs(aim_x), abs(aim_y))
+
+
+@cache
+def burst_offsets(size: int) -> tuple[tuple[int, int], ...]:
+    """Returns the offset of every square a burst covers from its center.
+
+    Offsets are ordered nearest first, then by x and y, so that the offsets
+    of a smaller burst are in the same order as in a larger one.
+
+    Args:
+        size (int): The radius of the burst in feet.
+
+    Returns:
+        tuple[tuple[int, int], ...]: Each offset in squares along x and y.
+    """
+    radius = size // 5
+    offsets = [
+        (dx, dy)
+        for dx in range(-radius, radius + 1)
+        for dy in range(-radius, radius + 1)
+        if grid_distance(dx, dy) <= size
+    ]
+    return tuple(sorted(offsets, key=lambda offset: grid_distance(*offset)))
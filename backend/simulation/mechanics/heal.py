@@ -2,6 +2,7 @@
 
 from math import inf
 
+from ..core.events import Event
 from .actions import Action
 from .misc import d8
 
@@ -20,6 +21,8 @@ class Heal(Action):
         bonus: The bonus added to the amount of hit points healed
     """
 
+    __slots__ = ("slots", "bonus", "_target", "_target_version")
+
     def __init__(self, num_heals: int):
         """Initializes a Heal action with `num_heals` number of slots prepared.
 
@@ -33,6 +36,9 @@ class Heal(Action):
         self.range: int = 30
         self.ranged: bool = True
         self.bonus: int = 8
+        # The last ally picked, valid while the encounter's version holds
+        self._target = None
+        self._target_version: int = -1
 
     def calculate_weight(
         self,
@@ -81,28 +87,32 @@ class Heal(Action):
         if caster.calculate_distance(target) > self.range:
             caster.move_to(target, self.range)
 
-        heal_roll = d8.roll()
+        heal_roll = d8.roll(caster.rng)
         total_healing = heal_roll + self.bonus
-        caster.log(
-            f"{caster} cast Heal on {target} for {total_healing} hit points ({heal_roll} + {self.bonus})"  # noqa: E501
-        )
+        if caster.collect_log:
+            caster.log(
+                Event.HEAL,
+                caster,
+                target,
+                total_healing,
+                heal_roll,
+                self.bonus,
+            )
         target.heal(total_healing)
 
         self.slots -= 1
+        caster.clear_weights()
         if self.slots <= 0:
             caster.actions.remove(self)
 
     def _pick_target(self, caster):
-        allies = (
-            caster.encounter.players
-            if caster.team == 1
-            else caster.encounter.enemies
-        )
-
-        most_hurt_ally = allies[0]
+        # Hit points only change along with the encounter's version, so the
+        # ally picked when weighing the heal is reused when casting it
+        version = caster.encounter.version
+        if version == self._target_version:
+            return self._target
 
-        for ally in allies[1:]:
-            if ally.current_hit_points < most_hurt_ally.current_hit_points:
-                most_hurt_ally = ally
+        most_hurt_ally = caster.encounter.teams[caster.team].most_hurt()
 
+        self._target, self._target_version = most_hurt_ally, version
         return most_hurt_ally
@@ -6,13 +6,28 @@ from enum import IntEnum
 
 
 class Die:
-    """Simple class representing a playing die with a set number of faces."""
+    """Simple class representing a playing die with a set number of faces.
+
+    Dice hold no random state of their own, so the same die can be shared by
+    simulations running at the same time, each rolling with its own generator.
+    """
+
+    __slots__ = ("num_sides",)
 
     def __init__(self, num_sides: int):
         self.num_sides = num_sides
 
-    def roll(self):
-        return random.randint(1, self.num_sides)
+    def roll(self, rng: random.Random = random) -> int:
+        """Rolls the die using `rng`.
+
+        Args:
+            rng (random.Random, optional): The random number generator to
+                roll with. Defaults to the random module's shared generator.
+
+        Returns:
+            int: The number rolled, from 1 to `num_sides`.
+        """
+        return rng.randint(1, self.num_sides)
 
 
 class Degree(IntEnum):
@@ -24,9 +39,45 @@ class Degree(IntEnum):
     CRITICAL_SUCCESS = 3
 
 
+def _degree_without_table(roll: int, margin: int) -> Degree:
+    # The rules as written, used to build DEGREE_TABLE
+    if margin >= 10:
+        degree_of_success = Degree.CRITICAL_SUCCESS
+    elif margin >= 0:
+        degree_of_success = Degree.SUCCESS
+    elif margin <= -10:
+        degree_of_success = Degree.CRITICAL_FAILURE
+    else:
+        degree_of_success = Degree.FAILURE
+
+    if roll == 20 and degree_of_success < Degree.CRITICAL_SUCCESS:
+        degree_of_success += 1
+    elif roll == 1 and degree_of_success > Degree.CRITICAL_FAILURE:
+        degree_of_success -= 1
+
+    return Degree(degree_of_success)
+
+
+# Beyond 10 either side of the DC, the degree of success no longer changes
+MAX_MARGIN = 10
+
+# The degree of success for each natural roll (row 0 is a natural 1) and each
+# margin the result beats the DC by, from -MAX_MARGIN to MAX_MARGIN
+DEGREE_TABLE: tuple[tuple[Degree, ...], ...] = tuple(
+    tuple(
+        _degree_without_table(roll, margin)
+        for margin in range(-MAX_MARGIN, MAX_MARGIN + 1)
+    )
+    for roll in range(1, 21)
+)
+
+
 def calculate_dos(roll: int, result: int, difficulty: int) -> int:
     """Uses the given arguments to calculate the degree of success.
 
+    Looks the degree of success up in `DEGREE_TABLE` rather than working it
+    out each time, since it is needed for every attack roll and saving throw.
+
     Args:
         roll (int): The number rolled on the die
         result (int): The total result of the check
@@ -35,22 +86,83 @@ def calculate_dos(roll: int, result: int, difficulty: int) -> int:
     Returns:
         int: A number from 0 to 3 representing the degree of success
     """
-    degree_of_success = 0
-    if result >= difficulty + 10:
-        degree_of_success = Degree.CRITICAL_SUCCESS
-    elif result >= difficulty:
-        degree_of_success = Degree.SUCCESS
-    elif result <= difficulty - 10:
-        degree_of_success = Degree.CRITICAL_FAILURE
-    else:
-        degree_of_success = Degree.FAILURE
+    margin = result - difficulty
+    if margin > MAX_MARGIN:
+        margin = MAX_MARGIN
+    elif margin < -MAX_MARGIN:
+        margin = -MAX_MARGIN
+    return DEGREE_TABLE[roll - 1][margin + MAX_MARGIN]
 
-    if roll == 20 and degree_of_success < Degree.CRITICAL_SUCCESS:
-        degree_of_success += 1
-    elif roll == 1 and degree_of_success > Degree.CRITICAL_FAILURE:
-        degree_of_success -= 1
 
-    return degree_of_success
+def grid_distance(dx: int, dy: int) -> int:
+    """Returns the distance in feet covered by an offset on the grid.
+
+    Follows the PF2E grid rules: each square is 5 feet, and moving
+    diagonally costs 5 feet for the first diagonal and 10 feet for every
+    second one after it.
+
+    Args:
+        dx (int): The offset in squares along the x axis.
+        dy (int): The offset in squares along the y axis.
+
+    Returns:
+        int: The distance in feet.
+    """
+    if dx < 0:
+        dx = -dx
+    if dy < 0:
+        dy = -dy
+    if dx < dy:
+        dx, dy = dy, dx
+    return 5 * (dx + dy // 2)
+
+
+def stride(distance_x: int, distance_y: int, speed: int) -> tuple[int, ...]:
+    """Works out how far one Stride toward a target gets.
+
+    A Stride steps diagonally while the target is more than one square away
+    along both axes, then straight along x, then straight along y, until it
+    is adjacent to the target or out of speed. Every second diagonal costs
+    10 feet and is only taken with more than 10 feet of speed left.
+
+    Args:
+        distance_x (int): The distance to the target in squares along x.
+        distance_y (int): The distance to the target in squares along y.
+        speed (int): The creature's speed in feet.
+
+    Returns:
+        tuple[int, ...]: The number of diagonal steps, straight steps along
+            x, and straight steps along y taken, and the speed left over.
+            Speed is only left over if the creature ended up adjacent.
+    """
+    # Diagonals are taken while both distances are over one square, and
+    # while speed allows: the first of each pair needs any speed left and
+    # the second more than 10 feet, so each pair costs 15 feet
+    diagonals = (distance_x if distance_x < distance_y else distance_y) - 1
+    if speed <= 0 or diagonals <= 0:
+        diagonals = 0
+    elif diagonals > 2 * ((speed - 1) // 15) + 1:
+        diagonals = 2 * ((speed - 1) // 15) + 1
+    speed -= 15 * (diagonals // 2) + 5 * (diagonals % 2)
+
+    # Then straight steps, along x before y, cost 5 feet each while there
+    # is any speed left
+    straight_x = straight_y = 0
+    if speed > 0:
+        steps = (speed + 4) // 5
+        straight_x = distance_x - diagonals - 1
+        if straight_x <= 0:
+            straight_x = 0
+        elif straight_x > steps:
+            straight_x = steps
+        straight_y = distance_y - diagonals - 1
+        if straight_y <= 0:
+            straight_y = 0
+        elif straight_y > steps - straight_x:
+            straight_y = steps - straight_x
+        speed -= 5 * (straight_x + straight_y)
+
+    return diagonals, straight_x, straight_y, speed if speed > 0 else 0
 
 
 # Initializing some common dice so other modules can import them
@@ -0,0 +1,1076 @@
+"""Defines the batch engine, which runs many encounters in lockstep.
+
+The reference engine in `simulation.encounters` plays out one encounter at a
+time with a Python object per creature. The batch engine instead stores the
+state of every simulation in NumPy arrays shaped (simulation x creature), and
+advances all of them together: each creature's turn is resolved across every
+simulation at once, with dice rolled in batches and masks standing in for
+dead creatures and finished simulations.
+
+The batch engine follows the same rules and makes the same decisions as the
+reference engine, so while individual simulations differ, the outcome
+statistics agree within sampling error. It does not record a combat log.
+"""
+
+from typing import Any
+
+import numpy as np
+
+from ..creatures.template import (
+    EnemyTemplate,
+    PlayerTemplate,
+    compile_templates,
+)
+from ..mechanics.areas import CONE_DIRECTIONS, burst_offsets
+from ..mechanics.misc import DEGREE_TABLE, MAX_MARGIN, Degree
+from .tables import (
+    ATTACK,
+    BURST,
+    CONE,
+    EMANATION,
+    HEAL,
+    LINE,
+    RAISE_SHIELD,
+    SPELL,
+    CreatureTables,
+)
+
+
+def run_vectorized_batch(
+    player_dicts: list[dict[str, Any] | PlayerTemplate],
+    enemy_dicts: list[dict[str, Any] | EnemyTemplate],
+    parameters: dict[str, int],
+    num_sims: int,
+    seed: int | list[int] = None,
+    max_rounds: int = 1000,
+) -> dict[str, Any]:
+    """Runs `num_sims` simulations with the batch engine.
+
+    Args:
+        player_dicts (list[dict[str, Any] | PlayerTemplate]): Dictionaries
+            or compiled templates to initialize the players.
+        enemy_dicts (list[dict[str, Any] | EnemyTemplate]): Dictionaries or
+            compiled templates to initialize the enemies.
+        parameters (dict[str, int]): Settings for fine-tuning the simulation,
+            such as starting distance and player health multiplier.
+        num_sims (int): The number of simulations to run.
+        seed (int | list[int], optional): Seeds the random number
+            generator, for reproducible results. Any seed accepted by
+            `np.random.default_rng` can be used. Defaults to None.
+        max_rounds (int, optional): The number of rounds after which any
+            simulation still running is stopped as a draw. Defaults to 1000.
+
+    Returns:
+        dict[str, Any]: The number of simulations, player wins, draws, total
+            players killed, and total rounds, in the same format as a batch
+            from the reference engine, with no data for individual
+            simulations.
+    """
+    players = compile_templates(player_dicts, PlayerTemplate)
+    enemies = compile_templates(enemy_dicts, EnemyTemplate)
+    tables = CreatureTables(
+        players, enemies, parameters.get("health_multiplier", 1.0)
+    )
+    engine = BatchEngine(
+        tables,
+        num_sims,
+        parameters.get("starting_distance", 50),
+        np.random.default_rng(seed),
+    )
+    engine.run(max_rounds)
+
+    return {
+        "total_sims": num_sims,
+        "wins": int(engine.players_won.sum()),
+        "draws": int(engine.running.sum()),
+        "timeouts": 0,
+        "players_killed": int(engine.players_killed.sum()),
+        "rounds": int(engine.rounds.sum()),
+        "sim_data": [],
+    }
+
+
+# DEGREE_TABLE as an array, so many checks can be looked up at once
+DEGREES = np.array(DEGREE_TABLE)
+
+
+def calculate_dos(
+    roll: np.ndarray, result: np.ndarray, difficulty: np.ndarray
+) -> np.ndarray:
+    """Calculates the degree of success of many checks at once.
+
+    Args:
+        roll (np.ndarray): The number rolled on the die for each check.
+        result (np.ndarray): The total result of each check.
+        difficulty (np.ndarray): The DC of each check.
+
+    Returns:
+        np.ndarray: The `Degree` of success of each check.
+    """
+    margin = np.clip(result - difficulty, -MAX_MARGIN, MAX_MARGIN)
+    return DEGREES[roll - 1, margin + MAX_MARGIN]
+
+
+def grid_distance(dx: np.ndarray, dy: np.ndarray) -> np.ndarray:
+    """Returns the distance in feet covered by many offsets on the grid.
+
+    Args:
+        dx (np.ndarray): The offsets in squares along the x axis.
+        dy (np.ndarray): The offsets in squares along the y axis.
+
+    Returns:
+        np.ndarray: The distance in feet of each offset, following the same
+            rules as `simulation.mechanics.misc.grid_distance`.
+    """
+    dx, dy = np.abs(dx), np.abs(dy)
+    return 5 * (np.maximum(dx, dy) + np.minimum(dx, dy) // 2)
+
+
+def stride(
+    distance_x: np.ndarray, distance_y: np.ndarray, speed: np.ndarray
+) -> tuple[np.ndarray, ...]:
+    """Works out how far many Strides toward their targets get at once.
+
+    Args:
+        distance_x (np.ndarray): The distance to each target in squares
+            along x.
+        distance_y (np.ndarray): The distance to each target in squares
+            along y.
+        speed (np.ndarray): The speed in feet of each creature.
+
+    Returns:
+        tuple[np.ndarray, ...]: The diagonal steps, straight steps along x,
+            straight steps along y, and speed left over of each Stride,
+            following the same rules as `simulation.mechanics.misc.stride`.
+    """
+    diagonals = np.minimum(
+        np.maximum(0, 2 * ((speed - 1) // 15) + 1),
+        np.maximum(0, np.minimum(distance_x, distance_y) - 1),
+    )
+    speed = speed - (15 * (diagonals // 2) + 5 * (diagonals % 2))
+
+    steps = np.maximum(0, (speed + 4) // 5)
+    straight_x = np.minimum(steps, np.maximum(0, distance_x - diagonals - 1))
+    straight_y = np.minimum(
+        steps - straight_x, np.maximum(0, distance_y - diagonals - 1)
+    )
+    speed = speed - 5 * (straight_x + straight_y)
+
+    return diagonals, straight_x, straight_y, np.maximum(0, speed)
+
+
+def in_cone(
+    dx: np.ndarray,
+    dy: np.ndarray,
+    direction_x: np.ndarray,
+    direction_y: np.ndarray,
+    size: np.ndarray,
+) -> np.ndarray:
+    """Returns whether many offsets from casters are within cones.
+
+    Args:
+        dx (np.ndarray): The offsets in squares along x from the casters.
+        dy (np.ndarray): The offsets in squares along y from the casters.
+        direction_x (np.ndarray): The direction of each cone along x.
+        direction_y (np.ndarray): The direction of each cone along y.
+        size (np.ndarray): The length of each cone in feet.
+
+    Returns:
+        np.ndarray: Whether each offset is inside its cone, following the
+            same rules as `simulation.mechanics.areas.in_cone`.
+    """
+    along_x = dx * direction_x
+    along_y = dy * direction_y
+    inside = np.where(
+        (direction_x != 0) & (direction_y != 0),
+        (along_x >= 0) & (along_y >= 0),
+        np.where(
+            direction_x != 0, along_x >= np.abs(dy), along_y >= np.abs(dx)
+        ),
+    )
+    return inside & ((dx != 0) | (dy != 0)) & (grid_distance(dx, dy) <= size)
+
+
+def in_line(
+    dx: np.ndarray,
+    dy: np.ndarray,
+    aim_x: np.ndarray,
+    aim_y: np.ndarray,
+    size: np.ndarray,
+) -> np.ndarray:
+    """Returns whether many offsets from casters are within lines.
+
+    Args:
+        dx (np.ndarray): The offsets in squares along x from the casters.
+        dy (np.ndarray): The offsets in squares along y from the casters.
+        aim_x (np.ndarray): The offset along x of each line's aimed square.
+        aim_y (np.ndarray): The offset along y of each line's aimed square.
+        size (np.ndarray): The length of each line in feet.
+
+    Returns:
+        np.ndarray: Whether each offset is inside its line, following the
+            same rules as `simulation.mechanics.areas.in_line`.
+    """
+    ahead = dx * aim_x + dy * aim_y > 0
+    near = 2 * np.abs(dx * aim_y - dy * aim_x) <= np.maximum(
+        np.abs(aim_x), np.abs(aim_y)
+    )
+    return ahead & near & (grid_distance(dx, dy) <= size)
+
+
+class BatchEngine:
+    """The state of a batch of simulations of the same encounter.
+
+    Methods working on a turn take parallel arrays of simulation indexes and
+    creature indexes, one entry per simulation involved, and only ever touch
+    those simulations.
+
+    Attributes:
+        tables: The data describing each creature and its actions.
+        num_sims: The number of simulations in the batch.
+        rng: The random number generator used for every roll.
+        hit_points: Each creature's current hit points.
+        alive: Whether each creature is still in the encounter.
+        armor_class: Each creature's current AC, including a raised shield.
+        shield_raised: Whether each creature has its shield raised.
+        position_x: Each creature's x-coordinate, in 5-foot squares.
+        position_y: Each creature's y-coordinate, in 5-foot squares.
+        slots: The remaining slots of each spell and Heal.
+        removed: Whether each action has been used up and removed.
+        order: The creatures of each simulation in initiative order.
+        running: Whether each simulation is still being played.
+        rounds: The number of rounds each simulation has lasted.
+        players_won: Whether the players won each simulation.
+        players_killed: The number of players killed in each simulation.
+    """
+
+    def __init__(
+        self,
+        tables: CreatureTables,
+        num_sims: int,
+        starting_distance: int,
+        rng: np.random.Generator,
+    ):
+        """Sets up `num_sims` simulations at the start of the encounter.
+
+        Args:
+            tables (CreatureTables): The creatures in the encounter.
+            num_sims (int): The number of simulations to run.
+            starting_distance (int): The distance between the players and
+                enemies at the start of the encounter.
+            rng (np.random.Generator): The random number generator to use.
+        """
+        self.tables: CreatureTables = tables
+        self.num_sims: int = num_sims
+        self.rng: np.random.Generator = rng
+        shape = (num_sims, tables.num_creatures)
+        action_shape = shape + (tables.num_actions,)
+
+        self.hit_points = np.broadcast_to(
+            tables.starting_hit_points, shape
+        ).copy()
+        self.alive = np.ones(shape, dtype=bool)
+        self.armor_class = np.broadcast_to(tables.armor_class, shape).copy()
+        self.shield_raised = np.zeros(shape, dtype=bool)
+        self.slots = np.broadcast_to(tables.slots, action_shape).copy()
+        self.removed = np.broadcast_to(tables.kind == 0, action_shape).copy()
+
+        # Players line up at x = 0, enemies at the starting distance
+        is_enemy = tables.team == 2
+        line_position = np.where(
+            is_enemy,
+            np.arange(tables.num_creatures) - (~is_enemy).sum(),
+            np.arange(tables.num_creatures),
+        )
+        self.position_x = np.broadcast_to(
+            np.where(is_enemy, starting_distance // 5, 0), shape
+        ).copy()
+        self.position_y = np.broadcast_to(line_position, shape).copy()
+
+        # Highest initiative first, enemies win ties, then creature order
+        initiative = self._roll(20, shape) + tables.initiative_bonus
+        creature_index = np.broadcast_to(
+            np.arange(tables.num_creatures), shape
+        )
+        team = np.broadcast_to(tables.team, shape)
+        self.order = np.lexsort((creature_index, -team, -initiative))
+
+        self.running = self._both_teams_alive(np.arange(num_sims))
+        self.rounds = np.zeros(num_sims, dtype=np.int64)
+        self.players_won = np.zeros(num_sims, dtype=bool)
+        self.players_killed = np.zeros(num_sims, dtype=np.int64)
+
+    # Public Methods
+
+    def run(self, max_rounds: int = 1000) -> None:
+        """Plays rounds until every simulation has a winner.
+
+        Args:
+            max_rounds (int, optional): The number of rounds after which any
+                simulation still running is stopped. Defaults to 1000.
+        """
+        while self.running.any() and self.rounds.max() < max_rounds:
+            self.rounds[self.running] += 1
+            for turn in range(self.tables.num_creatures):
+                sims = np.flatnonzero(self.running)
+                creatures = self.order[sims, turn]
+                taking_turn = self.alive[sims, creatures]
+                self._take_turn(sims[taking_turn], creatures[taking_turn])
+
+        self.players_won = self._team_alive(np.arange(self.num_sims), 1) & ~(
+            self._team_alive(np.arange(self.num_sims), 2)
+        )
+
+    # Private Methods
+
+    def _take_turn(self, sims: np.ndarray, creatures: np.ndarray) -> None:
+        tables = self.tables
+        has_actions = (~self.removed[sims, creatures]).any(axis=1)
+        sims, creatures = sims[has_actions], creatures[has_actions]
+
+        num_actions = np.full(len(sims), 3)
+        multi_attack = np.zeros(len(sims), dtype=np.int64)
+
+        raised = self.shield_raised[sims, creatures]
+        self.armor_class[
+            sims[raised], creatures[raised]
+        ] -= tables.shield_value[creatures[raised]]
+        self.shield_raised[sims, creatures] = False
+
+        acting = (num_actions > 0) & self._both_teams_alive(sims)
+        while acting.any():
+            num_actions[acting], multi_attack[acting] = self._perform_action(
+                sims[acting],
+                creatures[acting],
+                num_actions[acting],
+                multi_attack[acting],
+            )
+            acting = (num_actions > 0) & self._both_teams_alive(sims)
+
+        self.running[sims] = self._both_teams_alive(sims)
+
+    def _perform_action(
+        self,
+        sims: np.ndarray,
+        creatures: np.ndarray,
+        num_actions: np.ndarray,
+        multi_attack: np.ndarray,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        tables = self.tables
+        available = ~self.removed[sims, creatures]
+        # The reference engine fails if a creature runs out of actions
+        # mid-turn, here its turn just ends
+        no_actions = ~available.any(axis=1)
+        num_actions[no_actions] = 0
+
+        opponents = self._opponents(sims, creatures)
+        distances = self._distances(sims, creatures)
+        in_melee = (opponents & (distances <= 5)).any(axis=1)
+
+        weights = self._action_weights(
+            sims, creatures, num_actions, multi_attack, in_melee
+        )
+        # The first action with the highest weight is picked, or the first
+        # available action if none are valid
+        actions = weights.argmax(axis=1)
+        none_valid = np.isneginf(weights.max(axis=1))
+        actions[none_valid] = available[none_valid].argmax(axis=1)
+
+        kind = np.where(no_actions, 0, tables.kind[creatures, actions])
+        cost = tables.cost[creatures, actions]
+        pays_cost = kind != 0
+
+        strike = kind == ATTACK
+        if strike.any():
+            num_actions[strike], multi_attack[strike], attacked = self._strike(
+                sims[strike],
+                creatures[strike],
+                actions[strike],
+                num_actions[strike],
+                multi_attack[strike],
+            )
+            pays_cost[strike] = attacked
+
+        spell = kind == SPELL
+        if spell.any():
+            num_actions[spell] = self._cast_spell(
+                sims[spell],
+                creatures[spell],
+                actions[spell],
+                num_actions[spell],
+            )
+
+        heal = kind == HEAL
+        if heal.any():
+            num_actions[heal] = self._cast_heal(
+                sims[heal], creatures[heal], actions[heal], num_actions[heal]
+            )
+
+        shield = kind == RAISE_SHIELD
+        if shield.any():
+            shield_sims, shield_creatures = sims[shield], creatures[shield]
+            self.armor_class[
+                shield_sims, shield_creatures
+            ] += tables.shield_value[shield_creatures]
+            self.shield_raised[shield_sims, shield_creatures] = True
+
+        num_actions = num_actions - np.where(pays_cost, cost, 0)
+        return num_actions, multi_attack
+
+    def _action_weights(
+        self,
+        sims: np.ndarray,
+        creatures: np.ndarray,
+        num_actions: np.ndarray,
+        multi_attack: np.ndarray,
+        in_melee: np.ndarray,
+    ) -> np.ndarray:
+        tables = self.tables
+        kind = tables.kind[creatures]
+        slots = self.slots[sims, creatures]
+
+        valid = ~self.removed[sims, creatures]
+        valid &= tables.cost[creatures] <= num_actions[:, None]
+        valid &= ~(((kind == SPELL) | (kind == HEAL)) & (slots <= 0))
+        valid &= ~(
+            (kind == RAISE_SHIELD)
+            & self.shield_raised[sims, creatures][:, None]
+        )
+        damaging = (kind == ATTACK) | (kind == SPELL)
+        valid &= ~damaging | self._valid_actions(sims, creatures)
+
+        base_weight = tables.weight[creatures]
+
+        # Strikes are worth less with a multiple attack penalty, and ranged
+        # Strikes are worthless while in melee
+        penalty = (
+            np.where(tables.agile[creatures], 4, 5) * multi_attack[:, None]
+        )
+        strike_weight = np.maximum(base_weight - penalty, 0)
+        strike_weight = np.where(
+            penalty >= 8, strike_weight * 0.5, strike_weight
+        )
+        strike_weight = np.where(
+            in_melee[:, None] & tables.ranged[creatures], 0, strike_weight
+        )
+
+        spell_weight = np.where(
+            tables.spell_level[creatures] == 0,
+            base_weight * 1.5,
+            base_weight * slots,
+        )
+        spell_weight += tables.spell_weight[creatures]
+
+        # Heal is worth more the more hurt the most hurt ally is
+        allies = self.alive[sims] & (
+            tables.team[None, :] == tables.team[creatures][:, None]
+        )
+        lowest_hit_points = np.where(allies, self.hit_points[sims], np.inf)
+        heal_weight = tables.heal_weight - lowest_hit_points.min(axis=1)
+
+        weights = np.select(
+            [kind == ATTACK, kind == SPELL, kind == HEAL],
+            [strike_weight, spell_weight, heal_weight[:, None]],
+            base_weight,
+        )
+        return np.where(valid, weights, -np.inf)
+
+    def _valid_actions(
+        self, sims: np.ndarray, creatures: np.ndarray
+    ) -> np.ndarray:
+        # Whether each action's damage type can hurt any of the enemies
+        tables = self.tables
+        players = tables.team[creatures] == 1
+        enemies = self.alive[sims] & (tables.team == 2)[None, :]
+        immune = tables.action_immune[creatures]
+        vitality = tables.damage_type[creatures] == tables.vitality
+
+        all_immune = ~((~immune) & enemies[:, None, :]).any(axis=2)
+        any_undead = (enemies & tables.undead[None, :]).any(axis=1)
+        player_valid = ~all_immune & (~vitality | any_undead[:, None])
+
+        # Only players can use vitality damage, since players are not undead
+        return np.where(players[:, None], player_valid, ~vitality)
+
+    def _valid_targets(
+        self, sims: np.ndarray, creatures: np.ndarray, actions: np.ndarray
+    ) -> np.ndarray:
+        # Whether each action's damage type can hurt each target
+        tables = self.tables
+        players = tables.team[creatures] == 1
+        enemies = self.alive[sims] & (tables.team == 2)[None, :]
+        immune = tables.action_immune[creatures, actions]
+        vitality = tables.damage_type[creatures, actions] == tables.vitality
+
+        all_immune = ~((~immune) & enemies).any(axis=1)
+        player_valid = (
+            ~immune
+            & ~all_immune[:, None]
+            & (~vitality[:, None] | tables.undead[None, :])
+        )
+        return np.where(players[:, None], player_valid, ~vitality[:, None])
+
+    def _pick_targets(
+        self, sims: np.ndarray, creatures: np.ndarray, actions: np.ndarray
+    ) -> np.ndarray:
+        # The most valuable target, preferring those already in range
+        tables = self.tables
+        opponents = self._opponents(sims, creatures)
+        distances = self._distances(sims, creatures)
+        action_range = tables.range[creatures, actions]
+
+        in_range = opponents & (distances <= action_range[:, None])
+        any_in_range = in_range.any(axis=1)
+        candidates = np.where(any_in_range[:, None], in_range, opponents)
+
+        damage_taken = tables.max_hit_points[None, :] - self.hit_points[sims]
+        weights = (damage_taken * tables.level[None, :]).astype(float)
+        weights -= np.where(any_in_range[:, None], 0, distances / 5)
+
+        damage_type = tables.damage_type[creatures, actions][:, None]
+        target_index = np.arange(tables.num_creatures)[None, :]
+        resistant = tables.resistant[target_index, damage_type]
+        weak = tables.weak[target_index, damage_type]
+        weights = np.where(resistant, weights / 2, weights)
+        weights = np.where(weak, weights * 2, weights)
+
+        valid = self._valid_targets(sims, creatures, actions)
+        weights = np.where(valid & candidates, weights, -np.inf)
+
+        targets = weights.argmax(axis=1)
+        none_valid = np.isneginf(weights.max(axis=1))
+        targets[none_valid] = candidates[none_valid].argmax(axis=1)
+        return targets
+
+    def _strike(
+        self,
+        sims: np.ndarray,
+        creatures: np.ndarray,
+        actions: np.ndarray,
+        num_actions: np.ndarray,
+        multi_attack: np.ndarray,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        tables = self.tables
+        targets = self._pick_targets(sims, creatures, actions)
+        distance = self._distance(sims, creatures, targets)
+        action_range = tables.range[creatures, actions]
+
+        out_of_range = distance > action_range
+        if out_of_range.any():
+            num_actions[out_of_range] = self._move_to(
+                sims[out_of_range],
+                creatures[out_of_range],
+                targets[out_of_range],
+                action_range[out_of_range],
+                num_actions[out_of_range],
+            )
+
+        # Moving can use up the turn before the Strike is made
+        attacks = ~(out_of_range & (num_actions <= 0))
+        multi_attack[attacks] = self._attack(
+            sims[attacks],
+            creatures[attacks],
+            actions[attacks],
+            targets[attacks],
+            multi_attack[attacks],
+        )
+        return num_actions, multi_attack, attacks
+
+    def _attack(
+        self,
+        sims: np.ndarray,
+        creatures: np.ndarray,
+        actions: np.ndarray,
+        targets: np.ndarray,
+        multi_attack: np.ndarray,
+    ) -> np.ndarray:
+        tables = self.tables
+        n = len(sims)
+        strike = tables.kind[creatures, actions] == ATTACK
+        auto_hit = tables.auto_hit[creatures, actions]
+
+        roll = self._roll(20, n)
+        penalty = np.where(tables.agile[creatures, actions], 4, 5)
+        penalty = np.where(strike, penalty * multi_attack, 0)
+        bonus = np.where(
+            strike,
+            tables.attack_bonus[creatures, actions],
+            tables.spell_attack_bonus[creatures],
+        )
+        total = np.maximum(roll + bonus - penalty, 1)
+        degree = calculate_dos(roll, total, self.armor_class[sims, targets])
+        degree = np.where(auto_hit, Degree.SUCCESS, degree)
+        multi_attack = multi_attack + (strike & ~auto_hit)
+
+        damage = self._roll_damage(creatures, actions)
+
+        sneak_attack = (
+            tables.sneak_attack[creatures] & tables.finesse[creatures, actions]
+        )
+        damage += np.where(sneak_attack, self._roll(6, n), 0)
+
+        critical_hit = (degree == Degree.CRITICAL_SUCCESS) & ~(
+            tables.critical_immune[targets]
+        )
+        deadly = tables.deadly[creatures, actions]
+        deadly_roll = np.where(
+            deadly > 0, self._roll(np.maximum(deadly, 1)), 0
+        )
+        damage = np.where(critical_hit, damage * 2 + deadly_roll, damage)
+
+        hit = degree >= Degree.SUCCESS
+        self._take_damage(
+            sims[hit],
+            targets[hit],
+            damage[hit],
+            tables.damage_type[creatures, actions][hit],
+        )
+        return multi_attack
+
+    def _cast_spell(
+        self,
+        sims: np.ndarray,
+        creatures: np.ndarray,
+        actions: np.ndarray,
+        num_actions: np.ndarray,
+    ) -> np.ndarray:
+        tables = self.tables
+        cast = np.ones(len(sims), dtype=bool)
+
+        area = tables.area[creatures, actions]
+        if area.any():
+            num_actions[area], cast[area] = self._cast_area(
+                sims[area], creatures[area], actions[area], num_actions[area]
+            )
+
+        targeted = ~area & (tables.targets[creatures, actions] > 0)
+        if targeted.any():
+            num_actions[targeted], cast[targeted] = self._cast_targeted(
+                sims[targeted],
+                creatures[targeted],
+                actions[targeted],
+                num_actions[targeted],
+            )
+
+        # Leveled spells use up a slot, and are removed once out of slots
+        leveled = cast & (tables.spell_level[creatures, actions] >= 1)
+        self.slots[sims[leveled], creatures[leveled], actions[leveled]] -= 1
+        empty = leveled & (self.slots[sims, creatures, actions] <= 0)
+        self.removed[sims[empty], creatures[empty], actions[empty]] = True
+        return num_actions
+
+    def _cast_area(
+        self,
+        sims: np.ndarray,
+        creatures: np.ndarray,
+        actions: np.ndarray,
+        num_actions: np.ndarray,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        # Aims each area where it covers the most opponents, moving closer
+        # first if it would cover none, and returns the actions left and
+        # whether each spell was cast
+        tables = self.tables
+        covered = self._area_coverage(sims, creatures, actions)
+
+        moving = ~covered.any(axis=1)
+        if moving.any():
+            # Bursts are centered on a square within range
+            reach = np.where(
+                tables.area_shape[creatures, actions] == BURST,
+                tables.range[creatures, actions],
+                tables.area_size[creatures, actions],
+            )
+            targets = self._pick_targets(
+                sims[moving], creatures[moving], actions[moving]
+            )
+            num_actions[moving] = self._move_to(
+                sims[moving],
+                creatures[moving],
+                targets,
+                reach[moving],
+                num_actions[moving],
+            )
+            covered[moving] = self._area_coverage(
+                sims[moving], creatures[moving], actions[moving]
+            )
+
+        cast = covered.any(axis=1) & (
+            num_actions >= tables.cost[creatures, actions]
+        )
+        damage = self._roll_damage(creatures, actions)
+        for target in range(tables.num_creatures):
+            saving = cast & covered[:, target]
+            if saving.any():
+                self._spell_save(
+                    sims[saving],
+                    creatures[saving],
+                    actions[saving],
+                    np.full(saving.sum(), target),
+                    damage[saving],
+                )
+
+        return num_actions, cast
+
+    def _area_coverage(
+        self, sims: np.ndarray, creatures: np.ndarray, actions: np.ndarray
+    ) -> np.ndarray:
+        # The opponents covered by each area, aimed to cover the most of
+        # them with ties going to the first aim, like the reference engine
+        tables = self.tables
+        opponents = self._opponents(sims, creatures)
+        x, y = self.position_x[sims], self.position_y[sims]
+        dx = x - self.position_x[sims, creatures][:, None]
+        dy = y - self.position_y[sims, creatures][:, None]
+        shape = tables.area_shape[creatures, actions]
+        size = tables.area_size[creatures, actions][:, None]
+        nearby = opponents & (grid_distance(dx, dy) <= size)
+
+        # Each possible aim of each area but bursts, shaped (sim, aim, target)
+        aims = np.zeros(
+            (len(sims), max(len(CONE_DIRECTIONS), tables.num_creatures))
+            + opponents.shape[1:],
+            dtype=bool,
+        )
+        emanation = shape == EMANATION
+        aims[emanation, 0] = nearby[emanation]
+
+        cone = shape == CONE
+        if cone.any():
+            direction_x, direction_y = np.array(CONE_DIRECTIONS).T
+            aims[cone, : len(CONE_DIRECTIONS)] = nearby[cone][
+                :, None, :
+            ] & in_cone(
+                dx[cone][:, None, :],
+                dy[cone][:, None, :],
+                direction_x[None, :, None],
+                direction_y[None, :, None],
+                size[cone][:, None],
+            )
+
+        # Lines are aimed at an opponent near enough to hit
+        line = shape == LINE
+        if line.any():
+            aims[line, : tables.num_creatures] = (
+                nearby[line][:, :, None]
+                & nearby[line][:, None, :]
+                & in_line(
+                    dx[line][:, None, :],
+                    dy[line][:, None, :],
+                    dx[line][:, :, None],
+                    dy[line][:, :, None],
+                    size[line][:, None],
+                )
+            )
+
+        best = aims.sum(axis=2).argmax(axis=1)
+        covered = aims[np.arange(len(sims)), best]
+
+        burst = shape == BURST
+        if burst.any():
+            covered[burst] = self._burst_coverage(
+                sims[burst], creatures[burst], actions[burst]
+            )
+        return covered
+
+    def _burst_coverage(
+        self, sims: np.ndarray, creatures: np.ndarray, actions: np.ndarray
+    ) -> np.ndarray:
+        # The opponents covered by each burst, centered on the square in
+        # range covering the most of them. Like the reference engine, the
+        # squares tried are those within the burst of each opponent in turn,
+        # with ties going to the first square tried.
+        tables = self.tables
+        opponents = self._opponents(sims, creatures)
+        x, y = self.position_x[sims], self.position_y[sims]
+        caster_x = self.position_x[sims, creatures][:, None]
+        caster_y = self.position_y[sims, creatures][:, None]
+        spell_range = tables.range[creatures, actions][:, None]
+        size = tables.area_size[creatures, actions][:, None]
+
+        offset_x, offset_y = np.array(burst_offsets(int(size.max()))).T
+        in_burst = grid_distance(offset_x, offset_y) <= size
+        rows = np.arange(len(sims))
+
+        best = np.zeros(len(sims), dtype=int)
+        covered = np.zeros(opponents.shape, dtype=bool)
+        for opponent in range(tables.num_creatures):
+            # Each square around the opponent, shaped (sim, square)
+            center_x = x[:, opponent, None] + offset_x
+            center_y = y[:, opponent, None] + offset_y
+            centers = (
+                opponents[:, opponent, None]
+                & in_burst
+                & (
+                    grid_distance(center_x - caster_x, center_y - caster_y)
+                    <= spell_range
+                )
+            )
+            # Shaped (sim, square, target)
+            cover = (
+                centers[:, :, None]
+                & opponents[:, None, :]
+                & (
+                    grid_distance(
+                        x[:, None, :] - center_x[:, :, None],
+                        y[:, None, :] - center_y[:, :, None],
+                    )
+                    <= size[:, :, None]
+                )
+            )
+            counts = cover.sum(axis=2)
+            square = counts.argmax(axis=1)
+            better = counts[rows, square] > best
+            best[better] = counts[rows, square][better]
+            covered[better] = cover[better, square[better]]
+
+        return covered
+
+    def _cast_targeted(
+        self,
+        sims: np.ndarray,
+        creatures: np.ndarray,
+        actions: np.ndarray,
+        num_actions: np.ndarray,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        tables = self.tables
+        targets = self._pick_targets(sims, creatures, actions)
+        action_range = tables.range[creatures, actions]
+
+        moving = self._distance(sims, creatures, targets) > action_range
+        if moving.any():
+            num_actions[moving] = self._move_to(
+                sims[moving],
+                creatures[moving],
+                targets[moving],
+                action_range[moving],
+                num_actions[moving],
+            )
+
+        # The spell fizzles if the caster can't reach or afford it
+        cast = (num_actions > tables.cost[creatures, actions]) & (
+            self._distance(sims, creatures, targets) <= action_range
+        )
+        saved = tables.save[creatures, actions] >= 0
+
+        # Every target is the same creature, since nothing changes between
+        # picks. Stop once the target has died.
+        num_targets = tables.targets[creatures, actions]
+        for i in range(num_targets.max()):
+            hitting = cast & self.alive[sims, targets] & (num_targets > i)
+            save = hitting & saved
+            if save.any():
+                damage = self._roll_damage(creatures[save], actions[save])
+                self._spell_save(
+                    sims[save],
+                    creatures[save],
+                    actions[save],
+                    targets[save],
+                    damage,
+                )
+            attack = hitting & ~saved
+            if attack.any():
+                self._attack(
+                    sims[attack],
+                    creatures[attack],
+                    actions[attack],
+                    targets[attack],
+                    np.zeros(attack.sum(), dtype=np.int64),
+                )
+
+        return num_actions, cast
+
+    def _spell_save(
+        self,
+        sims: np.ndarray,
+        creatures: np.ndarray,
+        actions: np.ndarray,
+        targets: np.ndarray,
+        damage: np.ndarray,
+    ) -> None:
+        tables = self.tables
+        roll = self._roll(20, len(sims))
+        save = tables.save[creatures, actions]
+        total = roll + tables.saves[targets, save]
+        degree = calculate_dos(roll, total, tables.spell_dc[creatures])
+
+        damage_taken = np.select(
+            [
+                degree == Degree.CRITICAL_SUCCESS,
+                degree == Degree.SUCCESS,
+                degree == Degree.FAILURE,
+            ],
+            [0, damage // 2, damage],
+            damage * 2,
+        )
+        hurt = degree != Degree.CRITICAL_SUCCESS
+        self._take_damage(
+            sims[hurt],
+            targets[hurt],
+            damage_taken[hurt],
+            tables.damage_type[creatures, actions][hurt],
+        )
+
+    def _cast_heal(
+        self,
+        sims: np.ndarray,
+        creatures: np.ndarray,
+        actions: np.ndarray,
+        num_actions: np.ndarray,
+    ) -> np.ndarray:
+        # Heals the most hurt ally, moving to them if necessary
+        tables = self.tables
+        allies = self.alive[sims] & (
+            tables.team[None, :] == tables.team[creatures][:, None]
+        )
+        targets = np.where(allies, self.hit_points[sims], np.inf).argmin(
+            axis=1
+        )
+
+        heal_range = np.full(len(sims), tables.heal_range)
+        moving = self._distance(sims, creatures, targets) > heal_range
+        if moving.any():
+            num_actions[moving] = self._move_to(
+                sims[moving],
+                creatures[moving],
+                targets[moving],
+                heal_range[moving],
+                num_actions[moving],
+            )
+
+        healing = self._roll(8, len(sims)) + tables.heal_bonus
+        self.hit_points[sims, targets] = np.minimum(
+            self.hit_points[sims, targets] + healing,
+            tables.max_hit_points[targets],
+        )
+
+        self.slots[sims, creatures, actions] -= 1
+        empty = self.slots[sims, creatures, actions] <= 0
+        self.removed[sims[empty], creatures[empty], actions[empty]] = True
+        return num_actions
+
+    def _take_damage(
+        self,
+        sims: np.ndarray,
+        targets: np.ndarray,
+        damage: np.ndarray,
+        damage_type: np.ndarray,
+    ) -> None:
+        tables = self.tables
+        immune = tables.immune[targets, damage_type]
+        weak = tables.weak[targets, damage_type]
+        resist_all = tables.has_resist_all[targets]
+        resistant = tables.resistant[targets, damage_type]
+
+        damage = np.select(
+            [weak, resist_all, resistant],
+            [
+                damage + tables.weakness[targets, damage_type],
+                np.maximum(damage - tables.resist_all[targets], 1),
+                np.maximum(
+                    damage - tables.resistance[targets, damage_type], 1
+                ),
+            ],
+            damage,
+        )
+        damage = np.where(immune, 0, damage)
+        np.subtract.at(self.hit_points, (sims, targets), damage)
+
+        # Vitality damage never kills a creature that isn't undead
+        vitality_invalid = (damage_type == tables.vitality) & ~(
+            tables.undead[targets]
+        )
+        dies = (
+            ~immune
+            & ~vitality_invalid
+            & self.alive[sims, targets]
+            & (self.hit_points[sims, targets] <= 0)
+        )
+        self.alive[sims[dies], targets[dies]] = False
+        players = dies & (tables.team[targets] == 1)
+        np.add.at(self.players_killed, sims[players], 1)
+
+    def _move_to(
+        self,
+        sims: np.ndarray,
+        creatures: np.ndarray,
+        targets: np.ndarray,
+        action_range: np.ndarray,
+        num_actions: np.ndarray,
+    ) -> np.ndarray:
+        # Strides toward each target exactly like the reference engine,
+        # returning the actions left afterwards
+        x = self.position_x[sims, creatures]
+        y = self.position_y[sims, creatures]
+        target_x = self.position_x[sims, targets]
+        target_y = self.position_y[sims, targets]
+        speed = self.tables.speed[creatures]
+
+        moving = num_actions > 0
+        while moving.any():
+            dx = target_x - x
+            dy = target_y - y
+            moving &= grid_distance(dx, dy) > action_range
+
+            diagonals, straight_x, straight_y, speed_remaining = stride(
+                np.abs(dx), np.abs(dy), speed
+            )
+            x = x + np.where(moving, np.sign(dx) * (diagonals + straight_x), 0)
+            y = y + np.where(moving, np.sign(dy) * (diagonals + straight_y), 0)
+
+            # Reaching the target with speed left ends movement
+            num_actions = num_actions - moving
+            moving &= (num_actions > 0) & (speed_remaining <= 0)
+
+        self.position_x[sims, creatures] = x
+        self.position_y[sims, creatures] = y
+        return num_actions
+
+    def _roll_damage(
+        self, creatures: np.ndarray, actions: np.ndarray
+    ) -> np.ndarray:
+        tables = self.tables
+        num_dice = tables.num_dice[creatures, actions]
+        die_size = tables.die_size[creatures, actions]
+        max_dice = num_dice.max(initial=0)
+        rolls = self.rng.integers(
+            1, die_size[:, None] + 1, size=(len(creatures), max_dice)
+        )
+        rolled = np.arange(max_dice)[None, :] < num_dice[:, None]
+        return (
+            np.where(rolled, rolls, 0).sum(axis=1)
+            + tables.damage_bonus[creatures, actions]
+        )
+
+    def _roll(self, die_size, size=None) -> np.ndarray:
+        if size is None:
+            size = np.shape(die_size)
+        return self.rng.integers(1, np.asarray(die_size) + 1, size=size)
+
+    def _opponents(
+        self, sims: np.ndarray, creatures: np.ndarray
+    ) -> np.ndarray:
+        team = self.tables.team
+        return self.alive[sims] & (team[None, :] != team[creatures][:, None])
+
+    def _team_alive(self, sims: np.ndarray, team: int) -> np.ndarray:
+        return (self.alive[sims] & (self.tables.team == team)[None, :]).any(
+            axis=1
+        )
+
+    def _both_teams_alive(self, sims: np.ndarray) -> np.ndarray:
+        return self._team_alive(sims, 1) & self._team_alive(sims, 2)
+
+    def _distances(
+        self, sims: np.ndarray, creatures: np.ndarray
+    ) -> np.ndarray:
+        # Distance in feet from each creature to every creature
+        dx = self.position_x[sims] - self.position_x[sims, creatures][:, None]
+        dy = self.position_y[sims] - self.position_y[sims, creatures][:, None]
+        return grid_distance(dx, dy)
+
+    def _distance(
+        self, sims: np.ndarray, creatures: np.ndarray, targets: np.ndarray
+    ) -> np.ndarray:
+        dx = self.position_x[sims, targets] - self.position_x[sims, creatures]
+        dy = self.position_y[sims, targets] - self.position_y[sims, creatures]
+        return grid_distance(dx, dy)
@@ -0,0 +1,319 @@
+"""Defines the tables of creature and action data used by the batch engine.
+
+The batch engine works on NumPy arrays rather than objects, so every creature
+in an encounter is flattened into a row of `CreatureTables`, and every action
+a creature can take into a cell of its (creature x action) tables. The tables
+are built from compiled creature templates and never change while the
+simulations run.
+"""
+
+import math
+
+import numpy as np
+
+from ..creatures.template import (
+    CreatureTemplate,
+    EnemyTemplate,
+    PlayerTemplate,
+)
+from ..mechanics.actions import Attack, Spell
+from ..mechanics.heal import Heal
+
+# Kinds of action
+NO_ACTION = 0
+ATTACK = 1
+SPELL = 2
+HEAL = 3
+RAISE_SHIELD = 4
+
+SAVES = ("fortitude", "reflex", "will")
+
+# Divides a spell's area size to give its abstract number of targets
+AREA_DIVISORS = {"burst": 5, "cone": 10, "emanation": 5, "line": 30}
+
+# Shapes of area, indexes into `area_shape`
+AREA_SHAPES = ("burst", "cone", "emanation", "line")
+BURST, CONE, EMANATION, LINE = range(len(AREA_SHAPES))
+
+DEADLY_DICE = {"deadly-d6": 6, "deadly-d8": 8, "deadly-d10": 10}
+
+AUTO_HIT_SPELLS = ("force barrage", "force bolt")
+
+
+class CreatureTables:
+    """Arrays describing every creature in an encounter and their actions.
+
+    Creatures are indexed with the players first, in order, followed by the
+    enemies. Actions are indexed in the order the reference engine considers
+    them: attacks, spells, Heal, then Raise Shield. Creatures with fewer
+    actions than the most of any creature are padded with `NO_ACTION`.
+
+    Attributes:
+        num_creatures: The number of creatures in the encounter.
+        num_actions: The number of action columns in the action tables.
+        team: 1 for each player and 2 for each enemy.
+        level: Each creature's level.
+        max_hit_points: Each creature's maximum hit points.
+        starting_hit_points: Each creature's hit points at the start of the
+            encounter, after the players' health multiplier is applied.
+        speed: Each creature's speed in feet.
+        armor_class: Each creature's Armor Class without a shield raised.
+        initiative_bonus: The modifier each creature rolls initiative with.
+        saves: Each creature's Fortitude, Reflex, and Will modifiers.
+        spell_attack_bonus: Each creature's spell attack bonus, or 0.
+        spell_dc: Each creature's spell DC, or 0.
+        sneak_attack: Whether each creature has sneak attack.
+        shield_value: The AC bonus of each creature's shield, or 0.
+        undead: Whether each creature has the undead trait.
+        critical_immune: Whether each creature is immune to critical hits.
+        damage_types: Every damage type used by an action, indexed by the
+            action tables' `damage_type`.
+        vitality: The index of vitality damage in `damage_types`, or -1.
+        immune: Whether each creature is immune to each damage type.
+        weak: Whether each creature is weak to each damage type.
+        weakness: Each creature's weakness to each damage type, or 0.
+        resistant: Whether each creature resists each damage type.
+        resistance: Each creature's resistance to each damage type, or 0.
+        resist_all: Each creature's resistance to all damage, or 0.
+        kind: The kind of each action.
+        cost: The number of actions each action uses.
+        weight: The base weight of each action, before it is adjusted for the
+            situation it is used in.
+        spell_weight: The flat amount added to each spell's weight.
+        range: The range of each action in feet.
+        ranged: Whether each action can be used at a distance.
+        agile: Whether each action has the agile trait.
+        finesse: Whether each action has the finesse trait.
+        deadly: The die size of each action's deadly trait, or 0.
+        attack_bonus: Each Strike's attack bonus.
+        num_dice: The number of damage dice each action rolls.
+        die_size: The size of each action's damage dice.
+        damage_bonus: The bonus added to each action's damage.
+        damage_type: The index of each action's damage type.
+        auto_hit: Whether each action hits without an attack roll.
+        spell_level: Each spell's level.
+        slots: The number of slots each spell or Heal starts with.
+        area: Whether each spell has an area.
+        area_targets: The abstract number of targets of each area spell,
+            used to weigh it.
+        area_shape: The index in `AREA_SHAPES` of each area spell's shape.
+        area_size: The size of each area spell's area in feet.
+        targets: The number of targets of each targeted spell.
+        save: The index in `SAVES` of each spell's save, or -1.
+        heal_weight: The base weight of the Heal action.
+        heal_range: The range of the Heal action in feet.
+        heal_bonus: The bonus added to the hit points healed by Heal.
+        action_immune: Whether each target is immune to the damage type of
+            each action of each creature, shaped (creature, action, target).
+    """
+
+    def __init__(
+        self,
+        players: list[PlayerTemplate],
+        enemies: list[EnemyTemplate],
+        health_multiplier: float = 1.0,
+    ):
+        """Builds the tables for an encounter between `players` and `enemies`.
+
+        Args:
+            players (list[PlayerTemplate]): The players' compiled templates.
+            enemies (list[EnemyTemplate]): The enemies' compiled templates.
+            health_multiplier (float, optional): A multiplier applied to the
+                players' hit points at the start of the encounter. Defaults to
+                1.0.
+        """
+        templates = list(players) + list(enemies)
+        self.num_creatures: int = len(templates)
+        action_lists = [
+            template.new_actions(template.spells) for template in templates
+        ]
+        self.num_actions: int = max(
+            [len(actions) for actions in action_lists], default=0
+        )
+
+        self._build_creatures(players, enemies, health_multiplier)
+        self._build_damage_types(templates, action_lists)
+        self._build_actions(templates, action_lists)
+
+    # Private Methods
+
+    def _build_creatures(
+        self,
+        players: list[PlayerTemplate],
+        enemies: list[EnemyTemplate],
+        health_multiplier: float,
+    ) -> None:
+        templates = list(players) + list(enemies)
+        self.team = np.array([1] * len(players) + [2] * len(enemies))
+        self.level = np.array([t.level for t in templates])
+        self.max_hit_points = np.array([t.max_hit_points for t in templates])
+        self.starting_hit_points = np.array(
+            [math.floor(t.max_hit_points * health_multiplier) for t in players]
+            + [t.max_hit_points for t in enemies],
+            dtype=np.int64,
+        )
+        self.speed = np.array([t.speed for t in templates])
+        self.armor_class = np.array([t.armor_class for t in templates])
+        self.initiative_bonus = np.array(
+            [max(t.skills.stealth, t.perception) for t in templates]
+        )
+        self.saves = np.array(
+            [[getattr(t, save) for save in SAVES] for t in templates]
+        ).reshape(self.num_creatures, len(SAVES))
+        self.spell_attack_bonus = np.array(
+            [t.spell_attack_bonus or 0 for t in templates]
+        )
+        self.spell_dc = np.array([t.spell_dc or 0 for t in templates])
+        self.sneak_attack = np.array([t.sneak_attack for t in templates])
+        self.shield_value = np.array([t.shield_value or 0 for t in templates])
+        self.undead = np.array(
+            [_is_enemy(t) and "undead" in t.traits for t in templates],
+            dtype=bool,
+        )
+        self.critical_immune = np.array(
+            [
+                _is_enemy(t) and "critical-hits" in t.immunities
+                for t in templates
+            ],
+            dtype=bool,
+        )
+
+    def _build_damage_types(
+        self, templates: list[CreatureTemplate], action_lists: list[list]
+    ) -> None:
+        damage_types = sorted(
+            {
+                action.damage_type
+                for actions in action_lists
+                for action in actions
+                if isinstance(action, (Attack, Spell))
+            }
+        )
+        self.damage_types: list[str] = damage_types
+        self.vitality: int = (
+            damage_types.index("vitality")
+            if "vitality" in damage_types
+            else -1
+        )
+
+        shape = (self.num_creatures, max(len(damage_types), 1))
+        self.immune = np.zeros(shape, dtype=bool)
+        self.weak = np.zeros(shape, dtype=bool)
+        self.weakness = np.zeros(shape, dtype=np.int64)
+        self.resistant = np.zeros(shape, dtype=bool)
+        self.resistance = np.zeros(shape, dtype=np.int64)
+        self.resist_all = np.zeros(self.num_creatures, dtype=np.int64)
+        self.has_resist_all = np.zeros(self.num_creatures, dtype=bool)
+
+        # Only enemies have immunities, resistances, and weaknesses
+        for c, template in enumerate(templates):
+            if not _is_enemy(template):
+                continue
+            for d, damage_type in enumerate(damage_types):
+                self.immune[c, d] = damage_type in template.immunities
+                if damage_type in template.weaknesses:
+                    self.weak[c, d] = True
+                    self.weakness[c, d] = template.weaknesses[damage_type]
+                if damage_type in template.resistances:
+                    self.resistant[c, d] = True
+                    self.resistance[c, d] = template.resistances[damage_type]
+            if "all-damage" in template.resistances:
+                self.has_resist_all[c] = True
+                self.resist_all[c] = template.resistances["all-damage"]
+
+    def _build_actions(
+        self, templates: list[CreatureTemplate], action_lists: list[list]
+    ) -> None:
+        shape = (self.num_creatures, self.num_actions)
+        self.kind = np.full(shape, NO_ACTION)
+        self.cost = np.ones(shape, dtype=np.int64)
+        self.weight = np.zeros(shape)
+        self.spell_weight = np.zeros(shape)
+        self.range = np.full(shape, 5)
+        self.ranged = np.zeros(shape, dtype=bool)
+        self.agile = np.zeros(shape, dtype=bool)
+        self.finesse = np.zeros(shape, dtype=bool)
+        self.deadly = np.zeros(shape, dtype=np.int64)
+        self.attack_bonus = np.zeros(shape, dtype=np.int64)
+        self.num_dice = np.zeros(shape, dtype=np.int64)
+        self.die_size = np.ones(shape, dtype=np.int64)
+        self.damage_bonus = np.zeros(shape, dtype=np.int64)
+        self.damage_type = np.zeros(shape, dtype=np.int64)
+        self.auto_hit = np.zeros(shape, dtype=bool)
+        self.spell_level = np.zeros(shape, dtype=np.int64)
+        self.slots = np.zeros(shape, dtype=np.int64)
+        self.area = np.zeros(shape, dtype=bool)
+        self.area_targets = np.zeros(shape, dtype=np.int64)
+        self.area_shape = np.zeros(shape, dtype=np.int64)
+        self.area_size = np.zeros(shape, dtype=np.int64)
+        self.targets = np.zeros(shape, dtype=np.int64)
+        self.save = np.full(shape, -1)
+        self.heal_weight: int = Heal(0).weight
+        self.heal_range: int = Heal(0).range
+        self.heal_bonus: int = Heal(0).bonus
+
+        for c, actions in enumerate(action_lists):
+            for a, action in enumerate(actions):
+                self._add_action(c, a, action)
+
+        # Whether each target is immune to each action's damage type
+        self.action_immune = self.immune.T[self.damage_type]
+
+    def _add_action(self, c: int, a: int, action) -> None:
+        self.cost[c, a] = action.cost
+        self.weight[c, a] = action.weight
+        self.range[c, a] = action.range
+        self.ranged[c, a] = action.ranged
+
+        if isinstance(action, Heal):
+            self.kind[c, a] = HEAL
+            self.slots[c, a] = action.slots
+            return
+        if not isinstance(action, (Attack, Spell)):
+            self.kind[c, a] = RAISE_SHIELD
+            return
+
+        self.num_dice[c, a] = action.num_dice
+        self.die_size[c, a] = action.die_size
+        self.damage_bonus[c, a] = action.damage_bonus
+        self.damage_type[c, a] = self.damage_types.index(action.damage_type)
+        self.auto_hit[c, a] = action.name.lower() in AUTO_HIT_SPELLS
+        self.agile[c, a] = "agile" in action.traits
+        self.finesse[c, a] = "finesse" in action.traits
+        for trait, die_size in DEADLY_DICE.items():
+            if trait in action.traits:
+                self.deadly[c, a] = die_size
+                break
+
+        if isinstance(action, Attack):
+            self.kind[c, a] = ATTACK
+            self.attack_bonus[c, a] = action.attack_bonus
+            return
+
+        self.kind[c, a] = SPELL
+        self.spell_level[c, a] = action.level
+        self.slots[c, a] = action.slots
+        self.targets[c, a] = action.targets
+        if action.save:
+            self.save[c, a] = SAVES.index(action.save)
+
+        area_targets = 0
+        if action.area_type:
+            self.area[c, a] = True
+            self.area_shape[c, a] = AREA_SHAPES.index(action.area_type)
+            self.area_size[c, a] = action.area_size
+            area_targets = math.ceil(
+                action.area_size / AREA_DIVISORS[action.area_type]
+            )
+        self.area_targets[c, a] = area_targets
+
+        spell_weight = area_targets
+        if self.auto_hit[c, a]:
+            spell_weight += 20
+        else:
+            spell_weight += action.bonus
+        self.spell_weight[c, a] = spell_weight
+
+
+def _is_enemy(template: CreatureTemplate) -> bool:
+    return isinstance(template, EnemyTemplate)
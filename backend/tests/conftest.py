@@ -0,0 +1,104 @@
+import os
+from collections import Counter
+
+import pytest
+
+import models
+
+from .sample_data import test_enemy, test_enemy_3
+
+# Importing the API builds the database engine, which needs a URL but does
+# not connect until a query is run
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/trailmarker")
+
+
+class QueryCountingSession:
+    """An async database session that counts the queries run on it.
+
+    Rows are served from memory by table name. A query returns the rows of
+    its table whose ID is in one of its IN clauses, or every row if it has
+    none.
+
+    Attributes:
+        rows: The rows of each table, by table name.
+        queries: The number of queries run on each table.
+    """
+
+    def __init__(self, rows: dict[str, list]):
+        self.rows = rows
+        self.queries = Counter()
+
+    async def execute(self, statement):
+        table = statement.column_descriptions[0]["entity"].__tablename__
+        self.queries[table] += 1
+
+        rows = self.rows.get(table, [])
+        for value in statement.compile().params.values():
+            if isinstance(value, (list, tuple, set)):
+                rows = [row for row in rows if row.id in value]
+        return QueryResult(rows)
+
+
+class QueryResult:
+    def __init__(self, rows: list):
+        self.rows = rows
+
+    def scalars(self):
+        return self
+
+    def all(self) -> list:
+        return self.rows
+
+    def first(self):
+        return self.rows[0] if self.rows else None
+
+
+@pytest.fixture
+def count_queries():
+    """Returns a function building a query counting session from rows."""
+    return QueryCountingSession
+
+
+def build_db_enemy(enemy_id: int, enemy_dict: dict) -> models.Enemy:
+    # Columns the sample data leaves out are empty in the database
+    fields = {"immunities": [], "weaknesses": {}, "resistances": {}}
+    fields.update(enemy_dict, id=enemy_id)
+    return models.Enemy(**fields)
+
+
+@pytest.fixture
+def db_enemy():
+    """Returns a function building an enemy row from sample data."""
+    return build_db_enemy
+
+
+@pytest.fixture
+def session(count_queries):
+    """Returns a session holding three enemies and a catalog version."""
+    return count_queries(
+        {
+            "enemies": [
+                build_db_enemy(1, test_enemy),
+                build_db_enemy(2, test_enemy_3),
+                build_db_enemy(3, test_enemy),
+            ],
+            "catalog_versions": [
+                models.CatalogVersion(name="enemies", version="a")
+            ],
+        }
+    )
+
+
+@pytest.fixture
+def catalog(monkeypatch):
+    """Gives the API routes an empty enemy catalog and party cache."""
+    # Imported here, once the database URL above has been set
+    from ..api.enemy_catalog import EnemyCatalog
+    from ..api.party_cache import PartyCache
+    from ..api.routes import enemies, simulation
+
+    catalog = EnemyCatalog()
+    monkeypatch.setattr(simulation, "enemy_catalog", catalog)
+    monkeypatch.setattr(simulation, "party_cache", PartyCache())
+    monkeypatch.setattr(enemies, "enemy_catalog", catalog)
+    return catalog
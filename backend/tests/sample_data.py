@@ -752,5 +752,18 @@ test_spider = {
     "resistances": {},
 }
 
+# An enemy that cannot act and that test_player cannot hurt
+test_enemy_untouchable = {
+    **test_enemy,
+    "immunities": ["slashing", "piercing"],
+    "actions": {
+        "attacks": [],
+        "spells": [],
+        "heals": 0,
+        "shield": 0,
+        "sneak_attack": False,
+    },
+}
+
 test_party = [test_player, test_player_2, test_player_3, test_player_4]
 test_enemies = [test_enemy, test_enemy, test_enemy_2]
@@ -0,0 +1,211 @@
+import random
+
+import numpy as np
+import pytest
+
+from ..simulation.creatures.enemy import Enemy
+from ..simulation.creatures.player import Player
+from ..simulation.creatures.template import (
+    EnemyTemplate,
+    PlayerTemplate,
+    compile_templates,
+)
+from ..simulation.encounters.encounter import Encounter
+from ..simulation.mechanics.actions import Spell
+from ..simulation.mechanics.areas import (
+    CONE_DIRECTIONS,
+    burst_offsets,
+    in_cone,
+    in_line,
+)
+from ..simulation.mechanics.misc import grid_distance
+from ..simulation.vectorized import engine
+from ..simulation.vectorized.tables import BURST, CreatureTables
+from .sample_data import test_enemy, test_player_2
+
+offsets = [(dx, dy) for dx in range(-8, 9) for dy in range(-8, 9)]
+
+
+def place(creature, x, y):
+    creature.position_x, creature.position_y = x, y
+    creature.encounter.grid.move(creature)
+
+
+def area_spell_dict(area_type, size, spell_range=30):
+    return {
+        "name": "Area",
+        "slots": 1,
+        "level": 1,
+        "damage_roll": "2d6",
+        "damage_type": "fire",
+        "range": spell_range,
+        "area": {"type": area_type, "value": size},
+        "save": "reflex",
+        "targets": 0,
+        "actions": "2",
+    }
+
+
+def area_spell(area_type, size, spell_range=30):
+    return Spell(area_spell_dict(area_type, size, spell_range))
+
+
+def battle(num_enemies):
+    caster = Player(test_player_2)
+    enemies = [Enemy(test_enemy) for _ in range(num_enemies)]
+    Encounter([caster], enemies)
+    place(caster, 0, 0)
+    return caster, enemies
+
+
+def test_cone_covers_a_quarter():
+    # A 15-foot cone covers the squares 45 degrees either side of its
+    # direction, out to 15 feet
+    straight = {o for o in offsets if in_cone(*o, 1, 0, 15)}
+    diagonal = {o for o in offsets if in_cone(*o, 1, 1, 15)}
+
+    assert straight == {
+        (1, -1), (1, 0), (1, 1),
+        (2, -2), (2, -1), (2, 0), (2, 1), (2, 2),
+        (3, -1), (3, 0), (3, 1),
+    }  # fmt: skip
+    assert diagonal == {
+        (1, 0), (2, 0), (3, 0), (0, 1), (0, 2), (0, 3),
+        (1, 1), (2, 1), (1, 2), (2, 2), (3, 1), (1, 3),
+    }  # fmt: skip
+
+
+def test_line_follows_aim():
+    assert [o for o in offsets if in_line(*o, 1, 0, 20)] == [
+        (1, 0),
+        (2, 0),
+        (3, 0),
+        (4, 0),
+    ]
+    covered = {o for o in offsets if in_line(*o, 4, 2, 30)}
+    assert {(1, 0), (2, 1), (3, 1), (4, 2), (5, 2)} <= covered
+    assert not covered & {(0, 1), (2, 2), (-1, 0), (4, 0)}
+
+
+@pytest.mark.parametrize("size", [5, 15, 30])
+def test_shapes_match_vectorized(size):
+    dx, dy = np.array(offsets).T
+    for aim_x, aim_y in CONE_DIRECTIONS:
+        assert list(engine.in_cone(dx, dy, aim_x, aim_y, size)) == [
+            in_cone(x, y, aim_x, aim_y, size) for x, y in offsets
+        ]
+    for aim_x, aim_y in [(1, 0), (3, -1), (-2, -2), (1, 4)]:
+        assert list(engine.in_line(dx, dy, aim_x, aim_y, size)) == [
+            in_line(x, y, aim_x, aim_y, size) for x, y in offsets
+        ]
+
+
+def test_cone_aims_at_most_opponents():
+    caster, enemies = battle(3)
+    place(enemies[0], 2, 0)
+    place(enemies[1], -1, 1)
+    place(enemies[2], -2, 2)
+
+    assert area_spell("cone", 15)._area_targets(caster) == enemies[1:]
+
+
+def test_burst_centers_on_most_opponents():
+    caster, enemies = battle(4)
+    place(enemies[0], 4, 0)
+    place(enemies[1], 0, 5)
+    place(enemies[2], 1, 6)
+    place(enemies[3], 20, 0)
+
+    spell = area_spell("burst", 10)
+    assert spell._area_targets(caster) == enemies[1:3]
+    # The furthest enemy is out of range, so cannot be the center
+    place(enemies[0], 19, 1)
+    assert spell._area_targets(caster) == enemies[1:3]
+
+
+def test_burst_centers_between_opponents():
+    # Neither enemy's square covers the other, but the square between them
+    # covers both
+    caster, enemies = battle(2)
+    place(enemies[0], 4, 0)
+    place(enemies[1], 8, 0)
+
+    spell = area_spell("burst", 10, spell_range=60)
+    assert spell._area_targets(caster) == enemies
+    # The center must still be in range
+    assert area_spell("burst", 10, spell_range=20)._area_targets(caster) == [
+        enemies[0]
+    ]
+
+
+def test_burst_offsets():
+    assert burst_offsets(5)[0] == (0, 0)
+    assert len(burst_offsets(5)) == 9
+    assert all(grid_distance(*o) <= 15 for o in burst_offsets(15))
+    smaller = set(burst_offsets(10))
+    assert [o for o in burst_offsets(20) if o in smaller] == list(
+        burst_offsets(10)
+    )
+
+
+def test_burst_matches_vectorized():
+    caster_dict = {
+        **test_player_2,
+        "actions": {
+            **test_player_2["actions"],
+            "spells": [area_spell_dict("burst", 10)],
+        },
+    }
+    tables = CreatureTables(
+        compile_templates([caster_dict], PlayerTemplate),
+        compile_templates([test_enemy] * 4, EnemyTemplate),
+    )
+    [action] = np.flatnonzero(tables.area_size[0] > 0)
+    assert tables.area_shape[0, action] == BURST
+
+    rng = random.Random(0)
+    layouts = [
+        [(rng.randint(-2, 10), rng.randint(-6, 6)) for _ in range(4)]
+        for _ in range(40)
+    ]
+    batch = engine.BatchEngine(
+        tables, len(layouts), 50, np.random.default_rng(0)
+    )
+    batch.position_x[:] = 0
+    batch.position_y[:] = 0
+    for sim, layout in enumerate(layouts):
+        for enemy, (x, y) in enumerate(layout, start=1):
+            batch.position_x[sim, enemy] = x
+            batch.position_y[sim, enemy] = y
+    sims = np.arange(len(layouts))
+    covered = batch._burst_coverage(
+        sims, np.zeros_like(sims), np.full_like(sims, action)
+    )
+
+    for sim, layout in enumerate(layouts):
+        caster = Player(caster_dict)
+        enemies = [Enemy(test_enemy) for _ in layout]
+        Encounter([caster], enemies)
+        place(caster, 0, 0)
+        for enemy, (x, y) in zip(enemies, layout):
+            place(enemy, x, y)
+        spell = next(a for a in caster.actions if isinstance(a, Spell))
+        targets = spell._area_targets(caster)
+        assert list(covered[sim, 1:]) == [e in targets for e in enemies]
+
+
+def test_area_moves_into_reach():
+    caster, [enemy] = battle(1)
+    place(enemy, 8, 0)
+    caster.num_actions = 3
+
+    assert area_spell("cone", 15)._aoe(caster)
+    assert caster.calculate_distance(enemy) <= 15
+    assert caster.num_actions == 2
+
+    # Out of actions after moving, so the spell is not cast
+    caster, [enemy] = battle(1)
+    place(enemy, 30, 0)
+    caster.num_actions = 2
+    assert not area_spell("cone", 15)._aoe(caster)
+    assert caster.num_actions == 0
@@ -0,0 +1,192 @@
+from types import SimpleNamespace
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy.dialects import postgresql
+
+import models
+
+from ..schemas import SimRequest
+from ..simulation.core.executor import run_batch
+from ..simulation.creatures.enemy import Enemy
+from ..simulation.creatures.player import Player
+from ..simulation.encounters.battle_map import BattleMap, compile_map
+from ..simulation.encounters.encounter import Encounter
+from .sample_data import test_enemies, test_enemy, test_party, test_player
+
+# A 12x9 room split by a wall at x=5, with a gap at the bottom
+walled_map = {
+    "width": 12,
+    "height": 9,
+    "blocked": [[5, y] for y in range(8)],
+    "difficult": [],
+    "player_spawns": [[0, y] for y in range(4)],
+    "enemy_spawns": [[11, y] for y in range(4)],
+}
+
+
+def follow(steps, cell):
+    path = [cell]
+    while steps[cell] != cell:
+        cell = steps[cell]
+        path.append(cell)
+    return path
+
+
+def test_path_goes_around_walls():
+    battle_map = BattleMap(walled_map)
+    path = follow(battle_map.next_steps((0, 0), (11, 0)), (0, 0))
+
+    assert max(abs(path[-1][0] - 11), abs(path[-1][1])) == 1
+    assert (5, 8) in path
+    assert not any(cell in battle_map.blocked for cell in path)
+    for (x, y), (next_x, next_y) in zip(path, path[1:]):
+        assert max(abs(next_x - x), abs(next_y - y)) == 1
+
+
+def test_path_avoids_difficult_terrain():
+    battle_map = BattleMap(
+        {
+            "width": 9,
+            "height": 5,
+            "difficult": [[x, y] for x in range(2, 7) for y in range(3)],
+            "player_spawns": [[0, 2]],
+            "enemy_spawns": [[8, 2]],
+        }
+    )
+    path = follow(battle_map.next_steps((0, 2), (8, 2)), (0, 2))
+
+    assert not any(cell in battle_map.difficult for cell in path)
+
+
+def test_path_search_stops_at_target():
+    battle_map = BattleMap(
+        {
+            "width": 200,
+            "height": 200,
+            "player_spawns": [[0, 0]],
+            "enemy_spawns": [[199, 199]],
+        }
+    )
+    steps = battle_map.next_steps((0, 0), (10, 0))
+
+    assert len(steps) == 10
+    assert battle_map.next_steps((0, 0), (0, 0)) == {(0, 0): (0, 0)}
+
+
+def test_paths_are_reused():
+    battle_map = compile_map(walled_map)
+    steps = battle_map.next_steps((0, 0), (11, 0))
+
+    assert compile_map(dict(walled_map)) is battle_map
+    assert battle_map.next_steps((0, 0), (11, 0)) is steps
+    assert battle_map.next_steps(steps[(0, 0)], (11, 0)) is steps
+    assert compile_map(None) is None
+
+
+def test_kept_paths_are_bounded_by_squares():
+    battle_map = BattleMap(walled_map, max_path_cells=30)
+    for y in range(4):
+        battle_map.next_steps((0, y), (11, y))
+
+    assert 0 < battle_map._path_cells <= 30
+    assert battle_map._path_cells == sum(map(len, battle_map._paths.values()))
+    assert list(battle_map._paths)[-1] == (11, 3)
+    assert len(battle_map._paths) < 4
+
+
+def test_unreachable_target_has_no_path():
+    battle_map = BattleMap(
+        {
+            **walled_map,
+            "blocked": [[5, y] for y in range(9)],
+            "enemy_spawns": [],
+        }
+    )
+
+    assert battle_map.next_steps((0, 0), (11, 0)) == {}
+
+
+@pytest.mark.parametrize(
+    "changes",
+    [
+        {"blocked": [[12, 0]]},
+        {"player_spawns": [[5, 0]]},
+        {"blocked": [[5, y] for y in range(9)]},
+    ],
+)
+def test_invalid_maps(changes):
+    with pytest.raises(ValueError):
+        BattleMap({**walled_map, **changes})
+
+
+def test_encounter_uses_spawns():
+    battle_map = BattleMap(walled_map)
+    players = [Player(test_player), Player(test_player)]
+    enemies = [Enemy(test_enemy)]
+    Encounter(players, enemies, battle_map=battle_map)
+
+    assert [(p.position_x, p.position_y) for p in players] == [(0, 0), (0, 1)]
+    assert (enemies[0].position_x, enemies[0].position_y) == (11, 0)
+
+    with pytest.raises(ValueError):
+        Encounter(
+            [Player(test_player) for _ in range(5)],
+            [Enemy(test_enemy)],
+            battle_map=battle_map,
+        )
+
+
+def test_move_to_on_map():
+    battle_map = BattleMap(walled_map)
+    player, enemy = Player(test_player), Enemy(test_enemy)
+    Encounter([player], [enemy], battle_map=battle_map)
+
+    path = follow(battle_map.next_steps((0, 0), (11, 0)), (0, 0))
+    player.num_actions = 3
+    player.move_to(enemy, 5)
+
+    # Three Strides of 25 feet take the player through the gap in the wall
+    position = (player.position_x, player.position_y)
+    assert player.num_actions == 0
+    assert path.index(position) > path.index((5, 8))
+
+
+def test_run_batch_on_map():
+    batch = run_batch(
+        test_party,
+        test_enemies,
+        {"starting_distance": 50, "health_multiplier": 1.0},
+        1,
+        10,
+        seed=3,
+        map_dict=walled_map,
+    )
+
+    assert batch["total_sims"] == 10
+    assert batch["sim_data"][0]["log"]
+
+
+def test_sim_request_map():
+    enemies = [{"id": 1, "quantity": 1}]
+    SimRequest(enemies=enemies, battle_map=walled_map)
+
+    with pytest.raises(ValidationError):
+        SimRequest(enemies=enemies, battle_map=walled_map, engine="vectorized")
+    with pytest.raises(ValidationError):
+        SimRequest(
+            enemies=enemies,
+            battle_map={**walled_map, "difficult": [[0, 9]]},
+        )
+
+
+def test_battle_map_column_added_to_existing_encounters():
+    statements = []
+    connection = SimpleNamespace(
+        dialect=postgresql.dialect(), execute=statements.append
+    )
+    models.add_missing_columns(connection)
+
+    assert [str(statement) for statement in statements] == [
+        "ALTER TABLE encounters ADD COLUMN IF NOT EXISTS battle_map JSON"
+    ]
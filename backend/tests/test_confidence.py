@@ -0,0 +1,20 @@
+import math
+
+from ..simulation.core.confidence import margin_of_error, wilson_interval
+
+
+def test_wilson_interval():
+    lower, upper = wilson_interval(50, 100)
+    assert math.isclose(lower, 0.4038, abs_tol=1e-4)
+    assert math.isclose(upper, 0.5962, abs_tol=1e-4)
+
+    # Stays within [0, 1] at the extremes, without collapsing to a point
+    lower, upper = wilson_interval(100, 100)
+    assert 0.95 < lower < 1 and upper == 1
+    assert wilson_interval(0, 0) == (0.0, 1.0)
+
+
+def test_margin_of_error_shrinks():
+    margins = [margin_of_error(n // 2, n) for n in (10, 100, 1000, 10000)]
+    assert margins == sorted(margins, reverse=True)
+    assert math.isclose(margins[-1], 0.0098, abs_tol=1e-4)
@@ -1,12 +1,26 @@
+import itertools
+import math
+import random
+
+import pytest
+
 from ..simulation.creatures.creature import Creature
 from ..simulation.creatures.enemy import Enemy
 from ..simulation.creatures.player import Player
+from ..simulation.creatures.template import (
+    EnemyTemplate,
+    PlayerTemplate,
+    compile_templates,
+)
+from ..simulation.encounters.encounter import Encounter
+from ..simulation.mechanics import actions
 from .sample_data import (
     test_creature,
     test_enemy,
     test_enemy_3,
     test_enemy_sneak,
     test_player,
+    test_player_2,
     test_player_3,
     test_player_4,
     test_spider,
@@ -372,3 +386,159 @@ def test_sneak_attack():
 def test_no_damage_action_initialization():
     spider = Enemy(test_spider)
     assert spider.actions
+
+
+def test_template_clones_are_independent():
+    template = PlayerTemplate(test_player_4)
+    first = Player(template)
+    second = Player(template)
+
+    first.current_hit_points -= 5
+    first.spells[0].slots -= 1
+    first.actions.remove(first.spells[1])
+
+    assert second.current_hit_points == second.max_hit_points
+    assert second.spells[0].slots == template.spells[0].slots
+    assert second.spells[1] in second.actions
+    # Attacks have no state, so they are shared rather than copied
+    assert first.attacks is second.attacks
+
+
+def test_template_matches_dict():
+    from_dict = Player(test_player_2)
+    from_template = Player(PlayerTemplate(test_player_2))
+
+    assert from_template.name == from_dict.name
+    assert from_template.stealth == from_dict.stealth
+    assert from_template.armor_class == from_dict.armor_class
+    assert [repr(a) for a in from_template.actions] == [
+        repr(a) for a in from_dict.actions
+    ]
+    assert from_template.actions[-2].slots == from_dict.actions[-2].slots
+
+
+def test_compile_templates_once_per_dict():
+    templates = compile_templates(
+        [test_enemy, test_enemy, test_enemy_3], EnemyTemplate
+    )
+
+    assert templates[0] is templates[1]
+    assert templates[0] is not templates[2]
+    assert Enemy(templates[0]).immunities == test_enemy["immunities"]
+
+
+def step_toward(creature, target, action_range):
+    # Moves one square at a time, the way move_to used to
+    while creature.num_actions > 0:
+        speed_remaining = creature.speed
+        diagonal_moves = 1
+        if creature.calculate_distance(target) <= action_range:
+            return
+
+        while speed_remaining > 0:
+            dx = target.position_x - creature.position_x
+            dy = target.position_y - creature.position_y
+            step_x = (dx > 0) - (dx < 0)
+            step_y = (dy > 0) - (dy < 0)
+            can_travel_diagonally = not (
+                diagonal_moves % 2 == 0 and speed_remaining <= 10
+            )
+            if abs(dx) > 1 and abs(dy) > 1 and can_travel_diagonally:
+                creature.position_x += step_x
+                creature.position_y += step_y
+                if diagonal_moves % 2 == 0:
+                    speed_remaining -= 5
+                diagonal_moves += 1
+            elif abs(dx) > 1:
+                creature.position_x += step_x
+            elif abs(dy) > 1:
+                creature.position_y += step_y
+            else:
+                creature.num_actions -= 1
+                return
+            speed_remaining -= 5
+
+        creature.num_actions -= 1
+
+
+@pytest.mark.parametrize("speed", [0, 5, 10, 15, 20, 25, 30, 35, 40, 12])
+def test_move_to_matches_stepping(speed):
+    mover, stepper = Enemy(test_enemy), Enemy(test_enemy)
+    target = Enemy(test_enemy)
+    target.position_x, target.position_y = 0, 0
+    offsets = [-25, *range(-10, 11), 25]
+
+    for x, y, action_range, num_actions in itertools.product(
+        offsets, offsets, [0, 5, 10, 30], [1, 2, 3]
+    ):
+        for creature in (mover, stepper):
+            creature.speed = speed
+            creature.position_x, creature.position_y = x, y
+            creature.num_actions = num_actions
+
+        mover.move_to(target, action_range)
+        step_toward(stepper, target, action_range)
+
+        assert (mover.position_x, mover.position_y, mover.num_actions) == (
+            stepper.position_x,
+            stepper.position_y,
+            stepper.num_actions,
+        )
+
+
+def test_move_to_only_counts_as_progress_if_it_moves():
+    mover, target = Enemy(test_enemy), Player(test_player)
+    encounter = Encounter([target], [mover])
+    version = encounter.version
+    mover.num_actions = 3
+
+    # Already in range, or too slow to take a step
+    mover.move_to(target, 1000)
+    mover.speed = 0
+    mover.move_to(target, 5)
+    assert encounter.version == version
+
+    mover.speed = 25
+    mover.num_actions = 1
+    mover.move_to(target, 5)
+    assert encounter.version == version + 1
+
+
+def test_damage_die_is_built_once(monkeypatch):
+    player = Player(test_player)
+    longsword = player.attacks[0]
+    assert longsword.damage_die.num_sides == longsword.die_size
+
+    # Rolling only needs the generator, not a new die
+    monkeypatch.setattr(actions, "Die", None)
+    longsword.num_dice = 3
+    rolls = longsword._roll_for_damage(random.Random(1))
+    assert len(rolls) == 3
+    assert all(1 <= roll <= longsword.die_size for roll in rolls)
+
+
+def test_action_weights_are_cached(monkeypatch):
+    player, enemy = Player(test_player_2), Enemy(test_enemy)
+    Encounter([player], [enemy])
+    player.num_actions = 3
+    heal = next(a for a in player.actions if a.name == "Heal")
+    calculate_weight = type(heal).calculate_weight
+    weighed = []
+
+    def count_weights(action, *args):
+        weighed.append(action)
+        return calculate_weight(action, *args)
+
+    monkeypatch.setattr(type(heal), "calculate_weight", count_weights)
+    weight = player._action_weight(heal, False)
+    assert player._action_weight(heal, False) == weight
+    assert weighed == [heal]
+
+    # Damage changes how much healing is worth
+    player.take_damage(10, "slashing")
+    assert player._action_weight(heal, False) == weight + 10
+    assert weighed == [heal, heal]
+
+    # Each number of actions left is weighed separately
+    player.num_actions = 1
+    assert player._action_weight(heal, False) == -math.inf
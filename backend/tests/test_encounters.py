@@ -1,9 +1,24 @@
+import time
+
 import pytest
+from pydantic import ValidationError
 
+from ..schemas import SimRequest
+from ..simulation.core.simulation import run_simulation
 from ..simulation.creatures.enemy import Enemy
 from ..simulation.creatures.player import Player
-from ..simulation.encounters.encounter import Encounter
-from .sample_data import test_enemy, test_player
+from ..simulation.encounters.encounter import (
+    MAX_ROUNDS,
+    STALEMATE_ROUNDS,
+    Encounter,
+)
+from ..simulation.encounters.team import Team
+from .sample_data import (
+    test_enemy,
+    test_enemy_untouchable,
+    test_player,
+    test_player_2,
+)
 
 
 @pytest.mark.repeat(25)
@@ -18,8 +33,8 @@ def test_encounter_initialization():
 
     encounter = Encounter(players, enemies)
     # Testing that encounter's lists of creatures filled in correctly
-    assert encounter.players[0] == player
-    assert encounter.enemies[0] == enemy
+    assert encounter.players.members == [player]
+    assert encounter.enemies.members == [enemy]
     assert player in encounter.creatures and enemy in encounter.creatures
     assert player in encounter.players and player not in encounter.enemies
     assert enemy in encounter.enemies and enemy not in encounter.players
@@ -60,3 +75,126 @@ def test_run_encounter():
 
     winner = encounter.run_encounter()
     assert winner
+
+
+def test_team_membership():
+    creatures = [Enemy(test_enemy) for _ in range(3)]
+    team = Team(creatures)
+    team.remove(creatures[1])
+
+    assert len(team) == 2 and team
+    assert list(team) == [creatures[0], creatures[2]]
+    assert creatures[1] not in team and creatures[2] in team
+    assert Enemy(test_enemy) not in team
+
+    team.remove(creatures[0])
+    team.remove(creatures[2])
+    assert not team and list(team) == []
+    assert team.members == creatures
+
+
+def test_dead_creatures_keep_turn_order():
+    players = [Player(test_player) for _ in range(2)]
+    enemies = [Enemy(test_enemy)]
+    encounter = Encounter(players, enemies)
+    turn_order = list(encounter.creatures)
+
+    players[0].current_hit_points = 1
+    players[0].take_damage(10, "slashing")
+
+    assert players[0].is_dead
+    assert encounter.creatures == turn_order
+    assert list(encounter.players) == [players[1]]
+    assert encounter.winner is None
+
+
+def test_team_counts_immunities_and_undead():
+    zombie = Enemy(
+        {**test_enemy, "traits": ["undead"], "immunities": ["poison"]}
+    )
+    golem = Enemy({**test_enemy, "immunities": ["poison", "fire", "fire"]})
+    encounter = Encounter([Player(test_player)], [zombie, golem])
+    enemies = encounter.enemies
+
+    assert enemies.num_immune == {"poison": 2, "fire": 1}
+    assert enemies.num_undead == 1
+    assert enemies.all_immune("poison") and not enemies.all_immune("fire")
+
+    encounter.remove_creature(zombie)
+    assert enemies.num_undead == 0
+    assert enemies.all_immune("fire")
+
+
+def test_check_valid_damage_follows_deaths():
+    player = Player(test_player_2)
+    zombie = Enemy({**test_enemy, "traits": ["undead"]})
+    goblin = Enemy(test_enemy)
+    encounter = Encounter([player], [zombie, goblin])
+    vitality_lash = next(
+        a for a in player.actions if a.name == "Vitality Lash"
+    )
+
+    assert vitality_lash.check_valid_damage(player)
+    assert vitality_lash.check_valid_damage(player, zombie)
+    assert not vitality_lash.check_valid_damage(player, goblin)
+
+    encounter.remove_creature(zombie)
+    assert not vitality_lash.check_valid_damage(player)
+
+
+def test_stalemate_is_a_draw():
+    parameters = {"starting_distance": 50, "health_multiplier": 1.0}
+    sim_data = run_simulation(
+        [test_player], [test_enemy_untouchable], parameters
+    )
+
+    # The player takes a round to close in, then nothing changes
+    assert sim_data["winner"] == "draw"
+    assert sim_data["rounds"] == 1 + STALEMATE_ROUNDS
+    assert sim_data["log"][-1] == (
+        f"The encounter was a draw after {sim_data['rounds']} rounds!"
+    )
+
+
+def test_max_rounds_is_a_draw():
+    parameters = {
+        "starting_distance": 50,
+        "health_multiplier": 1.0,
+        "max_rounds": 3,
+    }
+    sim_data = run_simulation(
+        [test_player], [test_enemy_untouchable], parameters
+    )
+
+    assert sim_data["winner"] == "draw"
+    assert sim_data["rounds"] == 3
+
+
+def test_deadline_times_out():
+    encounter = Encounter(
+        [Player(test_player)],
+        [Enemy(test_enemy_untouchable)],
+        deadline=time.time(),
+    )
+
+    assert encounter.run_encounter() == "timeout"
+
+
+def test_stop_settings_are_bounded():
+    enemies = [{"id": 1, "quantity": 1}]
+    parameters = SimRequest(enemies=enemies).parameters.model_dump()
+    assert parameters == {
+        "starting_distance": 50,
+        "health_multiplier": 1.0,
+        "max_rounds": MAX_ROUNDS,
+        "stalemate_rounds": STALEMATE_ROUNDS,
+    }
+
+    for stop_settings in [
+        {"max_rounds": MAX_ROUNDS + 1},
+        {"max_rounds": 0},
+        {"stalemate_rounds": 101},
+        {"stalemate_rounds": 0},
+    ]:
+        with pytest.raises(ValidationError):
+            SimRequest(enemies=enemies, parameters=stop_settings)
@@ -0,0 +1,221 @@
+import asyncio
+import gzip
+from types import SimpleNamespace
+
+import brotli
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+
+import models
+
+from ..api import dependencies
+from ..api.enemy_catalog import EnemyCatalog
+from ..api.enemy_helpers import (
+    build_enemy_search,
+    choose_encoding,
+    decode_cursor,
+    encode_cursor,
+    etag_matches,
+)
+from ..api.exceptions import BadRequestException, NotFoundException
+from ..api.routes import enemies, simulation
+from ..schemas import SimRequest
+from .sample_data import test_enemy, test_enemy_3
+
+user = SimpleNamespace(id=1)
+
+
+@pytest.mark.parametrize("quantity", [1, 10, 100])
+def test_enemies_load_once(session, catalog, quantity):
+    request = SimRequest(
+        enemies=[
+            {"id": 1, "quantity": quantity},
+            {"id": 2, "quantity": quantity},
+            {"id": 1, "quantity": 1},
+        ]
+    )
+    for _ in range(3):
+        players, enemies = asyncio.run(
+            simulation.load_simulation_inputs(user, request, session)
+        )
+
+    assert session.queries["enemies"] == 1
+    # Checked once for the enemies and once for the party
+    assert session.queries["catalog_versions"] == 2
+    assert len(enemies) == 2 * quantity + 1
+    assert enemies[quantity - 1]["name"] == test_enemy["name"]
+    assert enemies[quantity]["name"] == test_enemy_3["name"]
+    # Each enemy is converted once and shared by all of its copies
+    assert enemies[0] is enemies[-1]
+
+
+def test_unknown_enemies_are_not_found(session, catalog):
+    request = SimRequest(
+        enemies=[
+            {"id": 1, "quantity": 1},
+            {"id": 9, "quantity": 2},
+            {"id": 7, "quantity": 1},
+        ]
+    )
+    with pytest.raises(NotFoundException) as error:
+        asyncio.run(simulation.load_simulation_inputs(user, request, session))
+
+    assert error.value.status_code == 404
+    assert error.value.detail == "enemy with ID 7, 9 not found"
+    with pytest.raises(NotFoundException):
+        catalog.get_enemy(7)
+
+
+def test_catalog_reloads_on_new_version(session, db_enemy):
+    catalog = EnemyCatalog(check_interval=0)
+    asyncio.run(catalog.refresh(session))
+    asyncio.run(catalog.refresh(session))
+
+    assert catalog.loads == 1
+    assert catalog.version == "a"
+    assert session.queries["catalog_versions"] == 2
+    assert [enemy.id for enemy in catalog.enemies.enemies] == [1, 2, 3]
+    assert catalog.get_enemy(2).name == test_enemy_3["name"]
+
+    session.rows["enemies"].append(db_enemy(4, test_enemy_3))
+    session.rows["catalog_versions"][0].version = "b"
+    asyncio.run(catalog.refresh(session))
+
+    assert catalog.loads == 2
+    assert catalog.version == "b"
+    assert catalog.get_templates([4])[4]["name"] == test_enemy_3["name"]
+
+
+@pytest.fixture
+def client(session, catalog):
+    app = FastAPI()
+    app.include_router(enemies.router)
+    app.dependency_overrides[dependencies.get_db] = lambda: session
+    return TestClient(app)
+
+
+def test_get_enemies_revalidates(client, catalog):
+    response = client.get("/enemies", headers={"Accept-Encoding": "gzip"})
+    etag = response.headers["etag"]
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(catalog.encoded["gzip"]) == catalog.body
+    assert response.json() == catalog.enemies.model_dump(
+        mode="json", by_alias=True
+    )
+
+    response = client.get("/enemies", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    response = client.get(
+        "/enemies",
+        headers={"If-None-Match": '"stale"', "Accept-Encoding": "identity"},
+    )
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+    assert response.content == catalog.body
+
+    # Brotli is preferred when the client accepts both
+    response = client.get("/enemies", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "br"
+    assert brotli.decompress(catalog.encoded["br"]) == catalog.body
+    assert response.content == catalog.body
+    assert catalog.loads == 1
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, expected",
+    [
+        (None, None),
+        ("gzip", "gzip"),
+        ("gzip, br", "br"),
+        ("gzip;q=1.0, br;q=0.5", "gzip"),
+        ("br;q=0, gzip;q=0", None),
+        ("*", "br"),
+        ("deflate", None),
+    ],
+)
+def test_choose_encoding(accept_encoding, expected):
+    assert choose_encoding(accept_encoding, ["br", "gzip"]) == expected
+
+
+@pytest.mark.parametrize(
+    "if_none_match, expected",
+    [
+        (None, False),
+        ("*", True),
+        ('W/"abc"', True),
+        ('"abc"', True),
+        ('"xyz", W/"abc"', True),
+        ('"abcd"', False),
+    ],
+)
+def test_etag_matches(if_none_match, expected):
+    assert etag_matches(if_none_match, 'W/"abc"') == expected
+
+
+def test_search_query_uses_indexed_filters():
+    cursor = encode_cursor(models.Enemy(id=7, level=3, name="Goblin"))
+    query = build_enemy_search(
+        1, 5, ["goblin"], ["fire"], "Gob_", after=cursor
+    )
+    sql = str(query.compile(dialect=postgresql.dialect()))
+
+    assert "enemies.traits @> " in sql
+    assert "enemies.immunities @> " in sql
+    assert "lower(enemies.name) LIKE " in sql
+    assert "(enemies.level, enemies.name, enemies.id) > " in sql
+    assert sql.endswith("ORDER BY enemies.level, enemies.name, enemies.id")
+    assert query.compile().params["lower_1"] == "gob/_%"
+    assert decode_cursor(cursor) == (3, "Goblin", 7)
+
+
+def test_search_indexes_added_to_existing_enemies():
+    statements = []
+    connection = SimpleNamespace(execute=statements.append)
+    models.add_missing_indexes(connection)
+    dialect = postgresql.dialect()
+
+    assert [
+        str(statement.compile(dialect=dialect)) for statement in statements
+    ] == [
+        "CREATE INDEX IF NOT EXISTS ix_enemies_level_name_id "
+        "ON enemies (level, name, id)",
+        "CREATE INDEX IF NOT EXISTS ix_enemies_name_prefix "
+        "ON enemies (lower(name) text_pattern_ops)",
+        "CREATE INDEX IF NOT EXISTS ix_enemies_traits "
+        "ON enemies USING gin (traits)",
+        "CREATE INDEX IF NOT EXISTS ix_enemies_immunities "
+        "ON enemies USING gin (immunities)",
+    ]
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor!", "WzEsIDJd", "e30="])
+def test_invalid_search_cursors(cursor):
+    with pytest.raises(BadRequestException):
+        decode_cursor(cursor)
+
+
+def test_search_pages(client):
+    response = client.get("/enemies/search", params={"limit": 2})
+    page = response.json()
+
+    assert response.status_code == 200
+    assert [enemy["id"] for enemy in page["enemies"]] == [1, 2]
+    assert decode_cursor(page["next_cursor"]) == (
+        test_enemy_3["level"],
+        test_enemy_3["name"],
+        2,
+    )
+
+    response = client.get("/enemies/search", params={"limit": 3})
+    assert response.json()["next_cursor"] is None
+    response = client.get("/enemies/search", params={"after": "bad"})
+    assert response.status_code == 400
+    response = client.get("/enemies/search", params={"limit": 0})
+    assert response.status_code == 422
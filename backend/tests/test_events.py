@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+from ..simulation.core.events import Event, EventLog, render_event
+from ..simulation.core.simulation import run_simulation
+from .sample_data import test_enemies, test_party
+
+
+class _Named:
+    def __init__(self, name):
+        self.name = name
+        self.log_index = 0
+
+    def __str__(self):
+        return self.name
+
+
+def test_render_optional_fields():
+    text = render_event(Event.STRIKE_ROLL, ["Fighter", 20, 18, 12, 8, 0])
+    assert text == "Fighter rolled 20 (12 + 8) to attack against AC 18."
+
+    text = render_event(Event.STRIKE_ROLL, ["Fighter", 15, 18, 12, 8, 5])
+    assert text == "Fighter rolled 15 (12 + 8 - 5) to attack against AC 18."
+
+
+def test_render_tail():
+    text = render_event(
+        Event.DAMAGE, ["Rogue", "Goblin", 14, "piercing", 3, 4, 5, 2]
+    )
+    assert text == "Rogue dealt 14 (5 + 2 + 3 + 4) piercing damage to Goblin!"
+
+
+def test_event_log_round_trip():
+    caster = _Named("Wizard")
+    target = _Named("Goblin")
+    event_log = EventLog()
+    event_log.add_creature(caster)
+    event_log.add_creature(target)
+
+    event_log.record(Event.CAST, (caster, "Fireball"))
+    event_log.record(Event.AREA_ATTACK, (caster, "Fireball", target, caster))
+    event_log.record(Event.CAST, (caster, "Fireball"))
+
+    assert event_log.render() == [
+        "Wizard casts Fireball!",
+        "Wizard attacks Goblin, Wizard with Fireball!",
+        "Wizard casts Fireball!",
+    ]
+    # Repeated strings are only stored once
+    assert event_log.strings == ["Fireball"]
+
+
+@pytest.mark.repeat(10)
+def test_events_render_same_as_text():
+    seed = random.randrange(2**32)
+
+    random.seed(seed)
+    text = run_simulation(test_party, test_enemies)
+    random.seed(seed)
+    events = run_simulation(test_party, test_enemies, log_format="events")
+
+    event_log = EventLog()
+    event_log.events.extend(events["events"])
+    event_log.creatures = events["creatures"]
+    event_log.strings = events["strings"]
+
+    assert "log" not in events
+    assert event_log.render() == text["log"]
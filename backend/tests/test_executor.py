@@ -0,0 +1,192 @@
+import asyncio
+
+from ..simulation.core.executor import (
+    ProcessPoolSimulationExecutor,
+    SimulationExecutor,
+    merge_batches,
+    run_batch,
+    split_into_chunks,
+)
+from .sample_data import (
+    test_enemies,
+    test_enemy_untouchable,
+    test_party,
+    test_player,
+)
+
+parameters = {"starting_distance": 50, "health_multiplier": 1.0}
+
+
+def test_split_into_chunks():
+    assert split_into_chunks(100, 4) == [(1, 25), (26, 25), (51, 25), (76, 25)]
+    assert split_into_chunks(10, 3) == [(1, 4), (5, 3), (8, 3)]
+    assert split_into_chunks(2, 8) == [(1, 1), (2, 1)]
+
+    chunks = split_into_chunks(97, 7)
+    assert sum(num_sims for _, num_sims in chunks) == 97
+
+
+def test_merge_batches():
+    first = run_batch(test_party, test_enemies, parameters, 1, 3)
+    second = run_batch(test_party, test_enemies, parameters, 4, 2)
+    merged = merge_batches([first, second])
+
+    assert merged["total_sims"] == 5
+    assert merged["wins"] == first["wins"] + second["wins"]
+    assert merged["rounds"] == first["rounds"] + second["rounds"]
+    assert [data["sim_num"] for data in merged["sim_data"]] == [1, 2, 3, 4, 5]
+
+
+def test_serial_executor():
+    executor = SimulationExecutor()
+    results = asyncio.run(
+        executor.run(test_party, test_enemies, parameters, 10)
+    )
+
+    assert results["total_sims"] == 10
+    assert len(results["sim_data"]) == 10
+
+
+def test_process_pool_executor():
+    executor = ProcessPoolSimulationExecutor(max_workers=2)
+    try:
+        results = asyncio.run(
+            executor.run(test_party, test_enemies, parameters, 20)
+        )
+    finally:
+        executor.shutdown()
+
+    assert results["total_sims"] == 20
+    sim_nums = [data["sim_num"] for data in results["sim_data"]]
+    assert sim_nums == list(range(1, 21))
+    wins = sum(data["winner"] == "players" for data in results["sim_data"])
+    assert results["wins"] == wins
+
+
+def test_seeded_sims_replay():
+    batch = run_batch(test_party, test_enemies, parameters, 1, 10, seed=42)
+    replay = run_batch(test_party, test_enemies, parameters, 7, 1, seed=42)
+
+    assert replay["sim_data"] == [batch["sim_data"][6]]
+
+
+def test_seeded_runs_match_across_executors():
+    serial = asyncio.run(
+        SimulationExecutor(max_chunk_size=3).run(
+            test_party, test_enemies, parameters, 12, seed=5
+        )
+    )
+    executor = ProcessPoolSimulationExecutor(max_workers=2)
+    try:
+        parallel = asyncio.run(
+            executor.run(test_party, test_enemies, parameters, 12, seed=5)
+        )
+    finally:
+        executor.shutdown()
+
+    assert parallel == serial
+    other_seed = run_batch(test_party, test_enemies, parameters, 1, 12, seed=6)
+    assert other_seed["sim_data"] != serial["sim_data"]
+
+
+def test_adaptive_stops_early():
+    # The doubled party always wins, so a few small waves are enough
+    executor = SimulationExecutor(max_chunk_size=50)
+    waves = []
+    results = asyncio.run(
+        executor.run(
+            test_party + test_party,
+            test_enemies,
+            parameters,
+            1000,
+            on_progress=waves.append,
+            margin=0.05,
+        )
+    )
+
+    assert waves == [4, 8, 16, 32]
+    assert results["total_sims"] == results["wins"] == 60
+
+
+def test_adaptive_waves_grow_to_full_chunks():
+    executor = ProcessPoolSimulationExecutor(max_workers=2, max_chunk_size=6)
+    chunks = []
+    try:
+        asyncio.run(
+            executor.run(
+                test_party,
+                test_enemies,
+                parameters,
+                40,
+                on_progress=chunks.append,
+                collect_log=False,
+                margin=0.001,
+            )
+        )
+    finally:
+        executor.shutdown()
+
+    assert chunks == [4, 4, 6, 6, 6, 6, 4, 4]
+
+
+def test_seeded_vectorized_runs_ignore_chunking():
+    vectorized = {"collect_log": False, "engine": "vectorized", "seed": 3}
+    results = [
+        asyncio.run(
+            SimulationExecutor(max_vectorized_chunk_size=size).run(
+                test_party, test_enemies, parameters, 2500, **vectorized
+            )
+        )
+        for size in (1000, 3000)
+    ]
+    adaptive = asyncio.run(
+        SimulationExecutor(max_vectorized_chunk_size=1000).run(
+            test_party, test_enemies, parameters, 2500, margin=0, **vectorized
+        )
+    )
+
+    assert results[0] == results[1] == adaptive
+    assert results[0]["total_sims"] == 2500
+
+
+def test_adaptive_stops_at_budget():
+    executor = SimulationExecutor(max_chunk_size=50)
+    results = asyncio.run(
+        executor.run(test_party, test_enemies, parameters, 120, margin=0.001)
+    )
+
+    assert results["total_sims"] == 120
+    sim_nums = [data["sim_num"] for data in results["sim_data"]]
+    assert sim_nums == list(range(1, 121))
+
+
+def test_time_limit_covers_the_request():
+    # Each chunk runs one simulation, which times out, then stops
+    executor = SimulationExecutor(max_chunk_size=5)
+    results = asyncio.run(
+        executor.run([test_player], test_enemies, parameters, 20, time_limit=0)
+    )
+
+    assert results["total_sims"] == results["timeouts"] == 4
+    sim_nums = [data["sim_num"] for data in results["sim_data"]]
+    assert sim_nums == [1, 6, 11, 16]
+
+
+def test_batches_count_draws():
+    limited = {**parameters, "max_rounds": 5}
+
+    for engine in ("reference", "vectorized"):
+        batch = run_batch(
+            [test_player],
+            [test_enemy_untouchable],
+            limited,
+            1,
+            4,
+            engine=engine,
+            seed=1,
+        )
+        assert batch["draws"] == 4
+        assert batch["wins"] == batch["timeouts"] == 0
+
+    merged = merge_batches([batch, batch])
+    assert merged["draws"] == 8
@@ -0,0 +1,187 @@
+import random
+
+import pytest
+
+from ..simulation.core.simulation import run_simulation, simulation_rng
+from ..simulation.creatures.enemy import Enemy
+from ..simulation.creatures.player import Player
+from ..simulation.encounters.encounter import Encounter
+from ..simulation.encounters.grid import SpatialGrid
+from ..simulation.mechanics.misc import grid_distance
+from ..simulation.vectorized import engine
+from .sample_data import (
+    test_enemy,
+    test_enemy_3,
+    test_party,
+    test_player,
+    test_player_2,
+)
+
+
+class LinearScan(SpatialGrid):
+    def within(self, creature, team, distance):
+        return [
+            other
+            for other in self._members[team]
+            if creature.calculate_distance(other) <= distance
+        ]
+
+
+def place(creature, rng, team):
+    creature.team = team
+    creature.position_x = rng.randrange(-30, 30)
+    creature.position_y = rng.randrange(-30, 30)
+
+
+@pytest.mark.parametrize(
+    "dx, dy, expected",
+    [
+        (0, 0, 0),
+        (1, 0, 5),
+        (0, -3, 15),
+        (1, 1, 5),
+        (2, 2, 15),
+        (-3, 3, 20),
+        (4, 1, 20),
+        (5, -2, 30),
+    ],
+)
+def test_grid_distance(dx, dy, expected):
+    assert grid_distance(dx, dy) == expected
+    assert engine.grid_distance(dx, dy) == expected
+
+
+@pytest.mark.parametrize("cell_size", [1, 4])
+def test_queries_match_scan(cell_size):
+    rng = random.Random(0)
+    grid = SpatialGrid(cell_size)
+    creatures = [Enemy(test_enemy) for _ in range(60)]
+    for creature in creatures:
+        place(creature, rng, 2)
+        grid.add(creature)
+    for creature in creatures[::3]:
+        grid.remove(creature)
+    for creature in creatures[1::3]:
+        place(creature, rng, 2)
+        grid.move(creature)
+
+    alive = [c for i, c in enumerate(creatures) if i % 3]
+    source = Enemy(test_enemy)
+    for _ in range(50):
+        place(source, rng, 1)
+        for distance in (5, 10, 30, 60):
+            assert grid.within(source, 2, distance) == [
+                c for c in alive if source.calculate_distance(c) <= distance
+            ]
+            assert grid.any_within(source, 2, distance) == any(
+                source.calculate_distance(c) <= distance for c in alive
+            )
+
+        closest = min(source.calculate_distance(c) for c in alive)
+        assert source.calculate_distance(grid.nearest(source, 2)) == closest
+
+
+def test_nearest_empty_team():
+    assert SpatialGrid().nearest(Enemy(test_enemy), 1) is None
+
+
+def test_large_battle_matches_scan():
+    players = test_party * 8
+    enemies = [test_enemy, test_enemy_3] * 16
+    parameters = {"starting_distance": 30, "health_multiplier": 1.0}
+
+    results = []
+    for grid_class in (SpatialGrid, LinearScan):
+        Encounter.grid_class = grid_class
+        try:
+            results.append(
+                run_simulation(
+                    players,
+                    enemies,
+                    parameters,
+                    rng=simulation_rng(3, 1),
+                )
+            )
+        finally:
+            Encounter.grid_class = SpatialGrid
+
+    assert results[0] == results[1]
+
+
+def scan_target(creature, attack):
+    # Target selection as a scan of every opponent
+    team = creature.encounter.teams[2 if creature.team == 1 else 1]
+    targets = list(team)
+    in_range = [
+        target
+        for target in targets
+        if creature.calculate_distance(target) <= attack.range
+    ]
+    best = (in_range or targets)[0]
+    best_weight = best.calculate_weight(creature, attack, not in_range)
+    for target in (in_range or targets)[1:]:
+        weight = target.calculate_weight(creature, attack, not in_range)
+        if weight > best_weight:
+            best, best_weight = target, weight
+    return best
+
+
+def test_rings_cover_team():
+    rng = random.Random(1)
+    grid = SpatialGrid()
+    creatures = [Enemy(test_enemy) for _ in range(40)]
+    for creature in creatures:
+        place(creature, rng, 2)
+        grid.add(creature)
+    source = Enemy(test_enemy)
+    place(source, rng, 1)
+
+    seen = []
+    for found, beyond in grid.rings(source, 2):
+        seen.extend(found)
+        assert all(
+            source.calculate_distance(c) >= beyond
+            for c in creatures
+            if c not in seen
+        )
+    assert sorted(map(id, seen)) == sorted(map(id, creatures))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_pick_target_matches_scan(seed):
+    rng = random.Random(seed)
+    weak = {**test_enemy, "weaknesses": {"fire": 5}}
+    resistant = {**test_enemy_3, "resistances": {"piercing": 5}}
+    players = [
+        Player(rng.choice([test_player, test_player_2])) for _ in range(30)
+    ]
+    enemies = [
+        Enemy(rng.choice([test_enemy, weak, resistant])) for _ in range(40)
+    ]
+    encounter = Encounter(players, enemies)
+
+    for _ in range(10):
+        for creature in encounter.creatures:
+            if creature.is_dead:
+                continue
+            place(creature, rng, creature.team)
+            encounter.grid.move(creature)
+            if rng.random() < 0.3:
+                creature.take_damage(rng.randrange(1, 12), "slashing")
+            elif rng.random() < 0.1:
+                creature.heal(rng.randrange(1, 12))
+
+        for creature in rng.sample(list(encounter.creatures), 10):
+            if creature.is_dead:
+                continue
+            for attack in creature.actions:
+                if hasattr(attack, "damage_type") and attack.range:
+                    assert creature.pick_target(attack) is scan_target(
+                        creature, attack
+                    )
+
+    for team in encounter.teams.values():
+        if team:
+            assert team.most_hurt() is min(
+                team, key=lambda creature: creature.current_hit_points
+            )
@@ -0,0 +1,9 @@
+from ..simulation.mechanics.misc import Degree, calculate_dos
+
+
+def test_calculate_dos():
+    assert calculate_dos(10, 30, 20) == Degree.CRITICAL_SUCCESS
+    assert calculate_dos(20, 29, 20) == Degree.CRITICAL_SUCCESS
+    assert calculate_dos(1, 29, 20) == Degree.FAILURE
+    assert calculate_dos(20, 5, 20) == Degree.FAILURE
+    assert calculate_dos(1, -50, 20) == Degree.CRITICAL_FAILURE
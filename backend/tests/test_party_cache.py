@@ -0,0 +1,66 @@
+import asyncio
+from types import SimpleNamespace
+
+import models
+
+from ..api.party_cache import PartyCache
+
+user = SimpleNamespace(id=1)
+
+
+def test_party_cached_until_changed(count_queries):
+    session = count_queries({"characters": []})
+    party_cache = PartyCache(max_users=2)
+    users = [SimpleNamespace(id=user_id) for user_id in range(3)]
+
+    for _ in range(3):
+        party = asyncio.run(party_cache.get_party(users[0], session))
+    assert party == []
+    assert session.queries["characters"] == 1
+    assert (party_cache.hits, party_cache.misses) == (2, 1)
+
+    party_cache.bump(users[0].id)
+    asyncio.run(party_cache.get_party(users[0], session))
+    assert party_cache.revision(users[0].id) == 1
+    assert session.queries["characters"] == 2
+
+    # Loading two more users drops the least recently used party
+    for user in users[1:] + users[:1]:
+        asyncio.run(party_cache.get_party(user, session))
+    assert session.queries["characters"] == 5
+
+
+def test_party_changed_while_loading(count_queries):
+    session = count_queries({"characters": []})
+    party_cache = PartyCache()
+    execute = session.execute
+
+    async def execute_and_change(statement):
+        party_cache.bump(user.id)
+        return await execute(statement)
+
+    session.execute = execute_and_change
+    asyncio.run(party_cache.get_party(user, session))
+    session.execute = execute
+    asyncio.run(party_cache.get_party(user, session))
+    asyncio.run(party_cache.get_party(user, session))
+
+    assert (party_cache.hits, party_cache.misses) == (1, 2)
+
+
+def test_parties_dropped_on_new_version(count_queries):
+    stamp = models.CatalogVersion(name="characters", version="a")
+    session = count_queries({"characters": [], "catalog_versions": [stamp]})
+    party_cache = PartyCache(check_interval=0)
+
+    for _ in range(2):
+        asyncio.run(party_cache.get_party(user, session))
+    assert party_cache.version == "a"
+    assert session.queries["characters"] == 1
+
+    # populate.py rebuilt the characters, such as the pre-made party
+    stamp.version = "b"
+    asyncio.run(party_cache.get_party(user, session))
+    assert party_cache.version == "b"
+    assert session.queries["characters"] == 2
+    assert party_cache.revision(user.id) == 0
@@ -43,3 +43,11 @@ def test_sim_enemies_win():
     for message in log:
         print(message)
     assert winner == "enemies"
+
+
+@pytest.mark.repeat(10)
+def test_sim_without_log():
+    sim_results = run_simulation(test_party, test_enemies, collect_log=False)
+    assert sim_results["winner"] in ("players", "enemies")
+    assert sim_results["rounds"] > 0
+    assert sim_results["log"] == []
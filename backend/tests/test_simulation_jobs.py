@@ -0,0 +1,168 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+from ..api import dependencies
+from ..api.exceptions import ServiceUnavailableException
+from ..api.routes import simulation
+from ..api.simulation_jobs import SimulationJob, SimulationJobQueue
+from ..schemas import SimJobRequest
+from ..simulation.core.executor import SimulationExecutor
+from .sample_data import test_enemies, test_party
+
+parameters = {"starting_distance": 50, "health_multiplier": 1.0}
+user = SimpleNamespace(id=1)
+
+
+def build_job(total_sims: int = 10, user_id: int = user.id) -> SimulationJob:
+    return SimulationJob(
+        user_id, test_party, test_enemies, parameters, total_sims, seed=1
+    )
+
+
+def run_jobs(queue: SimulationJobQueue, jobs: list[SimulationJob]) -> None:
+    """Starts `queue`, lets it finish `jobs`, then stops it."""
+
+    async def run():
+        queue.start()
+        while any(job.finished_at is None for job in jobs):
+            await asyncio.sleep(0.01)
+        await queue.stop()
+
+    asyncio.run(run())
+
+
+def test_job_runs_and_counts_progress():
+    queue = SimulationJobQueue(SimulationExecutor(max_chunk_size=3))
+    job = queue.submit(build_job())
+    progress = []
+    add_progress = job.add_progress
+
+    def record_progress(num_sims):
+        add_progress(num_sims)
+        progress.append(job.completed_sims)
+
+    job.add_progress = record_progress
+    run_jobs(queue, [job])
+
+    assert job.status == "complete"
+    assert len(progress) > 1
+    assert progress[-1] == job.completed_sims == 10
+    assert job.results["total_sims"] == 10
+    assert job.player_dicts is None
+    assert queue.get(job.id) is job
+
+
+def test_jobs_wait_until_started():
+    queue = SimulationJobQueue(SimulationExecutor(), num_workers=1)
+    jobs = [queue.submit(build_job(2)) for _ in range(3)]
+
+    assert [job.status for job in jobs] == ["queued"] * 3
+    run_jobs(queue, jobs)
+    assert [job.status for job in jobs] == ["complete"] * 3
+
+
+def test_full_queue_is_unavailable():
+    queue = SimulationJobQueue(SimulationExecutor(), max_queued=1)
+    queue.submit(build_job())
+
+    with pytest.raises(ServiceUnavailableException) as error:
+        queue.submit(build_job())
+    assert error.value.status_code == 503
+
+
+def test_finished_jobs_expire():
+    queue = SimulationJobQueue(SimulationExecutor(), num_workers=1)
+    jobs = [queue.submit(build_job(1)) for _ in range(3)]
+    run_jobs(queue, jobs)
+
+    # Only the most recently finished jobs that fit in max_stored are kept
+    assert all(job.stored_size > 0 for job in jobs)
+    queue.max_stored = jobs[1].stored_size + jobs[2].stored_size
+    assert queue.get(jobs[0].id) is None
+    assert queue.get(jobs[1].id) is jobs[1]
+    assert queue.get(jobs[2].id) is jobs[2]
+
+    jobs[1].finished_at -= queue.result_ttl + 1
+    assert queue.get(jobs[1].id) is None
+    assert queue.get(jobs[2].id) is jobs[2]
+
+
+def test_latest_job_is_kept_whatever_its_size():
+    queue = SimulationJobQueue(SimulationExecutor(), max_stored=1)
+    job = queue.submit(build_job(5))
+    run_jobs(queue, [job])
+
+    assert job.stored_size > queue.max_stored
+    assert queue.get(job.id) is job
+
+
+def test_large_jobs_cannot_collect_logs():
+    enemies = [{"id": 1, "quantity": 1}]
+    assert not SimJobRequest(enemies=enemies, total_sims=500).collect_log
+    SimJobRequest(enemies=enemies, total_sims=100, collect_log=True)
+    SimJobRequest(
+        enemies=enemies,
+        total_sims=500,
+        collect_log=True,
+        engine="vectorized",
+    )
+
+    with pytest.raises(ValidationError, match="/simulation/replay"):
+        SimJobRequest(enemies=enemies, total_sims=101, collect_log=True)
+
+
+@pytest.fixture
+def jobs(monkeypatch):
+    """Gives the simulation routes a job queue with no workers."""
+    queue = SimulationJobQueue(SimulationExecutor(), max_queued=1)
+    monkeypatch.setattr(simulation, "simulation_jobs", queue)
+    return queue
+
+
+@pytest.fixture
+def client(session, catalog, jobs):
+    session.rows["characters"] = []
+    app = FastAPI()
+    app.include_router(simulation.router)
+    app.dependency_overrides[dependencies.get_db] = lambda: session
+    app.dependency_overrides[simulation.get_current_user] = lambda: user
+    return TestClient(app)
+
+
+def test_job_routes(client, jobs):
+    request = {"enemies": [{"id": 1, "quantity": 1}], "total_sims": 500}
+    response = client.post("/simulation/jobs", json=request)
+    job_id = response.json()["job_id"]
+
+    assert response.status_code == 202
+    assert response.json()["status"] == "queued"
+    assert response.json()["total_sims"] == 500
+
+    response = client.get(f"/simulation/jobs/{job_id}")
+    assert response.status_code == 200
+    assert response.json()["completed_sims"] == 0
+
+    response = client.get(f"/simulation/jobs/{job_id}/result")
+    assert response.status_code == 409
+
+    response = client.post("/simulation/jobs", json=request)
+    assert response.status_code == 503
+
+    response = client.get("/simulation/jobs/unknown")
+    assert response.status_code == 404
+
+    jobs.get(job_id).user_id = 2
+    response = client.get(f"/simulation/jobs/{job_id}")
+    assert response.status_code == 403
+
+
+def test_large_requests_need_a_job(client):
+    request = {"enemies": [{"id": 1, "quantity": 1}], "total_sims": 101}
+    response = client.post("/simulation", json=request)
+
+    assert response.status_code == 422
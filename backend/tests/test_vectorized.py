@@ -0,0 +1,125 @@
+import random
+
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from ..schemas import SimJobRequest, SimRequest
+from ..simulation.core.executor import run_batch
+from ..simulation.mechanics.misc import calculate_dos, stride
+from ..simulation.vectorized import engine
+from ..simulation.vectorized.engine import run_vectorized_batch
+from .sample_data import (
+    test_enemies,
+    test_enemy,
+    test_enemy_3,
+    test_enemy_sneak,
+    test_party,
+    test_player,
+    test_player_2,
+    test_player_4,
+)
+
+# Both engines are seeded, so these runs are the same every time. With this
+# many simulations the differences seen are well inside these tolerances.
+num_sims = 2000
+tolerances = {"wins": 0.05, "players_killed": 0.1, "rounds": 0.15}
+
+
+def per_sim(batch):
+    return {
+        key: batch[key] / batch["total_sims"]
+        for key in ("wins", "players_killed", "rounds")
+    }
+
+
+def test_calculate_dos_matches_reference():
+    rolls, bonuses, difficulties = np.meshgrid(
+        np.arange(1, 21), np.arange(-5, 25), np.arange(10, 40)
+    )
+    results = rolls + bonuses
+    expected = np.vectorize(calculate_dos)(rolls, results, difficulties)
+
+    assert (
+        engine.calculate_dos(rolls, results, difficulties) == expected
+    ).all()
+
+
+def test_stride_matches_reference():
+    distances_x, distances_y, speeds = np.meshgrid(
+        np.arange(30), np.arange(30), np.arange(0, 60)
+    )
+    expected = np.vectorize(stride)(distances_x, distances_y, speeds)
+    actual = engine.stride(distances_x, distances_y, speeds)
+
+    for expected_part, actual_part in zip(expected, actual):
+        assert (actual_part == expected_part).all()
+
+
+@pytest.mark.parametrize(
+    "players, enemies, starting_distance",
+    [
+        (test_party, test_enemies, 30),
+        ([test_player, test_player_4], [test_enemy_3, test_enemy_sneak], 50),
+        ([test_player_2], [test_enemy, test_enemy], 10),
+    ],
+)
+def test_stats_match_reference(players, enemies, starting_distance):
+    parameters = {
+        "starting_distance": starting_distance,
+        "health_multiplier": 1.0,
+    }
+    random.seed(0)
+    reference = run_batch(
+        players, enemies, parameters, 1, num_sims, collect_log=False
+    )
+    vectorized = run_vectorized_batch(
+        players, enemies, parameters, num_sims, seed=0
+    )
+
+    assert vectorized["total_sims"] == num_sims
+    expected, actual = per_sim(reference), per_sim(vectorized)
+    for key, tolerance in tolerances.items():
+        assert actual[key] == pytest.approx(expected[key], abs=tolerance)
+
+
+def test_seeded_batches_repeat():
+    parameters = {"starting_distance": 50, "health_multiplier": 1.0}
+    first = run_vectorized_batch(test_party, test_enemies, parameters, 50, 7)
+    second = run_vectorized_batch(test_party, test_enemies, parameters, 50, 7)
+
+    assert first == second
+
+
+def test_max_rounds():
+    parameters = {"starting_distance": 50, "health_multiplier": 1.0}
+    batch = run_vectorized_batch(
+        test_party, test_enemies, parameters, 50, max_rounds=1
+    )
+
+    assert batch["rounds"] == 50
+
+
+def test_run_batch_with_vectorized_engine():
+    parameters = {"starting_distance": 50, "health_multiplier": 1.0}
+    batch = run_batch(
+        test_party, test_enemies, parameters, 1, 20, engine="vectorized"
+    )
+
+    assert batch["total_sims"] == 20
+    assert 0 <= batch["wins"] <= 20
+    assert batch["sim_data"] == []
+
+
+def test_sim_request_limits():
+    enemies = [{"id": 1, "quantity": 1}]
+    SimRequest(enemies=enemies, total_sims=100)
+    SimJobRequest(enemies=enemies, total_sims=100000, engine="vectorized")
+
+    # Only jobs may run more than the waiting client's limit
+    with pytest.raises(ValidationError):
+        SimRequest(enemies=enemies, total_sims=101, engine="vectorized")
+    with pytest.raises(ValidationError):
+        SimJobRequest(enemies=enemies, total_sims=20000)
+    with pytest.raises(ValidationError):
+        SimJobRequest(enemies=enemies, total_sims=100001, engine="vectorized")